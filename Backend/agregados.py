@@ -0,0 +1,186 @@
+# Arquivo: backend/agregados.py (Agregados parciais combináveis das análises)
+# Um "parcial" resume um trecho contínuo de telemetria (em geral um dia) com somas, contagens, mínimos,
+# máximos e os valores das bordas. Parciais de trechos consecutivos são combinados em ordem e o resultado
+# gera os mesmos indicadores de analises.calcular_indicadores sobre as linhas brutas, sem relê-las.
+
+import logging
+
+import numpy as np
+
+from analises import (MAPEAMENTO_COLUNAS, COLUNAS_TOTALIZADORES, _corrente_valida, _matriz, _maximo, _minimo,
+                      _sem_avisos, comentarios_de_erro, comentarios_de_indicadores, contar_fases, indicadores_acessorios,
+                      limiares_corrente, limiares_prodist, limiares_tensao)
+
+logger = logging.getLogger(__name__)
+
+VERSAO_AGREGADOS = 2
+FASES_TENSAO = [MAPEAMENTO_COLUNAS[k] for k in ('tensao_a', 'tensao_b', 'tensao_c')]
+FASES_CORRENTE = [MAPEAMENTO_COLUNAS[k] for k in ('corrente_a', 'corrente_b', 'corrente_c')]
+FASES_FP = [MAPEAMENTO_COLUNAS[k] for k in ('fp_a', 'fp_b', 'fp_c')]
+
+def _fases(df, colunas):
+    # Matriz sempre com as três fases; fase ausente vira coluna NaN (não atende nenhum limiar).
+    m = _matriz(df, [c for c in colunas if c in df.columns])
+    if m.shape[1] == len(colunas): return m
+    completa = np.full((len(df), len(colunas)), np.nan, dtype=m.dtype)
+    for j, col in enumerate(colunas):
+        if col in df.columns: completa[:, j] = m[:, [c for c in colunas if c in df.columns].index(col)]
+    return completa
+
+def _soma_contagem(m):
+    validos = ~np.isnan(m)
+    return np.where(validos, m, 0).sum(axis=0, dtype=np.float64).tolist(), validos.sum(axis=0).tolist()
+
+def _extremos(m):
+    validos = ~np.isnan(m)
+    with np.errstate(invalid='ignore'):
+        minimos = np.where(validos.any(axis=0), np.where(validos, m, np.inf).min(axis=0), np.nan)
+        maximos = np.where(validos.any(axis=0), np.where(validos, m, -np.inf).max(axis=0), np.nan)
+    return minimos.astype(float).tolist(), maximos.astype(float).tolist()
+
+def _borda(valor):
+    return float(valor) if not np.isnan(valor) else np.nan
+
+def calcular_parcial(df, corrente_nominal, tensao_nominal):
+    # Resumo de um trecho de telemetria (índice de tempo ordenado). Os limiares dependem das grandezas
+    # nominais, então um parcial só combina com outros calculados com os mesmos valores.
+    v, i, fp = _fases(df, FASES_TENSAO), _fases(df, FASES_CORRENTE), _fases(df, FASES_FP)
+    p = {'linhas': len(df), 'colunas': sorted(c for c in df.columns if c in MAPEAMENTO_COLUNAS.values())}
+
+    p['v_min'], p['v_max'] = _extremos(v)
+    p['v_soma'], p['v_cont'] = _soma_contagem(v)
+    fases_v = contar_fases(v, limiares_tensao(tensao_nominal))
+    p['sem_energia'] = int((fases_v['sem_tensao'] == 3).sum())
+    p['falta_fase'] = int(((fases_v['com_tensao'] >= 1) & (fases_v['normal'] >= 2) & (fases_v['baixa'] >= 1)).sum())
+    p['desligado'] = int((_sem_avisos(np.nanmean, fp, axis=1) < 0.3).sum()) if len(df) else 0
+    # Registros com alguma fase fora da faixa adequada / crítica do PRODIST (sem contar a falta de energia).
+    fora = contar_fases(v, limiares_prodist(tensao_nominal))
+    com_energia = fases_v['sem_tensao'] < 3
+    p['v_violacao'] = int((com_energia & (fora['abaixo_adequada'] + fora['acima_adequada'] >= 1)).sum())
+    p['v_critica'] = int((com_energia & (fora['abaixo_critica'] + fora['acima_critica'] >= 1)).sum())
+
+    fase_a = i[:, 0]
+    p['ia_primeiro'] = _borda(fase_a[0]) if len(df) else np.nan
+    p['ia_ultimo'] = _borda(fase_a[-1]) if len(df) else np.nan
+    p['partidas'] = int(((fase_a[1:] > 1) & (fase_a[:-1] <= 1)).sum())
+    p['operando'], p['i_soma'], p['i_cont'], p['i_max'], p['deseq_max'], p['fase_aberta'] = 0, [0.0] * 3, [0] * 3, np.nan, np.nan, 0
+    if _corrente_valida(corrente_nominal):
+        fases_i = contar_fases(i, limiares_corrente(corrente_nominal))
+        operando = fases_i['operando'] > 0
+        p['operando'] = int(operando.sum())
+        if p['operando']:
+            i_op = i[operando]
+            p['i_soma'], p['i_cont'] = _soma_contagem(i_op)
+            p['i_max'] = _maximo(i_op)
+            deseq = np.where(i_op < corrente_nominal / 2, 0, i_op)
+            deseq = deseq[np.nansum(deseq, axis=1) > 0]
+            if deseq.size:
+                media = _sem_avisos(np.nanmean, deseq, axis=1)
+                p['deseq_max'] = _maximo(_sem_avisos(np.nanmax, np.abs(deseq - media[:, None]), axis=1) / media * 100)
+            p['fase_aberta'] = int((operando & (fases_i['baixa'] >= 1) & (fases_i['normal'] == 2)).sum())
+
+    fp_operando = fase_a > 1
+    p['fp_operando'] = int(fp_operando.sum())
+    fp_op = fp[fp_operando]
+    p['fp_soma'], p['fp_cont'] = _soma_contagem(np.where(fp_op < 0.6, np.nan, fp_op))
+
+    p['ultimos'] = indicadores_acessorios(df)
+    return p
+
+def _fmin(a, b):
+    return np.fmin(np.asarray(a, dtype=float), np.asarray(b, dtype=float)).tolist()
+
+def _fmax(a, b):
+    return np.fmax(np.asarray(a, dtype=float), np.asarray(b, dtype=float)).tolist()
+
+def _somar(a, b):
+    return (np.asarray(a) + np.asarray(b)).tolist()
+
+def combinar(anterior, seguinte):
+    # Combina dois parciais de trechos consecutivos (anterior vem antes no tempo).
+    if anterior is None: return seguinte
+    if seguinte is None: return anterior
+    partida_na_borda = seguinte['ia_primeiro'] > 1 and anterior['ia_ultimo'] <= 1  # NaN nunca conta
+    return {
+        'linhas': anterior['linhas'] + seguinte['linhas'],
+        'colunas': sorted(set(anterior['colunas']) | set(seguinte['colunas'])),
+        'v_min': _fmin(anterior['v_min'], seguinte['v_min']), 'v_max': _fmax(anterior['v_max'], seguinte['v_max']),
+        'v_soma': _somar(anterior['v_soma'], seguinte['v_soma']), 'v_cont': _somar(anterior['v_cont'], seguinte['v_cont']),
+        'sem_energia': anterior['sem_energia'] + seguinte['sem_energia'],
+        'falta_fase': anterior['falta_fase'] + seguinte['falta_fase'],
+        'desligado': anterior['desligado'] + seguinte['desligado'],
+        'v_violacao': anterior['v_violacao'] + seguinte['v_violacao'], 'v_critica': anterior['v_critica'] + seguinte['v_critica'],
+        'ia_primeiro': anterior['ia_primeiro'] if anterior['linhas'] else seguinte['ia_primeiro'],
+        'ia_ultimo': seguinte['ia_ultimo'] if seguinte['linhas'] else anterior['ia_ultimo'],
+        'partidas': anterior['partidas'] + seguinte['partidas'] + int(partida_na_borda),
+        'operando': anterior['operando'] + seguinte['operando'],
+        'i_soma': _somar(anterior['i_soma'], seguinte['i_soma']), 'i_cont': _somar(anterior['i_cont'], seguinte['i_cont']),
+        'i_max': float(np.fmax(anterior['i_max'], seguinte['i_max'])),
+        'deseq_max': float(np.fmax(anterior['deseq_max'], seguinte['deseq_max'])),
+        'fase_aberta': anterior['fase_aberta'] + seguinte['fase_aberta'],
+        'fp_operando': anterior['fp_operando'] + seguinte['fp_operando'],
+        'fp_soma': _somar(anterior['fp_soma'], seguinte['fp_soma']), 'fp_cont': _somar(anterior['fp_cont'], seguinte['fp_cont']),
+        'ultimos': {**anterior['ultimos'], **seguinte['ultimos']},
+    }
+
+def combinar_todos(parciais):
+    resultado = None
+    for parcial in parciais:
+        resultado = combinar(resultado, parcial)
+    return resultado
+
+def _media_por_coluna(soma, cont):
+    # Média de cada fase e depois a média entre as fases com valores (como _media_das_colunas).
+    soma, cont = np.asarray(soma, dtype=np.float64), np.asarray(cont)
+    medias = soma[cont > 0] / cont[cont > 0]
+    return float(medias.mean()) if medias.size else np.nan
+
+def indicadores_de_parcial(p, corrente_nominal):
+    # Mesmo formato de analises.calcular_indicadores.
+    presentes = set(p['colunas'])
+    n_tensao = sum(c in presentes for c in FASES_TENSAO)
+    n_corrente = sum(c in presentes for c in FASES_CORRENTE)
+    n_fp = sum(c in presentes for c in FASES_FP)
+
+    tensao = None
+    if n_tensao == 3:
+        cont = np.asarray(p['v_cont'])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            medias = np.where(cont > 0, np.asarray(p['v_soma'], dtype=np.float64) / cont, np.nan)
+        minimos, maximos = np.asarray(p['v_min'], dtype=float), np.asarray(p['v_max'], dtype=float)
+        resumo = (minimos + maximos + medias) / 3
+        resumo = resumo[~np.isnan(resumo)]
+        tensao = {'min': _minimo(minimos), 'max': _maximo(maximos), 'media': float(resumo.mean()) if resumo.size else np.nan}
+
+    corrente = None
+    if n_corrente == 3 and _corrente_valida(corrente_nominal):
+        corrente = {'registros_operacao': p['operando'], 'partidas': p['partidas']}
+        if p['operando']:
+            corrente.update(media_op=_media_por_coluna(p['i_soma'], p['i_cont']), max_op=p['i_max'],
+                            max_desequilibrio_pct=p['deseq_max'], horas_fase_aberta=p['fase_aberta'])
+
+    fp = None
+    if n_fp and FASES_CORRENTE[0] in presentes:
+        fp = {'registros_operacao': p['fp_operando']}
+        if p['fp_operando']: fp['fp_medio'] = _media_por_coluna(p['fp_soma'], p['fp_cont'])
+
+    operacao = {'horas_desligado': p['desligado'] if n_fp else 0,
+                'horas_sem_energia': p['sem_energia'] if n_tensao == 3 else 0,
+                'horas_falta_fase': p['falta_fase'] if n_tensao == 3 else 0}
+    ultimos = {chave: p['ultimos'][chave] for chave in COLUNAS_TOTALIZADORES if chave in p['ultimos']}
+    return {'tensao': tensao, 'corrente': corrente, 'fp': fp, 'operacao': operacao, 'acessorios': ultimos, 'colunas_corrente': n_corrente}
+
+def parciais_diarios(df, corrente_nominal, tensao_nominal):
+    # {'AAAA-MM-DD': parcial} de cada dia com dados, em ordem.
+    if df.empty: return {}
+    dias = df.index.normalize()
+    return {dia.strftime('%Y-%m-%d'): calcular_parcial(trecho, corrente_nominal, tensao_nominal)
+            for dia, trecho in df.groupby(dias, sort=True)}
+
+def analisar_parciais(parciais, corrente_nominal, tensao_nominal):
+    # Equivalente a analises.analisar_dados_prodist sobre a concatenação dos trechos dos parciais.
+    p = combinar_todos(parciais)
+    if p is None or sum(c in p['colunas'] for c in FASES_TENSAO) != 3:
+        logger.error("Erro na análise: Colunas de tensão (AVRMS, BVRMS, CVRMS) não encontradas no CSV.")
+        return comentarios_de_erro(tensao_nominal)
+    return comentarios_de_indicadores(indicadores_de_parcial(p, corrente_nominal), corrente_nominal, tensao_nominal)
@@ -1,7 +1,12 @@
 # Arquivo: backend/analises.py (Versão Final com Lógica Completa)
 
+import logging
+import warnings
+import numpy as np
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
 MAPEAMENTO_COLUNAS = {
     'timestamp': 'Time', 'tensao_a': 'AVRMS', 'tensao_b': 'BVRMS', 'tensao_c': 'CVRMS',
     'corrente_a': 'AIRMS', 'corrente_b': 'BIRMS', 'corrente_c': 'CIRMS',
@@ -10,68 +15,182 @@ MAPEAMENTO_COLUNAS = {
     'vazao': 'VAZAO', 'velocidade': 'VELOCIDADE'
 }
 
-def analisar_acessorios(df):
-    textos = []
-    colunas_totalizadores = {
-        'dia': 'Vazão Diária (m³)', 'mes': 'Vazão Mensal (m³)',
-        'vazao': 'Vazão Acumulada (m³)', 'total': 'Vazão Total da Safra (m³)'
-    }
-    for key, descricao in colunas_totalizadores.items():
+COLUNAS_TOTALIZADORES = {
+    'dia': 'Vazão Diária (m³)', 'mes': 'Vazão Mensal (m³)',
+    'vazao': 'Vazão Acumulada (m³)', 'total': 'Vazão Total da Safra (m³)'
+}
+
+# --- Núcleo vetorizado ---
+# As colunas de tensão, corrente e FP são extraídas uma única vez para matrizes NumPy (linhas x fases)
+# e todos os indicadores saem de máscaras sobre essas matrizes, sem cópias do DataFrame. NaN nunca
+# satisfaz uma comparação e é ignorado nas médias/máximos, como no pandas com skipna.
+
+def _colunas(df, chaves):
+    return [MAPEAMENTO_COLUNAS.get(k) for k in chaves if MAPEAMENTO_COLUNAS.get(k) in df.columns]
+
+def _matriz(df, cols):
+    if not cols: return np.empty((len(df), 0))
+    bloco = df[cols]
+    dtype = np.float32 if all(t == np.float32 for t in bloco.dtypes) else np.float64
+    return bloco.to_numpy(dtype=dtype, na_value=np.nan)
+
+def _sem_avisos(func, *args, **kwargs):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return func(*args, **kwargs)
+
+def _media_das_colunas(m):
+    # Equivale a df[cols].mean().mean(): média de cada coluna e depois média entre as colunas válidas.
+    if m.size == 0: return np.nan
+    validos = ~np.isnan(m)
+    contagem = validos.sum(axis=0)
+    soma = np.where(validos, m, 0).sum(axis=0, dtype=np.float64)
+    medias = soma[contagem > 0] / contagem[contagem > 0]
+    return float(medias.mean()) if medias.size else np.nan
+
+def _maximo(m):
+    return float(_sem_avisos(np.nanmax, m)) if m.size else np.nan
+
+def _minimo(m):
+    return float(_sem_avisos(np.nanmin, m)) if m.size else np.nan
+
+def _estatisticas_por_coluna(m):
+    # Mínimo, máximo e média de cada coluna (NaN onde a coluna não tem valores).
+    validos = ~np.isnan(m)
+    contagem = validos.sum(axis=0)
+    if not m.size: return np.full(m.shape[1], np.nan), np.full(m.shape[1], np.nan), np.full(m.shape[1], np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        minimos = np.where(contagem > 0, np.where(validos, m, np.inf).min(axis=0), np.nan)
+        maximos = np.where(contagem > 0, np.where(validos, m, -np.inf).max(axis=0), np.nan)
+        medias = np.where(validos, m, 0).sum(axis=0, dtype=np.float64) / contagem
+    return minimos, maximos, medias
+
+def indicadores_tensao(v):
+    # A "Média" do relatório sempre foi df.agg(['min', 'max', 'mean']).mean().mean(), ou seja, a média
+    # de (mín + máx + média) / 3 de cada fase; mantida assim para não mudar os relatórios emitidos.
+    minimos, maximos, medias = _estatisticas_por_coluna(v)
+    resumo = (minimos + maximos + medias) / 3
+    resumo = resumo[~np.isnan(resumo)]
+    return {'min': _minimo(minimos), 'max': _maximo(maximos), 'media': float(resumo.mean()) if resumo.size else np.nan}
+
+# --- Motor de contagem por limiares ---
+# Cada limiar vira uma comparação sobre a matriz inteira e uma contagem de fases por linha; as
+# condições (sem energia, falta de fase, fase aberta...) são combinações dessas contagens.
+_OPERADORES = {'>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal}
+
+def contar_fases(m, limiares):
+    # limiares: {nome: (operador, valor)} -> {nome: array com quantas fases de cada linha atendem}
+    return {nome: np.count_nonzero(_OPERADORES[operador](m, valor), axis=1) for nome, (operador, valor) in limiares.items()}
+
+def limiares_tensao(tensao_nominal):
+    return {'sem_tensao': ('<', 30), 'com_tensao': ('>=', 30),
+            'normal': ('>', tensao_nominal * 0.80), 'baixa': ('<', tensao_nominal * 0.50)}
+
+def limiares_prodist(tensao_nominal):
+    # Faixas do texto_tensao: adequada entre 92% e 105% da nominal, crítica abaixo de 91% ou acima de 106%.
+    return {'abaixo_adequada': ('<', tensao_nominal * 0.92), 'acima_adequada': ('>', tensao_nominal * 1.05),
+            'abaixo_critica': ('<', tensao_nominal * 0.91), 'acima_critica': ('>', tensao_nominal * 1.06)}
+
+def limiares_corrente(corrente_nominal):
+    return {'operando': ('>', 1), 'baixa': ('<', 1), 'normal': ('>', corrente_nominal * 0.5)}
+
+def indicadores_corrente(i, corrente_nominal):
+    fases = contar_fases(i, limiares_corrente(corrente_nominal))
+    operando = fases['operando'] > 0
+    ind = {'registros_operacao': int(operando.sum())}
+    fase_a = i[:, 0]
+    ind['partidas'] = int(((fase_a[1:] > 1) & (fase_a[:-1] <= 1)).sum())
+    if not ind['registros_operacao']: return ind
+    i_op = i[operando]
+    ind['media_op'] = _media_das_colunas(i_op)
+    ind['max_op'] = _maximo(i_op)
+    deseq = np.where(i_op < corrente_nominal / 2, 0, i_op)
+    deseq = deseq[np.nansum(deseq, axis=1) > 0]
+    ind['max_desequilibrio_pct'] = np.nan
+    if deseq.size:
+        media = _sem_avisos(np.nanmean, deseq, axis=1)
+        desvio_max = _sem_avisos(np.nanmax, np.abs(deseq - media[:, None]), axis=1)
+        ind['max_desequilibrio_pct'] = _maximo(desvio_max / media * 100)
+    ind['horas_fase_aberta'] = int((operando & (fases['baixa'] >= 1) & (fases['normal'] == 2)).sum())
+    return ind
+
+def indicadores_fator_potencia(fp, corrente_ref):
+    operando = corrente_ref > 1
+    ind = {'registros_operacao': int(operando.sum())}
+    if not ind['registros_operacao']: return ind
+    fp_op = fp[operando]
+    ind['fp_medio'] = _media_das_colunas(np.where(fp_op < 0.6, np.nan, fp_op))
+    return ind
+
+def indicadores_operacao(v, fp, tensao_nominal):
+    ind = {'horas_desligado': 0, 'horas_sem_energia': 0, 'horas_falta_fase': 0}
+    if fp.shape[1] and fp.shape[0]:
+        ind['horas_desligado'] = int((_sem_avisos(np.nanmean, fp, axis=1) < 0.3).sum())
+    if v.shape[1] == 3:
+        fases = contar_fases(v, limiares_tensao(tensao_nominal))
+        ind['horas_sem_energia'] = int((fases['sem_tensao'] == 3).sum())
+        ind['horas_falta_fase'] = int(((fases['com_tensao'] >= 1) & (fases['normal'] >= 2) & (fases['baixa'] >= 1)).sum())
+    return ind
+
+def indicadores_acessorios(df):
+    ultimos = {}
+    for key in COLUNAS_TOTALIZADORES:
         nome_coluna = MAPEAMENTO_COLUNAS.get(key)
         if nome_coluna and nome_coluna in df.columns:
-            serie_com_valores = df[nome_coluna][df[nome_coluna] > 0]
-            if not serie_com_valores.empty:
-                ultimo_indice_valido = serie_com_valores.last_valid_index()
-                if ultimo_indice_valido is not None:
-                    valor = df.loc[ultimo_indice_valido, nome_coluna]
-                    textos.append(f"- {descricao}: {valor:.2f}")
+            valores = df[nome_coluna].to_numpy(dtype=np.float64, na_value=np.nan)
+            positivos = np.flatnonzero(valores > 0)
+            if positivos.size: ultimos[key] = float(valores[positivos[-1]])
+    return ultimos
+
+def calcular_indicadores(df, corrente_nominal, tensao_nominal):
+    # Passada única usada por analisar_dados_prodist: cada grupo de colunas vira matriz uma vez só.
+    cols_tensao = _colunas(df, ['tensao_a', 'tensao_b', 'tensao_c'])
+    cols_corrente = _colunas(df, ['corrente_a', 'corrente_b', 'corrente_c'])
+    cols_fp = _colunas(df, ['fp_a', 'fp_b', 'fp_c'])
+    v, i, fp = _matriz(df, cols_tensao), _matriz(df, cols_corrente), _matriz(df, cols_fp)
+    corrente_ref = i[:, cols_corrente.index(MAPEAMENTO_COLUNAS['corrente_a'])] if MAPEAMENTO_COLUNAS['corrente_a'] in cols_corrente else None
+    return {
+        'tensao': indicadores_tensao(v) if len(cols_tensao) == 3 else None,
+        'corrente': indicadores_corrente(i, corrente_nominal) if len(cols_corrente) == 3 and _corrente_valida(corrente_nominal) else None,
+        'fp': indicadores_fator_potencia(fp, corrente_ref) if cols_fp and corrente_ref is not None else None,
+        'operacao': indicadores_operacao(v, fp, tensao_nominal),
+        'acessorios': indicadores_acessorios(df),
+        'colunas_corrente': len(cols_corrente),
+    }
+
+# --- Textos dos diagnósticos ---
+def _corrente_valida(corrente_nominal):
+    return isinstance(corrente_nominal, (int, float)) and not corrente_nominal <= 0
+
+def texto_acessorios(ultimos):
+    textos = [f"- {descricao}: {ultimos[key]:.2f}" for key, descricao in COLUNAS_TOTALIZADORES.items() if key in ultimos]
     if not textos: return ""
     return "Últimos Registros dos Totalizadores de Vazão:\n" + "\n".join(textos)
 
-def analisar_corrente(df, corrente_nominal):
-    if not isinstance(corrente_nominal, (int, float)) or corrente_nominal <= 0:
+def texto_corrente(ind, corrente_nominal, colunas_corrente=3):
+    if not _corrente_valida(corrente_nominal):
         return "Corrente nominal não fornecida ou inválida. A análise de corrente não pôde ser executada."
-    cols_corrente_keys = ['corrente_a', 'corrente_b', 'corrente_c']
-    cols_corrente = [MAPEAMENTO_COLUNAS.get(k) for k in cols_corrente_keys if MAPEAMENTO_COLUNAS.get(k) in df.columns]
-    if len(cols_corrente) != 3: return "Para a análise de corrente, são necessárias as três colunas de fase (AIRMS, BIRMS, CIRMS)."
-    df_op = df[(df[cols_corrente] > 1).any(axis=1)].copy()
-    if df_op.empty: return "Não foram encontrados registros de operação do motor (corrente > 1A) para analisar."
+    if colunas_corrente != 3: return "Para a análise de corrente, são necessárias as três colunas de fase (AIRMS, BIRMS, CIRMS)."
+    if not ind['registros_operacao']: return "Não foram encontrados registros de operação do motor (corrente > 1A) para analisar."
     diagnosticos = []
-    corrente_media_op = df_op[cols_corrente].mean().mean()
+    corrente_media_op, corrente_max_registrada = ind['media_op'], ind['max_op']
     if corrente_media_op > corrente_nominal: diagnosticos.append(f"- Sobrecarga: A corrente média em operação ({corrente_media_op:.1f} A) excedeu a corrente nominal ({corrente_nominal} A), indicando possível sobrecarga mecânica no eixo ou problemas no acionamento.")
-    corrente_max_registrada = df_op[cols_corrente].max().max()
     if corrente_max_registrada > corrente_nominal * 4: diagnosticos.append(f"- Pico de Corrente Extremo: Foi registrado um pico de {corrente_max_registrada:.1f} A, valor que pode indicar um evento de rotor travado ou curto-circuito.")
     if corrente_media_op < (corrente_nominal * 0.4): diagnosticos.append(f"- Operação em Vazio: A corrente média em operação ({corrente_media_op:.1f} A) está abaixo de 40% da nominal, sugerindo que o motor pode operar longos períodos sem carga, o que é energeticamente ineficiente.")
-    df_desequilibrio = df_op[cols_corrente].copy()
-    limite_corrente_zero = corrente_nominal / 2
-    df_desequilibrio[df_desequilibrio < limite_corrente_zero] = 0
-    df_desequilibrio = df_desequilibrio[df_desequilibrio.sum(axis=1) > 0]
-    if not df_desequilibrio.empty:
-        df_desequilibrio['media'] = df_desequilibrio[cols_corrente].mean(axis=1)
-        df_desequilibrio['desvio_max'] = df_desequilibrio[cols_corrente].subtract(df_desequilibrio['media'], axis=0).abs().max(axis=1)
-        df_desequilibrio['desequilibrio_pct'] = (df_desequilibrio['desvio_max'] / df_desequilibrio['media'].replace(0, pd.NA) * 100)
-        max_desequilibrio = df_desequilibrio['desequilibrio_pct'].max()
-        if pd.notna(max_desequilibrio) and max_desequilibrio > 10: diagnosticos.append(f"- Desequilíbrio de Corrente: Foi detectado um desequilíbrio máximo de {max_desequilibrio:.1f}% entre as fases.")
-    num_partidas = (df[cols_corrente[0]].gt(1) & df[cols_corrente[0]].shift(1).le(1)).sum()
+    max_desequilibrio = ind['max_desequilibrio_pct']
+    if pd.notna(max_desequilibrio) and max_desequilibrio > 10: diagnosticos.append(f"- Desequilíbrio de Corrente: Foi detectado um desequilíbrio máximo de {max_desequilibrio:.1f}% entre as fases.")
+    num_partidas = ind['partidas']
     if num_partidas > 90: diagnosticos.append(f"- Ciclo de Operação Elevado: O motor teve {num_partidas} partidas durante o período, o que pode indicar mau dimensionamento ou falhas no sistema de controle.")
-    df_op['fase_baixa'] = (df_op[cols_corrente] < 1).sum(axis=1)
-    df_op['fase_normal'] = (df_op[cols_corrente] > corrente_nominal * 0.5).sum(axis=1)
-    horas_fase_aberta = df_op[(df_op['fase_baixa'] >= 1) & (df_op['fase_normal'] == 2)].shape[0]
+    horas_fase_aberta = ind['horas_fase_aberta']
     if horas_fase_aberta > 0: diagnosticos.append(f"- Suspeita de Fase Aberta: Em {horas_fase_aberta} hora(s), uma das fases apresentou corrente próxima de zero enquanto as outras operavam normalmente, um forte indicativo de falha elétrica severa.")
     if not diagnosticos:
         return "A análise das correntes indicou uma operação CONFORME, sem anomalias significativas em relação à corrente nominal e aos padrões de falha monitorados."
     return "Foram detectados os seguintes pontos de atenção na análise das correntes:\n\n" + "\n\n".join(diagnosticos)
 
-def analisar_fator_potencia(df):
-    cols_fp_keys = ['fp_a', 'fp_b', 'fp_c']
-    cols_fp = [MAPEAMENTO_COLUNAS.get(k) for k in cols_fp_keys if MAPEAMENTO_COLUNAS.get(k) in df.columns]
-    col_corrente_ref = MAPEAMENTO_COLUNAS.get('corrente_a')
-    if not cols_fp or not col_corrente_ref or col_corrente_ref not in df.columns: return "Dados de Fator de Potência ou Corrente insuficientes para uma análise completa."
-    df_operacional = df[df[col_corrente_ref] > 1].copy()
-    if df_operacional.empty: return "Não foram encontrados registros de operação do motor (corrente > 1A) para analisar o Fator de Potência."
-    fp_filtrado = df_operacional[cols_fp].copy()
-    fp_filtrado[fp_filtrado < 0.6] = pd.NA
-    fp_medio = fp_filtrado.mean().mean()
+def texto_fator_potencia(ind):
+    if ind is None: return "Dados de Fator de Potência ou Corrente insuficientes para uma análise completa."
+    if not ind['registros_operacao']: return "Não foram encontrados registros de operação do motor (corrente > 1A) para analisar o Fator de Potência."
+    fp_medio = ind['fp_medio']
     if pd.isna(fp_medio): return "Não foi possível calcular o Fator de Potência médio (valores de operação podem estar todos abaixo de 0.6)."
     texto_analise = f"O Fator de Potência médio registrado durante a operação (descartando valores < 0.6) foi de {fp_medio:.3f}.\n\n"
     if fp_medio < 0.91: texto_analise += "Diagnóstico: SITUAÇÃO CRÍTICA.\n\nAnálise:\nO fator de potência médio ficou abaixo de 0,91, indicando uma utilização ineficiente da energia elétrica.\n\nRecomendação:\nRecomenda-se avaliar a instalação de bancos de capacitores."
@@ -79,54 +198,70 @@ def analisar_fator_potencia(df):
     else: texto_analise += "Diagnóstico: SITUAÇÃO IDEAL.\n\nAnálise:\nO fator de potência médio foi superior a 0,95, demonstrando excelente eficiência energética.\n\nRecomendação:\nSugere-se monitoramento contínuo, mas nenhuma ação corretiva é necessária."
     return texto_analise
 
+def texto_operacao(ind):
+    return (f"- Tempo total com motor desligado (FP < 0.3): {ind['horas_desligado']} horas.\n\n"
+            f"- Tempo total com falta de energia (Tensões < 30V): {ind['horas_sem_energia']} horas.\n\n"
+            f"- Tempo total com suspeita de falta de fase: {ind['horas_falta_fase']} horas.")
+
+def texto_tensao(ind, tensao_nominal):
+    # Retorna o comentário da seção de tensões e a lista de alertas para a conclusão final.
+    limites = {'adequado_sup': tensao_nominal * 1.05, 'adequado_inf': tensao_nominal * 0.92, 'critico_sup': tensao_nominal * 1.06, 'critico_inf': tensao_nominal * 0.91, 'desequilibrio_max_pct': 3.0}
+    comentarios_tensao, alertas = [], []
+    min_geral, max_geral = ind['min'], ind['max']
+    comentarios_tensao.append(f"Análise baseada em uma Tensão Nominal de referência de {tensao_nominal:.0f}V. Valores registrados: Mín. de {min_geral:.1f}V, Média de {ind['media']:.1f}V e Máx. de {max_geral:.1f}V.")
+    if max_geral > limites['critico_sup'] or min_geral < limites['critico_inf']:
+        alerta = f"níveis de tensão CRÍTICOS foram atingidos (Pico de {max_geral:.1f}V)"
+        comentarios_tensao.append(f"ALERTA: {alerta.capitalize()}. Violações desta natureza podem indicar problemas graves na rede.")
+        alertas.append(alerta)
+    return "\n\n".join(comentarios_tensao), alertas
+
+# --- Funções de análise (API pública) ---
+def analisar_acessorios(df):
+    return texto_acessorios(indicadores_acessorios(df))
+
+def analisar_corrente(df, corrente_nominal):
+    cols_corrente = _colunas(df, ['corrente_a', 'corrente_b', 'corrente_c'])
+    if not _corrente_valida(corrente_nominal) or len(cols_corrente) != 3: return texto_corrente(None, corrente_nominal, len(cols_corrente))
+    return texto_corrente(indicadores_corrente(_matriz(df, cols_corrente), corrente_nominal), corrente_nominal)
+
+def analisar_fator_potencia(df):
+    cols_fp = _colunas(df, ['fp_a', 'fp_b', 'fp_c'])
+    col_corrente_ref = MAPEAMENTO_COLUNAS.get('corrente_a')
+    if not cols_fp or col_corrente_ref not in df.columns: return texto_fator_potencia(None)
+    return texto_fator_potencia(indicadores_fator_potencia(_matriz(df, cols_fp), _matriz(df, [col_corrente_ref])[:, 0]))
+
 def analisar_operacao(df, tensao_nominal):
     try:
-        cols_tensao = [MAPEAMENTO_COLUNAS.get(k) for k in ['tensao_a', 'tensao_b', 'tensao_c'] if MAPEAMENTO_COLUNAS.get(k) in df.columns]
-        cols_fp = [MAPEAMENTO_COLUNAS.get(k) for k in ['fp_a', 'fp_b', 'fp_c'] if MAPEAMENTO_COLUNAS.get(k) in df.columns]
-        tempo_desligado_horas = int((df[cols_fp].mean(axis=1) < 0.3).sum()) if cols_fp and not df[cols_fp].empty else 0
-        tempo_sem_energia_horas = int((df[cols_tensao] < 30).all(axis=1).sum()) if len(cols_tensao) == 3 else 0
-        tempo_falta_fase_horas = 0
-        if len(cols_tensao) == 3:
-            limite_normal, limite_baixo = tensao_nominal * 0.80, tensao_nominal * 0.50
-            df_operando = df[(df[cols_tensao] >= 30).any(axis=1)]
-            if not df_operando.empty:
-                condicao = df_operando.apply(lambda row: (row[cols_tensao] > limite_normal).sum() >= 2 and (row[cols_tensao] < limite_baixo).sum() >= 1, axis=1)
-                tempo_falta_fase_horas = int(condicao.sum())
-        return (f"- Tempo total com motor desligado (FP < 0.3): {tempo_desligado_horas} horas.\n\n"
-                f"- Tempo total com falta de energia (Tensões < 30V): {tempo_sem_energia_horas} horas.\n\n"
-                f"- Tempo total com suspeita de falta de fase: {tempo_falta_fase_horas} horas.")
+        v = _matriz(df, _colunas(df, ['tensao_a', 'tensao_b', 'tensao_c']))
+        return texto_operacao(indicadores_operacao(v, _matriz(df, _colunas(df, ['fp_a', 'fp_b', 'fp_c'])), tensao_nominal))
     except Exception as e: return f"Ocorreu um erro ao processar os dados de operação: {e}"
 
-def analisar_dados_prodist(df, corrente_nominal, tensao_nominal):
+def comentarios_de_indicadores(ind, corrente_nominal, tensao_nominal):
+    # Textos de todas as seções a partir dos indicadores (de calcular_indicadores ou dos agregados).
     comentarios = {'tensao_nominal': tensao_nominal}
-    alertas_gerais = []
+    comentarios['tensao'], alertas_gerais = texto_tensao(ind['tensao'], tensao_nominal)
+    comentarios['corrente'] = texto_corrente(ind['corrente'], corrente_nominal, ind['colunas_corrente'])
+    comentarios['fp'] = texto_fator_potencia(ind['fp'])
+    comentarios['acessorios'] = texto_acessorios(ind['acessorios'])
+    comentarios['dados_operacao'] = texto_operacao(ind['operacao'])
+    if not alertas_gerais:
+        comentarios['conclusao_final'] = "Diagnóstico Geral: CONFORME.\nA análise dos dados indica que o sistema operou de forma estável e dentro dos parâmetros de qualidade de energia estabelecidos."
+    else:
+        texto_alertas = "- " + "\n- ".join(alertas_gerais)
+        comentarios['conclusao_final'] = f"Diagnóstico Geral: NÃO CONFORME.\nO sistema apresentou instabilidades. Não conformidades principais:\n\n{texto_alertas}"
+    return comentarios
+
+def comentarios_de_erro(tensao_nominal):
+    comentarios = {k: "Ocorreu um erro ao processar os dados." for k in ['tensao', 'corrente', 'fp', 'acessorios', 'conclusao_final', 'dados_operacao']}
+    comentarios['tensao_nominal'] = tensao_nominal
+    return comentarios
+
+def analisar_dados_prodist(df, corrente_nominal, tensao_nominal):
     try:
-        cols_tensao_keys = ['tensao_a', 'tensao_b', 'tensao_c']
-        cols_tensao = [MAPEAMENTO_COLUNAS.get(k) for k in cols_tensao_keys if MAPEAMENTO_COLUNAS.get(k) in df.columns]
+        cols_tensao = _colunas(df, ['tensao_a', 'tensao_b', 'tensao_c'])
         if len(cols_tensao) != 3: raise ValueError("Colunas de tensão (AVRMS, BVRMS, CVRMS) não encontradas no CSV.")
         if not isinstance(df.index, pd.DatetimeIndex): df.index = pd.to_datetime(df[MAPEAMENTO_COLUNAS['timestamp']], dayfirst=True, errors='coerce')
-        limites = {'adequado_sup': tensao_nominal * 1.05, 'adequado_inf': tensao_nominal * 0.92, 'critico_sup': tensao_nominal * 1.06, 'critico_inf': tensao_nominal * 0.91, 'desequilibrio_max_pct': 3.0}
-        comentarios_tensao = []
-        df_tensao = df[cols_tensao]
-        stats = df_tensao.agg(['min', 'max', 'mean'])
-        min_geral, max_geral = stats.min().min(), stats.max().max()
-        comentarios_tensao.append(f"Análise baseada em uma Tensão Nominal de referência de {tensao_nominal:.0f}V. Valores registrados: Mín. de {min_geral:.1f}V, Média de {stats.mean().mean():.1f}V e Máx. de {max_geral:.1f}V.")
-        if max_geral > limites['critico_sup'] or min_geral < limites['critico_inf']:
-            alerta = f"níveis de tensão CRÍTICOS foram atingidos (Pico de {max_geral:.1f}V)"
-            comentarios_tensao.append(f"ALERTA: {alerta.capitalize()}. Violações desta natureza podem indicar problemas graves na rede.")
-            alertas_gerais.append(alerta)
-        comentarios['tensao'] = "\n\n".join(comentarios_tensao)
-        comentarios['corrente'] = analisar_corrente(df, corrente_nominal)
-        comentarios['fp'] = analisar_fator_potencia(df)
-        comentarios['acessorios'] = analisar_acessorios(df)
-        comentarios['dados_operacao'] = analisar_operacao(df, tensao_nominal)
-        if not alertas_gerais:
-            comentarios['conclusao_final'] = "Diagnóstico Geral: CONFORME.\nA análise dos dados indica que o sistema operou de forma estável e dentro dos parâmetros de qualidade de energia estabelecidos."
-        else:
-            texto_alertas = "- " + "\n- ".join(alertas_gerais)
-            comentarios['conclusao_final'] = f"Diagnóstico Geral: NÃO CONFORME.\nO sistema apresentou instabilidades. Não conformidades principais:\n\n{texto_alertas}"
+        return comentarios_de_indicadores(calcular_indicadores(df, corrente_nominal, tensao_nominal), corrente_nominal, tensao_nominal)
     except Exception as e:
-        print(f"Erro na análise: {e}"); import traceback; traceback.print_exc()
-        comentarios = {k: "Ocorreu um erro ao processar os dados." for k in ['tensao', 'corrente', 'fp', 'acessorios', 'conclusao_final', 'dados_operacao']}
-        comentarios['tensao_nominal'] = tensao_nominal
-    return comentarios
\ No newline at end of file
+        logger.exception("Erro na análise: %s", e)
+        return comentarios_de_erro(tensao_nominal)
@@ -0,0 +1,197 @@
+# Arquivo: backend/armazenamento.py (Camada de armazenamento dos motores)
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos, apenas entre threads
+    fcntl = None
+
+def _vazio(valor):
+    return valor is None or valor is pd.NA or (isinstance(valor, str) and valor == '') or (isinstance(valor, float) and np.isnan(valor))
+
+def conectar_sqlite(caminho_db):
+    # Conexão em modo autocommit (transações explícitas com BEGIN), WAL e espera de até 30 s por travas.
+    conexao = sqlite3.connect(caminho_db, timeout=30, isolation_level=None)
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("PRAGMA synchronous=NORMAL")
+    return conexao
+
+class ArmazenamentoCSV:
+    # Implementação original: o arquivo inteiro é regravado a cada escrita. As escritas são
+    # serializadas (thread + flock) e atômicas (arquivo temporário + os.replace).
+    def __init__(self, caminho_csv, dtype_map):
+        self.caminho_csv = caminho_csv
+        self.dtype_map = dtype_map
+        self._lock = threading.RLock()
+
+    def versao(self):
+        st = os.stat(self.caminho_csv)
+        return (st.st_mtime_ns, st.st_size)
+
+    def carregar(self):
+        return pd.read_csv(self.caminho_csv, dtype=self.dtype_map)
+
+    def _travar(self):
+        if fcntl is None: return None
+        arquivo_trava = open(f"{self.caminho_csv}.lock", "w")
+        fcntl.flock(arquivo_trava, fcntl.LOCK_EX)
+        return arquivo_trava
+
+    def _escrever(self, alterar):
+        with self._lock:
+            trava = self._travar()
+            try:
+                try:
+                    df = self.carregar()
+                except FileNotFoundError:
+                    df = pd.DataFrame(columns=list(self.dtype_map.keys()))
+                df = alterar(df)
+                if df is None: return False
+                pasta = os.path.dirname(os.path.abspath(self.caminho_csv))
+                fd, caminho_tmp = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+                # mkstemp cria com 0600: o CSV mantém as permissões que tinha (0644 se for novo).
+                try:
+                    modo = os.stat(self.caminho_csv).st_mode & 0o777
+                except FileNotFoundError:
+                    modo = 0o644
+                os.fchmod(fd, modo)
+                with os.fdopen(fd, "w", newline="") as f:
+                    df.to_csv(f, index=False)
+                os.replace(caminho_tmp, self.caminho_csv)
+                return True
+            finally:
+                if trava is not None: trava.close()
+
+    def inserir(self, dados):
+        return self._escrever(lambda df: pd.concat([df, pd.DataFrame([dados])], ignore_index=True))
+
+    def atualizar(self, id_motor, dados):
+        def alterar(df):
+            df['id_motor'] = df['id_motor'].astype(str)
+            if id_motor not in df['id_motor'].values: return None
+            indice = df.index[df['id_motor'] == id_motor].tolist()[0]
+            for chave, valor in dados.items():
+                if (valor is None or valor == '') and pd.api.types.is_numeric_dtype(df[chave]):
+                    df.loc[indice, chave] = pd.NA
+                else:
+                    df.loc[indice, chave] = valor
+            return df
+        return self._escrever(alterar)
+
+    def remover(self, id_motor):
+        def alterar(df):
+            if id_motor not in df['id_motor'].values: return None
+            return df[df['id_motor'] != id_motor]
+        return self._escrever(alterar)
+
+class ArmazenamentoSQLite:
+    # Uma linha por motor, com escrita linha a linha em transações curtas. WAL permite leituras
+    # concorrentes às escritas; a tabela 'meta' guarda um contador de versão usado pelo registro.
+    TIPOS_SQL = {'Int64': 'INTEGER', 'float64': 'REAL', 'str': 'TEXT'}
+
+    def __init__(self, caminho_db, dtype_map):
+        self.caminho_db = caminho_db
+        self.dtype_map = dtype_map
+        self.colunas = list(dtype_map.keys())
+        self._local = threading.local()
+        self._criar_esquema()
+
+    def _conexao(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = self._local.conexao = conectar_sqlite(self.caminho_db)
+        return conexao
+
+    def _criar_esquema(self):
+        colunas_sql = ", ".join(f"{col} {self.TIPOS_SQL.get(tipo, 'TEXT')}" for col, tipo in self.dtype_map.items())
+        con = self._conexao()
+        con.execute(f"CREATE TABLE IF NOT EXISTS motores ({colunas_sql})")
+        con.execute("CREATE INDEX IF NOT EXISTS idx_motores_id_motor ON motores (id_motor)")
+        con.execute("CREATE INDEX IF NOT EXISTS idx_motores_id_cliente ON motores (id_cliente)")
+        con.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor INTEGER)")
+        con.execute("INSERT OR IGNORE INTO meta (chave, valor) VALUES ('versao', 0)")
+
+    def _valores(self, dados):
+        valores = []
+        for col in self.colunas:
+            valor = dados.get(col)
+            if _vazio(valor): valores.append(None)
+            elif self.dtype_map[col] == 'Int64': valores.append(int(valor))
+            elif self.dtype_map[col] == 'float64': valores.append(float(valor))
+            else: valores.append(str(valor))
+        return valores
+
+    def _transacao(self, operacao):
+        con = self._conexao()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            alteradas = operacao(con)
+            if alteradas: con.execute("UPDATE meta SET valor = valor + 1 WHERE chave = 'versao'")
+            con.execute("COMMIT")
+            return bool(alteradas)
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    def versao(self):
+        return self._conexao().execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()[0]
+
+    def carregar(self):
+        df = pd.read_sql_query(f"SELECT {', '.join(self.colunas)} FROM motores ORDER BY rowid", self._conexao())
+        df = df.replace({None: np.nan})
+        return df.astype({col: tipo for col, tipo in self.dtype_map.items() if tipo != 'str'})
+
+    def inserir(self, dados):
+        marcadores = ", ".join("?" for _ in self.colunas)
+        sql = f"INSERT INTO motores ({', '.join(self.colunas)}) VALUES ({marcadores})"
+        return self._transacao(lambda con: con.execute(sql, self._valores(dados)).rowcount)
+
+    def atualizar(self, id_motor, dados):
+        # Mesmo comportamento do CSV: atualiza o primeiro registro com esse id_motor.
+        campos = [col for col in self.colunas if col in dados]
+        valores = [v for col, v in zip(self.colunas, self._valores(dados)) if col in dados]
+        sql = (f"UPDATE motores SET {', '.join(f'{col} = ?' for col in campos)} "
+               "WHERE rowid = (SELECT rowid FROM motores WHERE id_motor = ? ORDER BY rowid LIMIT 1)")
+        return self._transacao(lambda con: con.execute(sql, valores + [str(id_motor)]).rowcount)
+
+    def remover(self, id_motor):
+        return self._transacao(lambda con: con.execute("DELETE FROM motores WHERE id_motor = ?", (str(id_motor),)).rowcount)
+
+def importar_csv(caminho_csv, caminho_db, dtype_map):
+    # Importação única do clientes_motores.csv para o banco SQLite (substitui o conteúdo atual).
+    df = pd.read_csv(caminho_csv, dtype=dtype_map)
+    armazenamento = ArmazenamentoSQLite(caminho_db, dtype_map)
+    def substituir(con):
+        con.execute("DELETE FROM motores")
+        marcadores = ", ".join("?" for _ in armazenamento.colunas)
+        con.executemany(f"INSERT INTO motores ({', '.join(armazenamento.colunas)}) VALUES ({marcadores})",
+                        [armazenamento._valores(registro) for registro in df.to_dict('records')])
+        return True
+    armazenamento._transacao(substituir)
+    return len(df)
+
+def criar_armazenamento(backend, caminho_csv, caminho_db, dtype_map):
+    if backend == 'sqlite':
+        novo_banco = not os.path.exists(caminho_db)
+        if novo_banco and os.path.exists(caminho_csv):
+            importar_csv(caminho_csv, caminho_db, dtype_map)
+        return ArmazenamentoSQLite(caminho_db, dtype_map)
+    if backend == 'csv':
+        return ArmazenamentoCSV(caminho_csv, dtype_map)
+    raise ValueError(f"STORAGE_BACKEND desconhecido: {backend}")
+
+if __name__ == "__main__":
+    # Uso: python armazenamento.py importar [clientes_motores.csv] [motores.db]
+    from main import DTYPE_MAP, CSV_DATABASE, SQLITE_DATABASE
+    if len(sys.argv) < 2 or sys.argv[1] != "importar":
+        sys.exit("Uso: python armazenamento.py importar [caminho_csv] [caminho_db]")
+    origem = sys.argv[2] if len(sys.argv) > 2 else CSV_DATABASE
+    destino = sys.argv[3] if len(sys.argv) > 3 else SQLITE_DATABASE
+    print(f"{importar_csv(origem, destino, DTYPE_MAP)} registros importados de {origem} para {destino}.")
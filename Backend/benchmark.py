@@ -0,0 +1,300 @@
+# Arquivo: backend/benchmark.py (Medição de tempo e memória das etapas do relatório)
+# Uso: python benchmark.py [--linhas 1000000] [--etapas inicializacao,ingestao,analises,graficos,relatorio,crud,comparativos,referencia]
+#                          [--motores 1000] [--motores-comparativos 200] [--meses 6] [--eventos-por-mil 2] [--duracao-eventos 1] [--repeticoes 3]
+#                          [--sem-referencia] [--json resultados.json]
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import analises
+import analises_referencia
+from telemetria_sintetica import gerar_motores, gerar_telemetria, salvar_csv
+
+PASTA_BACKEND = os.path.dirname(os.path.abspath(__file__))
+ETAPAS = ['inicializacao', 'ingestao', 'analises', 'graficos', 'relatorio', 'crud', 'comparativos', 'referencia']
+CORRENTE_NOMINAL, TENSAO_NOMINAL = 15.5, 380.0
+DADOS_MOTOR = {'id_cliente': 1, 'nome_cliente': 'Benchmark', 'id_motor': 'bench001', 'descricao_motor': 'Motor sintético',
+               'local_instalacao': 'Bancada', 'corrente_nominal': CORRENTE_NOMINAL, 'tensao_nominal_v': TENSAO_NOMINAL}
+
+def _pico_rss_mb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+def _executar_medindo(fila, preparar, args_preparo, funcao, args, repeticoes):
+    entrada = preparar(*args_preparo)  # fora da medição
+    rss_antes = _pico_rss_mb()
+    tempos = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resultado = funcao(*entrada, *args)
+            tempos.append(time.perf_counter() - inicio)
+    fila.put((resultado if isinstance(resultado, dict) else None, min(tempos), _pico_rss_mb() - rss_antes))
+
+def medir(funcao, preparar, args_preparo=(), *args, repeticoes=1):
+    # Roda funcao(*preparar(*args_preparo), *args) num processo novo e retorna (resultado, menor tempo em
+    # segundos entre as repetições, aumento do pico de RSS em MB). O processo isolado evita que o pico de
+    # uma medição contamine a outra e não tem o custo do tracemalloc sobre o código linha a linha.
+    fila = multiprocessing.Queue()
+    processo = multiprocessing.Process(target=_executar_medindo, args=(fila, preparar, args_preparo, funcao, args, repeticoes))
+    processo.start()
+    resultado = fila.get()
+    processo.join()
+    return resultado
+
+# --- Preparação das entradas (no processo da medição) ---
+def _telemetria(n_linhas, eventos):
+    return (gerar_telemetria(n_linhas, tensao_nominal=TENSAO_NOMINAL, corrente_nominal=CORRENTE_NOMINAL, **eventos),)
+
+def _caminho(caminho):
+    return (caminho,)
+
+def _cliente_crud(n_motores, backend):
+    # Cadastro com N motores numa pasta própria e a API importada só neste processo.
+    pasta = tempfile.mkdtemp(prefix="bench_crud_", dir=".")
+    os.environ.update(STORAGE_BACKEND=backend, CSV_DATABASE=os.path.join(pasta, "motores.csv"),
+                      SQLITE_DATABASE=os.path.join(pasta, "motores.db"))
+    gerar_motores(n_motores).to_csv(os.environ["CSV_DATABASE"], index=False)
+    if backend == "sqlite":
+        from armazenamento import importar_csv
+        from main import DTYPE_MAP
+        importar_csv(os.environ["CSV_DATABASE"], os.environ["SQLITE_DATABASE"], DTYPE_MAP)
+    from fastapi.testclient import TestClient
+    import main
+    cliente = TestClient(main.app)
+    motores = main.registro.registros()
+    return cliente, motores
+
+# Roda num interpretador novo: importa a API, atende o primeiro GET / (com os eventos de startup) e sobe
+# o pool de relatórios, imprimindo os tempos e o pico de memória do processo da API em JSON.
+_CODIGO_INICIALIZACAO = '''
+import json, sys, time
+inicio = time.perf_counter()
+import main
+importacao = time.perf_counter() - inicio
+from benchmark import _pico_rss_mb
+memoria_importacao = _pico_rss_mb()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as cliente:
+    cliente.get("/").raise_for_status()
+    primeira_resposta = time.perf_counter() - inicio
+    memoria_resposta = _pico_rss_mb()
+    inicio_pool = time.perf_counter()
+    workers = main.fila_relatorios.aquecer()
+    aquecimento = time.perf_counter() - inicio_pool
+pesados = [modulo for modulo in ("matplotlib", "seaborn", "fpdf", "PIL", "aiosmtplib", "pyarrow.parquet") if modulo in sys.modules]
+print(json.dumps({"importacao": importacao, "memoria_importacao": memoria_importacao, "primeira_resposta": primeira_resposta,
+                  "memoria_resposta": memoria_resposta, "aquecimento": aquecimento, "workers": workers, "pesados": pesados}))
+'''
+
+def _frota(n_motores, aquecer=False):
+    # Cadastro da frota sintética; com aquecer=True os comparativos já estão no cache em memória.
+    motores = gerar_motores(n_motores).to_dict('records')
+    if aquecer:
+        import comparativos
+        comparativos.tendencias(motores)
+    return (motores,)
+
+def _nada():
+    return ()
+
+# --- Funções medidas ---
+def _ingestao_pandas(caminho):
+    # Leitura como era feita antes do ingestao.py: read_csv inteiro e to_datetime com dayfirst.
+    df = pd.read_csv(caminho, sep=';')
+    df['Time'] = pd.to_datetime(df['Time'], dayfirst=True, errors='coerce')
+    return df.dropna(subset=['Time']).set_index('Time')
+
+def _ingestao(caminho):
+    from ingestao import ler_telemetria
+    ler_telemetria(caminho)
+
+def _grafico(df, chaves, titulo, ylabel):
+    from graficos import criar_grafico_em_memoria
+    criar_grafico_em_memoria(df, chaves, titulo, ylabel)
+
+def _todos_os_graficos(df):
+    from pdf_generator import renderizar_graficos
+    renderizar_graficos(df, {'tem_vazao': True, 'tem_nivel': True}, TENSAO_NOMINAL)
+
+def _relatorio(df):
+    from pdf_generator import gerar_relatorio_final
+    gerar_relatorio_final(df, DADOS_MOTOR, {'tem_vazao': True, 'tem_nivel': True})
+
+def _crud(cliente, motores, operacao):
+    motor = motores[len(motores) // 2]
+    if operacao == 'listar_clientes': resposta = cliente.get("/api/clientes")
+    elif operacao == 'listar_registros': resposta = cliente.get("/api/registros")
+    elif operacao == 'registros_pagina': resposta = cliente.get("/api/registros", params={'pagina': 2, 'por_pagina': 100})
+    elif operacao == 'registros_campos': resposta = cliente.get("/api/registros", params={'campos': 'id_motor,descricao_motor,id_cliente'})
+    elif operacao == 'registros_ndjson': resposta = cliente.get("/api/registros", params={'formato': 'ndjson'})
+    elif operacao == 'motores_do_cliente': resposta = cliente.get(f"/api/clientes/{motor['id_cliente']}/motores")
+    elif operacao == 'inserir': resposta = cliente.post("/api/motores", json=_motor_api(motor))
+    elif operacao == 'atualizar': resposta = cliente.put(f"/api/motores/{motor['id_motor']}", json=_motor_api(motor, observacoes="benchmark"))
+    else: resposta = cliente.delete(f"/api/motores/{motores.pop()['id_motor']}")  # cada repetição remove um motor diferente
+    resposta.raise_for_status()
+
+def _gravar_frota(n_motores, meses):
+    # Telemetria horária de 'meses' meses para cada motor, gravada no TELEMETRIA_DIR, e os agregados diários.
+    import comparativos
+    import telemetria_motores
+    motores = gerar_motores(n_motores).to_dict('records')
+    for semente, motor in enumerate(motores):
+        df = gerar_telemetria(meses * 30 * 24, corrente_nominal=motor['corrente_nominal'], intervalo='1h', inicio='2025-01-01',
+                              semente=semente, eventos_por_mil=semente % 20, duracao_eventos=3)
+        telemetria_motores.gravar(motor['id_motor'], df.astype('float32'))
+    comparativos.tendencias(motores)
+
+def _comparativo(motores, consulta):
+    import comparativos
+    if consulta == 'tendencias': comparativos.registros(comparativos.tendencias(motores))
+    else: comparativos.registros(comparativos.ranking(motores, consulta))
+
+def _motor_api(motor, **alteracoes):
+    campos = ['id_cliente', 'nome_cliente', 'descricao_motor', 'local_instalacao', 'corrente_nominal', 'potencia_cv', 'tipo_conexao',
+              'tensao_nominal_v', 'grupo_tarifario', 'telefone_contato', 'email_responsavel', 'data_da_instalacao', 'id_esp32', 'observacoes']
+    dados = {campo: motor.get(campo) for campo in campos}
+    dados['telefone_contato'] = str(dados['telefone_contato'])
+    return {**dados, **alteracoes}
+
+# --- Etapas ---
+def _imprimir(resultados, nome, tempo, memoria):
+    resultados.append({'etapa': nome, 'segundos': round(tempo, 4), 'pico_memoria_mb': round(memoria, 1)})
+    print(f"{nome:48s} {tempo:9.3f} s {memoria:9.1f} MB")
+
+def bench_inicializacao(resultados, repeticoes):
+    # Cada repetição é um processo novo; vale a mais rápida. RELATORIO_AQUECER=0 para medir o pool à parte.
+    ambiente = {**os.environ, 'RELATORIO_AQUECER': '0', 'PYTHONPATH': os.pathsep.join(filter(None, [PASTA_BACKEND, os.environ.get('PYTHONPATH')]))}
+    medicoes = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, "-c", _CODIGO_INICIALIZACAO], env=ambiente, capture_output=True, text=True, check=True)
+        medicoes.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    melhor = min(medicoes, key=lambda medicao: medicao['primeira_resposta'])
+    _imprimir(resultados, "inicializacao.import main", melhor['importacao'], melhor['memoria_importacao'])
+    _imprimir(resultados, "inicializacao.primeira resposta (GET /)", melhor['primeira_resposta'], melhor['memoria_resposta'])
+    _imprimir(resultados, f"inicializacao.aquecer pool ({melhor['workers']} workers)", melhor['aquecimento'], 0.0)
+    print(f"Módulos pesados carregados na API: {', '.join(melhor['pesados']) or 'nenhum'}")
+
+def bench_ingestao(resultados, n_linhas, eventos, repeticoes):
+    with tempfile.TemporaryDirectory(prefix="bench_csv_", dir=".") as pasta:
+        caminho = salvar_csv(gerar_telemetria(n_linhas, **eventos), os.path.join(pasta, "telemetria.csv"))
+        print(f"CSV sintético: {os.path.getsize(caminho) / (1024 * 1024):.1f} MB")
+        for nome, funcao in (('ingestao (ler_telemetria)', _ingestao), ('ingestao (read_csv + to_datetime)', _ingestao_pandas)):
+            _, tempo, memoria = medir(funcao, _caminho, (caminho,), repeticoes=repeticoes)
+            _imprimir(resultados, nome, tempo, memoria)
+
+def bench_analises(resultados, n_linhas, eventos, repeticoes):
+    for nome, funcao, args in (('analisar_acessorios', analises.analisar_acessorios, ()),
+                               ('analisar_corrente', analises.analisar_corrente, (CORRENTE_NOMINAL,)),
+                               ('analisar_fator_potencia', analises.analisar_fator_potencia, ()),
+                               ('analisar_operacao', analises.analisar_operacao, (TENSAO_NOMINAL,)),
+                               ('calcular_indicadores', analises.calcular_indicadores, (CORRENTE_NOMINAL, TENSAO_NOMINAL)),
+                               ('analisar_dados_prodist', analises.analisar_dados_prodist, (CORRENTE_NOMINAL, TENSAO_NOMINAL))):
+        _, tempo, memoria = medir(funcao, _telemetria, (n_linhas, eventos), *args, repeticoes=repeticoes)
+        _imprimir(resultados, f"analises.{nome}", tempo, memoria)
+
+def bench_graficos(resultados, n_linhas, eventos, repeticoes):
+    for chaves, titulo, ylabel in ((['tensao_a', 'tensao_b', 'tensao_c'], "Tensões RMS por Fase", "Tensão (V)"),
+                                   (['corrente_a', 'corrente_b', 'corrente_c'], "Correntes RMS por Fase", "Corrente (A)"),
+                                   (['fp_a', 'fp_b', 'fp_c'], "Fator de Potência por Fase", "FP")):
+        _, tempo, memoria = medir(_grafico, _telemetria, (n_linhas, eventos), chaves, titulo, ylabel, repeticoes=repeticoes)
+        _imprimir(resultados, f"criar_grafico_em_memoria ({chaves[0][:-2]})", tempo, memoria)
+    _, tempo, memoria = medir(_todos_os_graficos, _telemetria, (n_linhas, eventos), repeticoes=repeticoes)
+    _imprimir(resultados, "renderizar_graficos (5 gráficos)", tempo, memoria)
+
+def bench_relatorio(resultados, n_linhas, eventos, repeticoes):
+    _, tempo, memoria = medir(_relatorio, _telemetria, (n_linhas, eventos), repeticoes=repeticoes)
+    _imprimir(resultados, "gerar_relatorio_final", tempo, memoria)
+
+def bench_crud(resultados, n_motores, repeticoes, backend):
+    try:
+        import httpx  # noqa: F401  (TestClient)
+    except ImportError:
+        print("crud: etapa ignorada (requer httpx para o TestClient).")
+        return
+    for operacao in ('listar_clientes', 'listar_registros', 'registros_pagina', 'registros_campos', 'registros_ndjson', 'motores_do_cliente', 'inserir', 'atualizar', 'remover'):
+        _, tempo, memoria = medir(_crud, _cliente_crud, (n_motores, backend), operacao, repeticoes=repeticoes)
+        _imprimir(resultados, f"crud.{operacao} ({n_motores} motores, {backend})", tempo, memoria)
+
+def bench_comparativos(resultados, n_motores, meses, repeticoes):
+    try:
+        import pyarrow  # noqa: F401  (armazenamento da telemetria)
+    except ImportError:
+        print("comparativos: etapa ignorada (requer pyarrow).")
+        return
+    _, tempo, memoria = medir(_gravar_frota, _nada, (), n_motores, meses)
+    _imprimir(resultados, f"comparativos.preparo ({n_motores} motores x {meses} meses)", tempo, memoria)
+    # 'frio': processo novo, parciais lidos dos agregados.json; 'quente': matrizes já no cache em memória.
+    for consulta in ('tendencias', 'violacoes_prodist', 'desequilibrio'):
+        nome = consulta if consulta == 'tendencias' else f"ranking.{consulta}"
+        _, tempo, memoria = medir(_comparativo, _frota, (n_motores,), consulta)
+        _imprimir(resultados, f"comparativos.{nome} (frio)", tempo, memoria)
+        _, tempo, memoria = medir(_comparativo, _frota, (n_motores, True), consulta, repeticoes=repeticoes)
+        _imprimir(resultados, f"comparativos.{nome} (quente)", tempo, memoria)
+
+def bench_analise(n_linhas, com_referencia=True, corrente_nominal=CORRENTE_NOMINAL, tensao_nominal=TENSAO_NOMINAL, eventos=None, resultados=None):
+    eventos, resultados = eventos or {}, [] if resultados is None else resultados
+    print(f"Telemetria sintética: {n_linhas} linhas, {gerar_telemetria(1000).memory_usage().sum() * n_linhas / 1000 / (1024*1024):.1f} MB")
+    novo, t_novo, m_novo = medir(analises.analisar_dados_prodist, _telemetria, (n_linhas, eventos), corrente_nominal, tensao_nominal)
+    _imprimir(resultados, 'analises (núcleo vetorizado)', t_novo, m_novo)
+    if not com_referencia: return
+    antigo, t_antigo, m_antigo = medir(analises_referencia.analisar_dados_prodist, _telemetria, (n_linhas, eventos), corrente_nominal, tensao_nominal)
+    _imprimir(resultados, 'analises_referencia (original)', t_antigo, m_antigo)
+    print(f"Ganho: {t_antigo / t_novo:.1f}x em tempo, {m_antigo / max(m_novo, 0.1):.1f}x em pico de memória")
+    divergentes = [chave for chave in antigo if antigo[chave] != novo.get(chave)]
+    print("Textos idênticos à implementação original." if not divergentes else f"ATENÇÃO: textos divergentes em {divergentes}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do relatório")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--etapas", default=",".join(ETAPAS), help=f"etapas separadas por vírgula ({', '.join(ETAPAS)})")
+    parser.add_argument("--motores", type=int, default=1000, help="motores no cadastro da etapa crud")
+    parser.add_argument("--motores-comparativos", type=int, default=200, help="motores com telemetria na etapa comparativos")
+    parser.add_argument("--meses", type=int, default=6, help="meses de telemetria horária por motor na etapa comparativos")
+    parser.add_argument("--backend", choices=["csv", "sqlite"], default="csv", help="armazenamento dos motores na etapa crud")
+    parser.add_argument("--eventos-por-mil", type=float, default=2.0, help="eventos (quedas, sobrecargas, faltas de fase) a cada 1000 linhas")
+    parser.add_argument("--duracao-eventos", type=int, default=1, help="linhas de cada evento")
+    parser.add_argument("--repeticoes", type=int, default=1, help="repetições por medição (vale a mais rápida)")
+    parser.add_argument("--sem-referencia", action="store_true", help="não executa a implementação original (vários minutos com 1M de linhas)")
+    parser.add_argument("--json", help="grava os resultados neste arquivo, para comparar execuções")
+    args = parser.parse_args()
+    etapas = [etapa.strip() for etapa in args.etapas.split(",") if etapa.strip()]
+    desconhecidas = set(etapas) - set(ETAPAS)
+    if desconhecidas: parser.error(f"etapas desconhecidas: {', '.join(sorted(desconhecidas))}")
+    eventos = {'eventos_por_mil': args.eventos_por_mil, 'duracao_eventos': args.duracao_eventos}
+    caminho_json = os.path.abspath(args.json) if args.json else None
+
+    # Relatórios, catálogo, cache e cadastro de teste ficam numa pasta temporária, longe dos dados reais.
+    sys.path.insert(0, PASTA_BACKEND)
+    with tempfile.TemporaryDirectory(prefix="benchmark_") as pasta:
+        for logo in ("Logo.png", "Logo2.png"):
+            if os.path.exists(os.path.join(PASTA_BACKEND, logo)): os.symlink(os.path.join(PASTA_BACKEND, logo), os.path.join(pasta, logo))
+        os.environ.update(CACHE_DIR=os.path.join(pasta, "cache_relatorios"), CATALOGO_DATABASE=os.path.join(pasta, "relatorios.db"),
+                          TELEMETRIA_DIR=os.path.join(pasta, "telemetria"))
+        os.chdir(pasta)
+        resultados = []
+        if 'inicializacao' in etapas: bench_inicializacao(resultados, args.repeticoes)
+        if 'ingestao' in etapas: bench_ingestao(resultados, args.linhas, eventos, args.repeticoes)
+        if 'analises' in etapas: bench_analises(resultados, args.linhas, eventos, args.repeticoes)
+        if 'graficos' in etapas: bench_graficos(resultados, args.linhas, eventos, args.repeticoes)
+        if 'relatorio' in etapas: bench_relatorio(resultados, args.linhas, eventos, args.repeticoes)
+        if 'crud' in etapas: bench_crud(resultados, args.motores, args.repeticoes, args.backend)
+        if 'comparativos' in etapas: bench_comparativos(resultados, args.motores_comparativos, args.meses, args.repeticoes)
+        if 'referencia' in etapas and not args.sem_referencia:
+            bench_analise(args.linhas, eventos=eventos, resultados=resultados)
+
+    if caminho_json:
+        with open(caminho_json, "w", encoding="utf-8") as f:
+            json.dump({'linhas': args.linhas, 'motores': args.motores, 'eventos': eventos, 'repeticoes': args.repeticoes,
+                       'resultados': resultados}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,105 @@
+# Arquivo: backend/cache_relatorios.py (Cache em disco de análises e gráficos por conteúdo)
+# Regerar o relatório do mesmo CSV (ex.: depois de corrigir um campo do motor) reaproveita os
+# comentários e os PNGs dos gráficos; só a montagem do PDF é refeita.
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import graficos
+
+CACHE_DIR = os.getenv("CACHE_DIR", "cache_relatorios")
+CACHE_MAX_MB = float(os.getenv("CACHE_MAX_MB", 256))  # 0 desativa o cache
+VERSAO_CACHE = 2  # incrementar quando análises ou gráficos mudarem de formato
+
+_lock = threading.Lock()
+
+def gerar_chave(sha256_csv, dados_motor, checkboxes):
+    # Só entram os campos que mudam o resultado: o conteúdo do CSV, as grandezas nominais, os
+    # acessórios marcados e a configuração dos gráficos.
+    partes = {
+        'versao': VERSAO_CACHE, 'csv': sha256_csv,
+        'corrente_nominal': float(dados_motor.get('corrente_nominal', 0)),
+        'tensao_nominal_v': float(dados_motor.get('tensao_nominal_v', 380.0)),
+        'checkboxes': {chave: bool(valor) for chave, valor in sorted(checkboxes.items())},
+        'graficos': [graficos.GRAFICOS_DPI, graficos.REDUCAO_GRAFICOS, graficos.PONTOS_POR_PIXEL, graficos.COMPRESSAO_GRAFICOS],
+    }
+    return hashlib.sha256(json.dumps(partes, sort_keys=True).encode()).hexdigest()
+
+def _pasta(chave):
+    return os.path.join(CACHE_DIR, chave)
+
+def obter(chave):
+    # Retorna {'comentarios', 'mes_referencia', 'graficos': {nome: bytes ou None}} ou None.
+    if CACHE_MAX_MB <= 0: return None
+    pasta = _pasta(chave)
+    try:
+        with open(os.path.join(pasta, "resultado.json"), encoding="utf-8") as f:
+            resultado = json.load(f)
+        imagens = {}
+        for nome, arquivo in resultado.pop('graficos').items():
+            if arquivo is None:
+                imagens[nome] = None
+                continue
+            with open(os.path.join(pasta, arquivo), "rb") as f:
+                imagens[nome] = f.read()
+        os.utime(pasta)  # marca como usado recentemente (LRU)
+    except (FileNotFoundError, NotADirectoryError, json.JSONDecodeError, KeyError):
+        return None
+    resultado['graficos'] = imagens
+    return resultado
+
+def guardar(chave, comentarios, mes_referencia, imagens):
+    # Grava numa pasta temporária e renomeia: outro processo nunca vê uma entrada pela metade.
+    if CACHE_MAX_MB <= 0: return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    temporaria = os.path.join(CACHE_DIR, f".tmp_{uuid.uuid4().hex}")
+    os.makedirs(temporaria)
+    try:
+        arquivos = {}
+        for nome, conteudo in imagens.items():
+            arquivos[nome] = f"{nome}.png" if conteudo is not None else None
+            if conteudo is not None:
+                with open(os.path.join(temporaria, arquivos[nome]), "wb") as f:
+                    f.write(conteudo)
+        with open(os.path.join(temporaria, "resultado.json"), "w", encoding="utf-8") as f:
+            json.dump({'comentarios': comentarios, 'mes_referencia': mes_referencia, 'graficos': arquivos}, f, ensure_ascii=False)
+        try:
+            os.rename(temporaria, _pasta(chave))
+        except OSError:  # outra requisição gravou a mesma chave antes
+            pass
+    finally:
+        shutil.rmtree(temporaria, ignore_errors=True)
+    remover_excedente()
+
+def _tamanho_pasta(pasta):
+    try:
+        return sum(entrada.stat().st_size for entrada in os.scandir(pasta) if entrada.is_file())
+    except FileNotFoundError:  # removida por outro processo durante a varredura
+        return 0
+
+def remover_excedente(limite_mb=None):
+    # Remove as entradas usadas há mais tempo até o cache caber em CACHE_MAX_MB.
+    limite = (CACHE_MAX_MB if limite_mb is None else limite_mb) * 1024 * 1024
+    with _lock:
+        try:
+            entradas = [(e.stat().st_mtime, e.path) for e in os.scandir(CACHE_DIR) if e.is_dir() and not e.name.startswith(".tmp_")]
+        except FileNotFoundError:
+            return
+        tamanhos = {caminho: _tamanho_pasta(caminho) for _, caminho in entradas}
+        total = sum(tamanhos.values())
+        for _, caminho in sorted(entradas):
+            if total <= limite: break
+            shutil.rmtree(caminho, ignore_errors=True)
+            total -= tamanhos[caminho]
+        # Temporárias esquecidas por um processo que morreu no meio da gravação.
+        for entrada in os.scandir(CACHE_DIR):
+            try:
+                if entrada.name.startswith(".tmp_") and time.time() - entrada.stat().st_mtime > 3600:
+                    shutil.rmtree(entrada.path, ignore_errors=True)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,118 @@
+# Arquivo: backend/catalogo_relatorios.py (Catálogo dos relatórios gerados)
+# Cada PDF gravado em reports_generated ganha uma linha aqui no momento da geração, com cliente, motor,
+# mês de referência, tamanho e veredito. A listagem consulta o catálogo em vez de varrer a pasta.
+
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+
+from armazenamento import conectar_sqlite
+
+CATALOGO_DATABASE = os.getenv("CATALOGO_DATABASE", "relatorios.db")
+MESES_PT = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+
+_local = threading.local()
+
+def _conexao():
+    conexao = getattr(_local, 'conexao', None)
+    if conexao is None:
+        conexao = _local.conexao = conectar_sqlite(CATALOGO_DATABASE)
+        conexao.row_factory = lambda cursor, linha: {col[0]: linha[i] for i, col in enumerate(cursor.description)}
+        conexao.execute("""CREATE TABLE IF NOT EXISTS relatorios (
+            nome_arquivo TEXT PRIMARY KEY, id_cliente INTEGER, nome_cliente TEXT, id_motor TEXT, descricao_motor TEXT,
+            mes_referencia TEXT, ano INTEGER, mes INTEGER, tamanho_bytes INTEGER, criado_em TEXT, veredito TEXT)""")
+        conexao.execute("CREATE INDEX IF NOT EXISTS idx_relatorios_cliente ON relatorios (id_cliente, ano, mes)")
+        conexao.execute("CREATE INDEX IF NOT EXISTS idx_relatorios_motor ON relatorios (id_motor, ano, mes)")
+        conexao.execute("CREATE INDEX IF NOT EXISTS idx_relatorios_periodo ON relatorios (ano, mes, criado_em)")
+    return conexao
+
+def nome_arquivo_relatorio(dados_motor, mes_referencia):
+    nome_cliente_safe = dados_motor.get('nome_cliente', 'Cliente').replace(' ', '_')
+    descricao_motor_safe = dados_motor.get('descricao_motor', 'Motor').replace('/', '-').replace(' ', '_')
+    mes_ref_safe = mes_referencia.replace(' de ', '_')
+    return f"Relatorio_{nome_cliente_safe}_{descricao_motor_safe}_{mes_ref_safe}.pdf"
+
+def separar_mes_referencia(mes_referencia):
+    # 'Maio de 2025' -> (2025, 5); formatos desconhecidos -> (None, None).
+    encontrado = re.match(r"^(\w+) de (\d{4})$", mes_referencia or "")
+    if not encontrado or encontrado.group(1) not in MESES_PT: return None, None
+    return int(encontrado.group(2)), MESES_PT.index(encontrado.group(1)) + 1
+
+def veredito(comentarios):
+    conclusao = comentarios.get('conclusao_final', '')
+    if "NÃO CONFORME" in conclusao: return "nao_conforme"
+    if "CONFORME" in conclusao: return "conforme"
+    return "erro"
+
+def registrar(caminho_pdf, dados_motor, mes_referencia, veredito=None, criado_em=None):
+    ano, mes = separar_mes_referencia(mes_referencia)
+    id_cliente = dados_motor.get('id_cliente')
+    _conexao().execute(
+        "INSERT OR REPLACE INTO relatorios VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (os.path.basename(caminho_pdf), int(id_cliente) if id_cliente not in (None, "") else None,
+         dados_motor.get('nome_cliente'), dados_motor.get('id_motor'), dados_motor.get('descricao_motor'),
+         mes_referencia, ano, mes, os.path.getsize(caminho_pdf),
+         criado_em or datetime.now().isoformat(timespec='seconds'), veredito))
+
+def vazio():
+    return _conexao().execute("SELECT 1 FROM relatorios LIMIT 1").fetchone() is None
+
+def remover(nome_arquivo):
+    _conexao().execute("DELETE FROM relatorios WHERE nome_arquivo = ?", (nome_arquivo,))
+
+def obter(nome_arquivo):
+    return _conexao().execute("SELECT * FROM relatorios WHERE nome_arquivo = ?", (nome_arquivo,)).fetchone()
+
+def listar(id_cliente=None, id_motor=None, ano=None, mes=None, veredito=None, busca=None, limite=None, deslocamento=0):
+    # Retorna (total, linhas) com os filtros informados, do mês de referência mais recente para o mais antigo.
+    condicoes, parametros = [], []
+    for coluna, valor in (('id_cliente', id_cliente), ('id_motor', id_motor), ('ano', ano), ('mes', mes), ('veredito', veredito)):
+        if valor is not None:
+            condicoes.append(f"{coluna} = ?"); parametros.append(valor)
+    if busca:
+        condicoes.append("(nome_cliente LIKE ? OR descricao_motor LIKE ?)"); parametros += [f"%{busca}%"] * 2
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    con = _conexao()
+    total = con.execute(f"SELECT COUNT(*) AS total FROM relatorios {where}", parametros).fetchone()['total']
+    sql = f"SELECT * FROM relatorios {where} ORDER BY ano DESC, mes DESC, criado_em DESC"
+    if limite is not None:
+        sql += " LIMIT ? OFFSET ?"; parametros += [limite, deslocamento]
+    return total, con.execute(sql, parametros).fetchall()
+
+def reconstruir(pasta, motores):
+    # Cataloga os PDFs já existentes em 'pasta'. O motor é identificado comparando o nome do arquivo com
+    # o nome que cada motor do registro geraria (nome_arquivo_relatorio), o que funciona mesmo com '_'
+    # no nome do cliente. Arquivos sem motor correspondente entram só com o mês de referência; entradas
+    # de arquivos que não existem mais são removidas (as de PDFs gravados durante a varredura ficam).
+    encontrados, sem_motor, existentes = 0, [], set()
+    nomes = {}
+    for motor in motores:
+        nomes.setdefault(nome_arquivo_relatorio(motor, "X de 0000").rsplit("_X_0000.pdf", 1)[0], motor)
+    for entrada in os.scandir(pasta):
+        if not entrada.name.endswith(".pdf"): continue
+        encontrado = re.match(r"^(.*)_(\w+)_(\d{4})\.pdf$", entrada.name)
+        mes_referencia = f"{encontrado.group(2)} de {encontrado.group(3)}" if encontrado else None
+        motor = nomes.get(encontrado.group(1)) if encontrado else None
+        if motor is None: sem_motor.append(entrada.name)
+        registrar(entrada.path, motor or {}, mes_referencia,
+                  criado_em=datetime.fromtimestamp(entrada.stat().st_mtime).isoformat(timespec='seconds'))
+        existentes.add(entrada.name)
+        encontrados += 1
+    # Entradas de PDFs que não estão mais na pasta.
+    for linha in _conexao().execute("SELECT nome_arquivo FROM relatorios").fetchall():
+        if linha['nome_arquivo'] not in existentes and not os.path.exists(os.path.join(pasta, linha['nome_arquivo'])):
+            remover(linha['nome_arquivo'])
+    return encontrados, sem_motor
+
+if __name__ == "__main__":
+    # Uso: python catalogo_relatorios.py reconstruir [pasta_dos_relatorios]
+    if len(sys.argv) < 2 or sys.argv[1] != "reconstruir":
+        sys.exit("Uso: python catalogo_relatorios.py reconstruir [pasta_dos_relatorios]")
+    from main import registro, REPORTS_FOLDER
+    pasta = sys.argv[2] if len(sys.argv) > 2 else REPORTS_FOLDER
+    total, sem_motor = reconstruir(pasta, registro.registros())
+    print(f"{total} relatórios catalogados de {pasta}.")
+    for nome in sem_motor:
+        print(f"  sem motor correspondente no registro: {nome}")
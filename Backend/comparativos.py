@@ -0,0 +1,171 @@
+# Arquivo: backend/comparativos.py (Comparativos entre meses e entre motores)
+# Tendência mensal de cada motor e ranking dos motores de um cliente (ou da frota), calculados sobre os
+# parciais diários já guardados por telemetria_motores, sem reler a telemetria. Os parciais de cada mês
+# viram uma matriz (dia x grandeza) guardada em memória enquanto a assinatura do mês não muda; a consulta
+# junta as matrizes dos motores pedidos num único DataFrame e resolve tudo com group-by.
+
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import telemetria_motores
+from analises import _corrente_valida, _sem_avisos
+
+logger = logging.getLogger(__name__)
+
+COMPARATIVOS_CACHE_MESES = int(os.getenv("COMPARATIVOS_CACHE_MESES", 50_000))  # meses (motor x mês) mantidos em memória
+COMPARATIVOS_AQUECER = os.getenv("COMPARATIVOS_AQUECER", "1") != "0"  # carrega o cache na inicialização da API
+
+FASES = ('a', 'b', 'c')
+COLUNAS_SOMA = ['linhas', 'operando', 'desligado', 'sem_energia', 'falta_fase', 'fase_aberta', 'v_violacao', 'v_critica',
+                *(f'{grandeza}_{fase}' for grandeza in ('i_soma', 'i_cont', 'fp_soma', 'fp_cont') for fase in FASES)]
+COLUNAS_MAXIMO = ['deseq_max', 'i_max', 'v_max']
+COLUNAS_MINIMO = ['v_min']
+COLUNAS_VALORES = COLUNAS_SOMA + COLUNAS_MAXIMO + COLUNAS_MINIMO
+
+# Critério do ranking -> coluna dos indicadores (ordem decrescente: o pior motor fica em primeiro).
+CRITERIOS_RANKING = {
+    'violacoes_prodist': 'horas_violacao_prodist', 'tensao_critica': 'horas_tensao_critica',
+    'desequilibrio': 'desequilibrio_max_pct', 'carregamento': 'carregamento_pct', 'desligado': 'horas_desligado',
+    'falta_fase': 'horas_falta_fase', 'sem_energia': 'horas_sem_energia',
+}
+
+class ParametroInvalido(ValueError):
+    # Data ou critério inválidos na consulta (a API responde 400).
+    pass
+
+_cache = {}  # (id_motor, mes, corrente_nominal, tensao_nominal) -> (assinatura, dias, matriz)
+_cache_lock = threading.Lock()
+
+def _valores(p):
+    # Parcial de um dia (agregados.calcular_parcial) -> linha com COLUNAS_SOMA, deseq_max, i_max e as
+    # tensões máxima e mínima de cada fase (reduzidas entre as fases em _mes).
+    return [p['linhas'], p['operando'], p['desligado'], p['sem_energia'], p['falta_fase'], p['fase_aberta'],
+            p['v_violacao'], p['v_critica'], *p['i_soma'], *p['i_cont'], *p['fp_soma'], *p['fp_cont'],
+            p['deseq_max'], p['i_max'], *p['v_max'], *p['v_min']]
+
+def _nominais(motor):
+    corrente, tensao = motor.get('corrente_nominal'), motor.get('tensao_nominal_v')
+    corrente = 0.0 if corrente is None or corrente == "" or pd.isna(corrente) else float(corrente)
+    tensao = 380.0 if tensao is None or tensao == "" or pd.isna(tensao) else float(tensao)
+    return corrente, tensao
+
+def _mes(id_motor, mes, corrente_nominal, tensao_nominal):
+    # (dias, matriz dia x COLUNAS_VALORES) do mês; recalcula só se as partes do mês mudaram.
+    chave = (id_motor, mes, corrente_nominal, tensao_nominal)
+    assinatura = telemetria_motores.assinatura_do_mes(id_motor, mes, corrente_nominal, tensao_nominal)
+    salvo = _cache.get(chave)
+    if salvo is not None and salvo[0] == assinatura: return salvo[1], salvo[2]
+    parciais = telemetria_motores.parciais_do_mes(id_motor, mes, corrente_nominal, tensao_nominal)
+    dias = np.asarray(list(parciais), dtype=object)
+    linhas = np.asarray([_valores(p) for p in parciais.values()], dtype=np.float64).reshape(len(dias), len(COLUNAS_VALORES) + 4)
+    # fmax/fmin ignoram NaN (fase ausente) e dão NaN só quando as três fases faltam.
+    matriz = np.column_stack([linhas[:, :-6], np.fmax.reduce(linhas[:, -6:-3], axis=1), np.fmin.reduce(linhas[:, -3:], axis=1)])
+    with _cache_lock:
+        _cache[chave] = (assinatura, dias, matriz)
+        while len(_cache) > COMPARATIVOS_CACHE_MESES: _cache.pop(next(iter(_cache)))
+    return dias, matriz
+
+def _dia(data):
+    if data is None or data == "": return None
+    try:
+        return pd.Timestamp(data).strftime('%Y-%m-%d')
+    except ValueError:
+        raise ParametroInvalido(f"Data inválida: {data!r} (use AAAA-MM-DD).")
+
+def tabela_diaria(motores, inicio=None, fim=None):
+    # DataFrame com uma linha por motor e dia entre inicio e fim: id_motor, dia, mes e COLUNAS_VALORES.
+    inicio, fim = _dia(inicio), _dia(fim)
+    ids, dias, matrizes = [], [], []
+    for motor in motores:
+        id_motor = str(motor['id_motor'])
+        corrente_nominal, tensao_nominal = _nominais(motor)
+        for mes in telemetria_motores.meses(id_motor):
+            if (inicio and mes < inicio[:7]) or (fim and mes > fim[:7]): continue
+            dias_mes, matriz = _mes(id_motor, mes, corrente_nominal, tensao_nominal)
+            ids.append(np.full(len(dias_mes), id_motor, dtype=object)); dias.append(dias_mes); matrizes.append(matriz)
+    if not matrizes:
+        return pd.DataFrame(columns=['id_motor', 'dia', 'mes'] + COLUNAS_VALORES)
+    df = pd.DataFrame(np.concatenate(matrizes), columns=COLUNAS_VALORES)
+    df.insert(0, 'id_motor', np.concatenate(ids))
+    df.insert(1, 'dia', np.concatenate(dias))
+    df.insert(2, 'mes', df['dia'].str[:7])
+    if inicio: df = df[df['dia'] >= inicio]
+    if fim: df = df[df['dia'] <= fim]
+    return df
+
+def _media_das_fases(agrupado, soma, cont):
+    # Média de cada fase e depois a média entre as fases com valores (como agregados._media_por_coluna).
+    somas = agrupado[[f'{soma}_{fase}' for fase in FASES]].to_numpy()
+    contagens = agrupado[[f'{cont}_{fase}' for fase in FASES]].to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        medias = np.where(contagens > 0, somas / contagens, np.nan)
+    return _sem_avisos(np.nanmean, medias, axis=1)
+
+def indicadores(diario, motores, por=('id_motor', 'mes')):
+    # Indicadores de cada grupo (motor e mês, ou só motor) a partir da tabela diária.
+    colunas = list(por) + ['descricao_motor', 'dias', 'registros', 'corrente_media', 'carregamento_pct', 'fp_medio',
+                           'desequilibrio_max_pct', 'horas_operando', 'horas_desligado', 'horas_sem_energia', 'horas_falta_fase',
+                           'horas_fase_aberta', 'horas_violacao_prodist', 'horas_tensao_critica', 'pct_violacao_prodist',
+                           'tensao_min', 'tensao_max']
+    if diario.empty: return pd.DataFrame(columns=colunas)
+    agregacoes = {**{c: 'sum' for c in COLUNAS_SOMA}, **{c: 'max' for c in COLUNAS_MAXIMO}, **{c: 'min' for c in COLUNAS_MINIMO}, 'dia': 'count'}
+    agrupado = diario.groupby(list(por), sort=True).agg(agregacoes).reset_index()
+    nominal = {str(m['id_motor']): _nominais(m)[0] for m in motores}
+    descricao = {str(m['id_motor']): m.get('descricao_motor') for m in motores}
+    corrente_nominal = agrupado['id_motor'].map(nominal).to_numpy(dtype=float)
+    corrente_media = _media_das_fases(agrupado, 'i_soma', 'i_cont')
+    valida = np.asarray([_corrente_valida(c) for c in corrente_nominal], dtype=bool)
+    corrente_media = np.where(valida, corrente_media, np.nan)
+    resultado = agrupado[list(por)].copy()
+    resultado['descricao_motor'] = agrupado['id_motor'].map(descricao)
+    resultado['dias'] = agrupado['dia']
+    resultado['registros'] = agrupado['linhas'].astype(int)
+    resultado['corrente_media'] = corrente_media
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resultado['carregamento_pct'] = np.where(valida, corrente_media / corrente_nominal * 100, np.nan)
+        resultado['pct_violacao_prodist'] = np.where(agrupado['linhas'] > 0, agrupado['v_violacao'] / agrupado['linhas'] * 100, np.nan)
+    resultado['fp_medio'] = _media_das_fases(agrupado, 'fp_soma', 'fp_cont')
+    resultado['desequilibrio_max_pct'] = agrupado['deseq_max']
+    for coluna, origem in (('horas_operando', 'operando'), ('horas_desligado', 'desligado'), ('horas_sem_energia', 'sem_energia'),
+                           ('horas_falta_fase', 'falta_fase'), ('horas_fase_aberta', 'fase_aberta'),
+                           ('horas_violacao_prodist', 'v_violacao'), ('horas_tensao_critica', 'v_critica')):
+        resultado[coluna] = agrupado[origem].astype(int)
+    resultado['tensao_min'], resultado['tensao_max'] = agrupado['v_min'], agrupado['v_max']
+    return resultado[colunas]
+
+def tendencias(motores, inicio=None, fim=None):
+    # Um registro por motor e mês, em ordem de motor e mês.
+    return indicadores(tabela_diaria(motores, inicio, fim), motores)
+
+def ranking(motores, criterio='violacoes_prodist', inicio=None, fim=None, limite=None):
+    # Motores ordenados do pior para o melhor no critério, no período todo; motores sem dados ficam de fora.
+    if criterio not in CRITERIOS_RANKING:
+        raise ParametroInvalido(f"Critério desconhecido: {criterio}. Use um de: {', '.join(CRITERIOS_RANKING)}.")
+    resultado = indicadores(tabela_diaria(motores, inicio, fim), motores, por=('id_motor',))
+    resultado = resultado.sort_values(CRITERIOS_RANKING[criterio], ascending=False, na_position='last', kind='stable')
+    resultado.insert(0, 'posicao', np.arange(1, len(resultado) + 1))
+    return resultado.head(limite) if limite else resultado
+
+def aquecer(motores):
+    # Carrega no cache os meses de todos os motores (e recalcula os agregados desatualizados). Na API roda
+    # numa thread na inicialização, para a primeira consulta não pagar a leitura dos agregados.json.
+    inicio = time.perf_counter()
+    diario = tabela_diaria(motores)
+    logger.info("Comparativos prontos: %d motores, %d dias em %.2f s", diario['id_motor'].nunique(), len(diario), time.perf_counter() - inicio)
+
+def registros(df):
+    # Linhas prontas para JSON: floats arredondados e NaN como None.
+    df = df.round(2).astype(object)
+    return df.where(df.notna(), None).to_dict('records')
+
+def secao_relatorio(motor, motores_do_cliente, inicio=None, fim=None, criterio='violacoes_prodist'):
+    # Dados da seção "Comparativo" do PDF: tendência mensal do motor e sua posição entre os motores do cliente.
+    id_motor = str(motor['id_motor'])
+    classificacao = ranking(motores_do_cliente, criterio, inicio, fim)
+    return {'criterio': criterio, 'tendencia': registros(tendencias([motor], inicio, fim)),
+            'ranking': registros(classificacao), 'posicao': next((int(p) for p, i in zip(classificacao['posicao'], classificacao['id_motor']) if i == id_motor), None)}
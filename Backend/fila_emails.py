@@ -0,0 +1,219 @@
+# Arquivo: backend/fila_emails.py (Fila de envio de relatórios por e-mail)
+# Os pedidos de envio entram numa caixa de saída persistente (SQLite) e a API responde na hora. Uma
+# tarefa em segundo plano agrupa os relatórios pendentes de cada destinatário numa única mensagem e
+# envia tudo por uma conexão SMTP reaproveitada, com novas tentativas em intervalos crescentes. Com vários
+# workers do uvicorn cada um tem sua tarefa de envio: a linha só é enviada por quem a reservou.
+
+import asyncio
+import logging
+import mimetypes
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from armazenamento import conectar_sqlite
+from jobs_relatorios import _processo_vivo
+
+logger = logging.getLogger(__name__)
+
+# --- Configuração ---
+EMAILS_DATABASE = os.getenv("EMAILS_DATABASE", "emails.db")
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "smtp")  # 'smtp' ou 'arquivo' (grava .eml em EMAIL_PASTA_SAIDA, para testes)
+EMAIL_PASTA_SAIDA = os.getenv("EMAIL_PASTA_SAIDA", "emails_enviados")
+EMAIL_INTERVALO = float(os.getenv("EMAIL_INTERVALO", 5))
+EMAIL_MAX_ANEXOS = int(os.getenv("EMAIL_MAX_ANEXOS", 10))
+EMAIL_MAX_TENTATIVAS = int(os.getenv("EMAIL_MAX_TENTATIVAS", 5))
+EMAIL_ESPERA_BASE = float(os.getenv("EMAIL_ESPERA_BASE", 30))  # segundos; dobra a cada falha
+MAIL_USERNAME = os.getenv("MAIL_USERNAME", "default@email.com")
+MAIL_PASSWORD = os.getenv("MAIL_PASSWORD", "senha_padrao")
+MAIL_FROM = os.getenv("MAIL_FROM", "no-reply@default.com")
+MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.default.com")
+MAIL_PORT = int(os.getenv("MAIL_PORT", 587))
+
+CORPO_PADRAO = "Olá,\n\nSegue em anexo o relatório técnico de acompanhamento mensal solicitado.\n\nAtenciosamente,\nSistema de Relatórios."
+CORPO_VARIOS = "Olá,\n\nSeguem em anexo os relatórios técnicos de acompanhamento mensal.\n\nAtenciosamente,\nSistema de Relatórios."
+
+# Estados: pending -> sending (reservado por 'dono', o pid do worker) -> sent | failed (após EMAIL_MAX_TENTATIVAS).
+# 'proximo_envio' adia as novas tentativas.
+_local = threading.local()
+
+def _conexao():
+    conexao = getattr(_local, 'conexao', None)
+    if conexao is None:
+        conexao = _local.conexao = conectar_sqlite(EMAILS_DATABASE)
+        conexao.row_factory = lambda cursor, linha: {col[0]: linha[i] for i, col in enumerate(cursor.description)}
+        conexao.execute("""CREATE TABLE IF NOT EXISTS emails (
+            id_email TEXT PRIMARY KEY, destinatario TEXT NOT NULL, caminho_anexo TEXT NOT NULL, assunto TEXT,
+            status TEXT NOT NULL, tentativas INTEGER NOT NULL DEFAULT 0, proximo_envio TEXT, erro TEXT,
+            id_mensagem TEXT, criado_em TEXT, enviado_em TEXT, dono INTEGER, reservado_em TEXT)""")
+        colunas = {coluna['name'] for coluna in conexao.execute("PRAGMA table_info(emails)").fetchall()}
+        for coluna, tipo in (('dono', 'INTEGER'), ('reservado_em', 'TEXT')):
+            if coluna not in colunas: conexao.execute(f"ALTER TABLE emails ADD COLUMN {coluna} {tipo}")
+        conexao.execute("CREATE INDEX IF NOT EXISTS idx_emails_pendentes ON emails (status, proximo_envio)")
+    return conexao
+
+def _agora():
+    return datetime.now().isoformat(timespec='seconds')
+
+def enfileirar(destinatario, caminho_anexo, assunto):
+    # Não duplica: o mesmo relatório ainda pendente para o mesmo destinatário reaproveita o pedido.
+    con = _conexao()
+    existente = con.execute("SELECT id_email FROM emails WHERE destinatario = ? AND caminho_anexo = ? AND status IN ('pending', 'sending')",
+                            (destinatario, caminho_anexo)).fetchone()
+    if existente: return existente['id_email']
+    id_email = uuid.uuid4().hex
+    con.execute("INSERT INTO emails (id_email, destinatario, caminho_anexo, assunto, status, proximo_envio, criado_em) VALUES (?, ?, ?, ?, 'pending', ?, ?)",
+                (id_email, destinatario, caminho_anexo, assunto, _agora(), _agora()))
+    return id_email
+
+def obter(id_email):
+    return _conexao().execute("SELECT * FROM emails WHERE id_email = ?", (id_email,)).fetchone()
+
+def resumo():
+    linhas = _conexao().execute("SELECT status, COUNT(*) AS total FROM emails GROUP BY status").fetchall()
+    return {linha['status']: linha['total'] for linha in linhas}
+
+def _recuperar_reservas():
+    # Reservas de um worker que morreu no meio do envio (ou de uma rodada interrompida deste processo, que só
+    # roda uma por vez) voltam para a fila.
+    con = _conexao()
+    for email in con.execute("SELECT id_email, dono FROM emails WHERE status = 'sending'").fetchall():
+        if email['dono'] != os.getpid() and email['dono'] is not None and _processo_vivo(email['dono']): continue
+        con.execute("UPDATE emails SET status = 'pending', dono = NULL, reservado_em = NULL WHERE id_email = ? AND status = 'sending' AND dono IS ?",
+                    (email['id_email'], email['dono']))
+
+def _reservar_pendentes():
+    # Reserva de uma vez os pendentes vencidos; outro worker que leu as mesmas linhas não as pega de novo,
+    # porque o UPDATE só vale para quem ainda está 'pending'. Devolve só o que este processo reservou.
+    _recuperar_reservas()
+    con = _conexao()
+    ids = [email['id_email'] for email in con.execute("SELECT id_email FROM emails WHERE status = 'pending' AND proximo_envio <= ?",
+                                                      (_agora(),)).fetchall()]
+    if not ids: return []
+    reservado_em = datetime.now().isoformat()
+    for i in range(0, len(ids), 500):
+        lote = ids[i:i + 500]
+        con.execute(f"UPDATE emails SET status = 'sending', dono = ?, reservado_em = ? WHERE id_email IN ({', '.join('?' * len(lote))}) AND status = 'pending'",
+                    [os.getpid(), reservado_em] + lote)
+    return con.execute("SELECT * FROM emails WHERE status = 'sending' AND dono = ? AND reservado_em = ? ORDER BY criado_em",
+                       (os.getpid(), reservado_em)).fetchall()
+
+def _pendentes_por_destinatario():
+    grupos = {}
+    for email in _reservar_pendentes():
+        grupos.setdefault(email['destinatario'], []).append(email)
+    # Cada mensagem leva no máximo EMAIL_MAX_ANEXOS relatórios.
+    return [(destinatario, itens[i:i + EMAIL_MAX_ANEXOS]) for destinatario, itens in grupos.items()
+            for i in range(0, len(itens), EMAIL_MAX_ANEXOS)]
+
+def montar_mensagem(destinatario, itens):
+    mensagem = EmailMessage()
+    mensagem['From'], mensagem['To'] = MAIL_FROM, destinatario
+    mensagem['Subject'] = itens[0]['assunto'] if len(itens) == 1 else f"Relatórios Técnicos ({len(itens)} relatórios)"
+    mensagem.set_content(CORPO_PADRAO if len(itens) == 1 else CORPO_VARIOS)
+    for item in itens:
+        tipo = (mimetypes.guess_type(item['caminho_anexo'])[0] or 'application/octet-stream').split('/')
+        with open(item['caminho_anexo'], 'rb') as anexo:
+            mensagem.add_attachment(anexo.read(), maintype=tipo[0], subtype=tipo[1], filename=os.path.basename(item['caminho_anexo']))
+    return mensagem
+
+# --- Envio ---
+class EnvioSMTP:
+    # Mantém uma conexão SMTP aberta entre os envios e reconecta quando o servidor a derruba. O aiosmtplib
+    # só é importado quando o envio por SMTP é usado.
+    def __init__(self):
+        self._cliente = None
+
+    async def _conectar(self):
+        import aiosmtplib
+        self._cliente = aiosmtplib.SMTP(hostname=MAIL_SERVER, port=MAIL_PORT, start_tls=True)
+        await self._cliente.connect()
+        await self._cliente.login(MAIL_USERNAME, MAIL_PASSWORD)
+
+    async def enviar(self, mensagem):
+        import aiosmtplib
+        for tentativa in range(2):
+            try:
+                if self._cliente is None or not self._cliente.is_connected: await self._conectar()
+                await self._cliente.send_message(mensagem)
+                return
+            except (aiosmtplib.SMTPServerDisconnected, ConnectionError):
+                self._cliente = None
+                if tentativa: raise
+
+    async def fechar(self):
+        if self._cliente is not None and self._cliente.is_connected:
+            import aiosmtplib
+            try:
+                await self._cliente.quit()
+            except aiosmtplib.SMTPException:
+                pass
+        self._cliente = None
+
+class EnvioArquivo:
+    # Substituto do SMTP para testes e desenvolvimento: cada mensagem vira um .eml em EMAIL_PASTA_SAIDA.
+    async def enviar(self, mensagem):
+        await asyncio.to_thread(self._gravar, mensagem)
+
+    def _gravar(self, mensagem):
+        os.makedirs(EMAIL_PASTA_SAIDA, exist_ok=True)
+        caminho = os.path.join(EMAIL_PASTA_SAIDA, f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}.eml")
+        with open(caminho, 'wb') as saida:
+            saida.write(bytes(mensagem))
+
+    async def fechar(self):
+        pass
+
+def criar_envio(backend=None):
+    return EnvioArquivo() if (backend or EMAIL_BACKEND) == 'arquivo' else EnvioSMTP()
+
+def _separar_ausentes(itens):
+    # Marca como falha os relatórios que sumiram do disco e devolve os que ainda existem.
+    presentes = []
+    for item in itens:
+        if os.path.isfile(item['caminho_anexo']): presentes.append(item)
+        else: _conexao().execute("UPDATE emails SET status = 'failed', erro = 'Relatório não encontrado.' WHERE id_email = ?", (item['id_email'],))
+    return presentes
+
+def _marcar_enviados(ids):
+    _conexao().execute(f"UPDATE emails SET status = 'sent', enviado_em = ?, erro = NULL, id_mensagem = ? WHERE id_email IN ({', '.join('?' * len(ids))})",
+                       [_agora(), uuid.uuid4().hex] + ids)
+
+def _marcar_falha(itens, erro):
+    for item in itens:
+        tentativas = item['tentativas'] + 1
+        espera = timedelta(seconds=EMAIL_ESPERA_BASE * 2 ** (tentativas - 1))
+        _conexao().execute("UPDATE emails SET tentativas = ?, erro = ?, status = ?, proximo_envio = ?, dono = NULL, reservado_em = NULL WHERE id_email = ?",
+                           (tentativas, erro, 'failed' if tentativas >= EMAIL_MAX_TENTATIVAS else 'pending',
+                            (datetime.now() + espera).isoformat(timespec='seconds'), item['id_email']))
+
+async def processar_pendentes(envio):
+    # Envia o que está vencido, uma mensagem por destinatário (até EMAIL_MAX_ANEXOS anexos cada). O SQLite,
+    # o disco e a leitura dos anexos rodam em threads para não travar o loop de eventos da API.
+    enviados = 0
+    for destinatario, itens in await asyncio.to_thread(_pendentes_por_destinatario):
+        itens = await asyncio.to_thread(_separar_ausentes, itens)
+        if not itens: continue
+        try:
+            await envio.enviar(await asyncio.to_thread(montar_mensagem, destinatario, itens))
+        except Exception as e:
+            logger.exception("Falha ao enviar e-mail para %s", destinatario)
+            await asyncio.to_thread(_marcar_falha, itens, str(e))
+            continue
+        await asyncio.to_thread(_marcar_enviados, [item['id_email'] for item in itens])
+        enviados += len(itens)
+    return enviados
+
+async def enviar_periodicamente():
+    envio = criar_envio()
+    try:
+        while True:
+            try:
+                await processar_pendentes(envio)
+            except Exception:
+                logger.exception("Falha ao processar a fila de e-mails")
+            await asyncio.sleep(EMAIL_INTERVALO)
+    finally:
+        await envio.fechar()
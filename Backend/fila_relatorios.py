@@ -0,0 +1,88 @@
+# Arquivo: backend/fila_relatorios.py (Geração de relatórios em processos separados)
+
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# --- Configuração do pool ---
+RELATORIO_WORKERS = int(os.getenv("RELATORIO_WORKERS", os.cpu_count() or 1))
+RELATORIO_FILA_MAX = int(os.getenv("RELATORIO_FILA_MAX", 4))
+RELATORIO_RETRY_AFTER = int(os.getenv("RELATORIO_RETRY_AFTER", 30))
+RELATORIO_AQUECER = os.getenv("RELATORIO_AQUECER", "1") != "0"  # sobe os workers na inicialização da API
+
+class FilaCheiaError(Exception):
+    pass
+
+# Processos (e não threads) porque o matplotlib não é thread-safe. O semáforo limita o total de
+# relatórios em execução + aguardando, para que o excesso seja recusado em vez de enfileirado sem fim.
+_pool = None
+_pool_lock = threading.Lock()
+_vagas = threading.BoundedSemaphore(RELATORIO_WORKERS + RELATORIO_FILA_MAX)
+
+def _inicializar_worker():
+    import metricas
+    metricas.configurar_logs()
+    import matplotlib
+    matplotlib.use("Agg")
+    import pdf_generator  # noqa: F401  (importa pandas/matplotlib/fpdf uma única vez por processo)
+
+def _chamar(nome_funcao, *args):
+    # Tarefas passadas como "modulo.funcao" são importadas só no worker: o processo da API não carrega
+    # pdf_generator (matplotlib, fpdf) só para entregar a função ao pool.
+    modulo, funcao = nome_funcao.rsplit(".", 1)
+    return getattr(importlib.import_module(modulo), funcao)(*args)
+
+def _pid():
+    return os.getpid()
+
+def obter_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=RELATORIO_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_inicializar_worker)
+        return _pool
+
+def aquecer():
+    # Sobe os processos do pool (que importam pdf_generator no inicializador) antes do primeiro relatório.
+    # Bloqueia até todos responderem: na API roda numa thread, sem atrasar a inicialização.
+    inicio = time.perf_counter()
+    pool = obter_pool()
+    pids = {futuro.result() for futuro in [pool.submit(_pid) for _ in range(RELATORIO_WORKERS)]}
+    logger.info("Pool de relatórios pronto: %d processos em %.2f s", len(pids), time.perf_counter() - inicio)
+    return len(pids)
+
+def submeter(funcao, *args, bloquear=False):
+    # funcao pode ser a própria função ou o nome "modulo.funcao" (importado só no worker).
+    if isinstance(funcao, str): funcao, args = _chamar, (funcao, *args)
+    if not _vagas.acquire(blocking=bloquear):
+        raise FilaCheiaError("Fila de relatórios cheia.")
+    try:
+        try:
+            futuro = obter_pool().submit(funcao, *args)
+        except BrokenProcessPool:  # um worker morreu (ex.: falta de memória): recria o pool
+            encerrar()
+            futuro = obter_pool().submit(funcao, *args)
+    except Exception:
+        _vagas.release()
+        raise
+    futuro.add_done_callback(lambda _: _vagas.release())
+    return futuro
+
+async def executar(funcao, *args):
+    return await asyncio.wrap_future(submeter(funcao, *args))
+
+def encerrar():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,128 @@
+# Arquivo: backend/graficos.py (Renderização dos gráficos do relatório)
+
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+from PIL import Image
+
+from analises import MAPEAMENTO_COLUNAS
+from reducao_series import reduzir_serie
+
+# --- Configuração ---
+PERFIS_QUALIDADE = {'rascunho': 100, 'padrao': 150, 'alta': 200}
+QUALIDADE_GRAFICOS = os.getenv("QUALIDADE_GRAFICOS", "padrao")
+GRAFICOS_DPI = int(os.getenv("GRAFICOS_DPI", PERFIS_QUALIDADE.get(QUALIDADE_GRAFICOS, 150)))
+GRAFICOS_WORKERS = int(os.getenv("GRAFICOS_WORKERS", 2))  # 0 = renderiza no próprio processo do relatório
+TAMANHO_FIGURA = (8.2, 4.5)
+REDUCAO_GRAFICOS = os.getenv("REDUCAO_GRAFICOS", "envelope")  # envelope (mín/máx por faixa), lttb ou nenhum
+PONTOS_POR_PIXEL = float(os.getenv("PONTOS_POR_PIXEL", 1))  # pontos desenhados por pixel da largura do gráfico
+COMPRESSAO_GRAFICOS = os.getenv("COMPRESSAO_GRAFICOS", "paleta")  # paleta (PNG de até 256 cores) ou rgb
+COLUNAS_GRAFICOS = [MAPEAMENTO_COLUNAS[chave] for chave in ('tensao_a', 'tensao_b', 'tensao_c', 'corrente_a', 'corrente_b', 'corrente_c',
+                                                            'fp_a', 'fp_b', 'fp_c', 'velocidade', 'nivel')]
+
+# --- Preparação (processo do relatório) ---
+def pontos_alvo(dpi=None):
+    return max(10, int(TAMANHO_FIGURA[0] * (dpi or GRAFICOS_DPI) * PONTOS_POR_PIXEL))
+
+def acumular_series(series, bloco, metodo=None):
+    # Leitura em blocos: junta as séries do bloco, já reduzidas, às acumuladas ({coluna: (x, y)}, em ordem de
+    # tempo). Uma coluna que passa de 4x os pontos do gráfico é reduzida de novo, então a memória das séries
+    # não cresce com o arquivo. O resultado serve de 'data' para preparar_grafico.
+    n_pontos, metodo = pontos_alvo(), metodo or REDUCAO_GRAFICOS
+    for col in COLUNAS_GRAFICOS:
+        if col not in bloco.columns: continue
+        coluna = bloco[col].dropna()
+        if coluna.empty: continue
+        x, y = reduzir_serie(coluna.index.values, coluna.to_numpy(dtype='float64'), n_pontos, metodo)
+        if col in series: x, y = np.concatenate([series[col][0], x]), np.concatenate([series[col][1], y])
+        if len(y) > 4 * n_pontos: x, y = reduzir_serie(x, y, 2 * n_pontos, metodo)
+        series[col] = (x, y)
+    return series
+
+def preparar_grafico(data, y_cols_keys, title, ylabel, tensao_nominal=None, metodo=None):
+    # Reduz o DataFrame (ou as séries de acumular_series) ao que o gráfico precisa: um par (x, y) por coluna,
+    # com no máximo um ponto por pixel da largura. É esse dict (pequeno e serializável) que vai para os
+    # processos de renderização.
+    if isinstance(y_cols_keys, str): y_cols_keys = [y_cols_keys]
+    n_pontos = pontos_alvo()
+    if isinstance(data, dict):
+        series = {col: reduzir_serie(*data[col], n_pontos, metodo or REDUCAO_GRAFICOS)
+                  for col in (MAPEAMENTO_COLUNAS.get(key) for key in y_cols_keys) if col in data}
+        return {'titulo': title, 'ylabel': ylabel, 'tensao_nominal': tensao_nominal, 'series': series} if series else None
+    y_cols_reais = [MAPEAMENTO_COLUNAS.get(key) for key in y_cols_keys if MAPEAMENTO_COLUNAS.get(key) in data.columns]
+    if not y_cols_reais or data[y_cols_reais].empty: return None
+    series = {}
+    for col in y_cols_reais:
+        coluna = data[col].dropna()
+        if coluna.empty: continue
+        series[col] = reduzir_serie(coluna.index.values, coluna.to_numpy(dtype='float64'), n_pontos, metodo or REDUCAO_GRAFICOS)
+    if not series: return None
+    return {'titulo': title, 'ylabel': ylabel, 'tensao_nominal': tensao_nominal, 'series': series}
+
+# --- Desenho (processos de renderização) ---
+# Cada processo aplica o tema uma única vez e reaproveita a mesma Figure, limpando-a a cada gráfico.
+_figura = None
+
+def _inicializar_worker():
+    global _figura
+    import seaborn as sns
+    sns.set_theme(style="darkgrid")
+    _figura = Figure(figsize=TAMANHO_FIGURA)
+    FigureCanvasAgg(_figura)
+
+def desenhar_grafico(spec, dpi=None):
+    if _figura is None: _inicializar_worker()
+    fig = _figura
+    fig.clf()
+    ax = fig.add_subplot()
+    for col, (x, y) in spec['series'].items():
+        ax.plot(x, y, label=col)
+    ax.set_title(spec['titulo'], fontsize=14); ax.set_ylabel(spec['ylabel']); ax.set_xlabel("")
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m'))
+    tensao_nominal = spec.get('tensao_nominal')
+    if tensao_nominal: ax.axhline(y=tensao_nominal, color='lime', linestyle='--', linewidth=1.2, label=f'Tensão Ideal ({tensao_nominal:.0f}V)')
+    ax.legend(loc='upper left')
+    fig.tight_layout()
+    fig.set_dpi(dpi or GRAFICOS_DPI)
+    fig.canvas.draw()
+    return comprimir_imagem(Image.frombuffer('RGBA', fig.canvas.get_width_height(), fig.canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1))
+
+def comprimir_imagem(imagem, metodo=None):
+    # PNG sem canal alfa (o fundo do gráfico é opaco) e, no modo 'paleta', com até 256 cores: as linhas e
+    # a grade usam poucas cores, o arquivo fica cerca de 3x menor e o fpdf embute 1 byte por pixel.
+    imagem = imagem.convert('RGB')
+    if (metodo or COMPRESSAO_GRAFICOS) == 'paleta':
+        imagem = imagem.quantize(256, method=Image.Quantize.FASTOCTREE)
+    buf = io.BytesIO(); imagem.save(buf, format='PNG')
+    return buf.getvalue()
+
+# --- Renderização paralela ---
+# O relatório já roda num worker do pool de relatórios; um pool persistente aninhado ali impede o
+# worker de encerrar. Por isso cada relatório abre um pool curto via fork: os filhos herdam o tema e a
+# Figure já preparados (sem reimportar matplotlib) e são encerrados ao fim do bloco with.
+def _pode_usar_fork():
+    return "fork" in multiprocessing.get_all_start_methods() and threading.active_count() == 1
+
+def desenhar_graficos(specs):
+    # Recebe {nome: spec ou None} e devolve {nome: BytesIO ou None}, em paralelo quando possível.
+    validos = {nome: spec for nome, spec in specs.items() if spec is not None}
+    if _figura is None: _inicializar_worker()
+    if GRAFICOS_WORKERS > 0 and len(validos) > 1 and _pode_usar_fork():
+        with ProcessPoolExecutor(max_workers=min(GRAFICOS_WORKERS, len(validos)), mp_context=multiprocessing.get_context("fork")) as pool:
+            imagens = dict(zip(validos, pool.map(desenhar_grafico, validos.values())))
+    else:
+        imagens = {nome: desenhar_grafico(spec) for nome, spec in validos.items()}
+    return {nome: io.BytesIO(imagens[nome]) if nome in imagens else None for nome in specs}
+
+def criar_grafico_em_memoria(data, y_cols_keys, title, ylabel, tensao_nominal=None):
+    spec = preparar_grafico(data, y_cols_keys, title, ylabel, tensao_nominal)
+    return io.BytesIO(desenhar_grafico(spec)) if spec else None
@@ -0,0 +1,79 @@
+# Arquivo: backend/ingestao.py (Leitura em blocos dos CSVs de telemetria do ESP32)
+
+import hashlib
+import os
+import pandas as pd
+from analises import MAPEAMENTO_COLUNAS
+
+# --- Configuração ---
+FORMATO_DATA_TELEMETRIA = os.getenv("FORMATO_DATA_TELEMETRIA", "%d/%m/%Y %H:%M:%S")
+LIMITE_MEMORIA_INGESTAO_MB = float(os.getenv("LIMITE_MEMORIA_INGESTAO_MB", 512))
+LINHAS_POR_BLOCO = int(os.getenv("LINHAS_POR_BLOCO", 100_000))
+TAMANHO_BLOCO_UPLOAD = 1024 * 1024
+
+COLUNA_TEMPO = MAPEAMENTO_COLUNAS['timestamp']
+COLUNAS_NUMERICAS = [col for chave, col in MAPEAMENTO_COLUNAS.items() if chave != 'timestamp']
+
+class LimiteMemoriaExcedido(ValueError):
+    pass
+
+async def salvar_upload(arquivo, caminho_destino):
+    # Copia o UploadFile para o disco em blocos de 1 MB, sem bloquear o loop com um copyfileobj
+    # único, e já calcula o SHA-256 do conteúdo. Retorna (tamanho_bytes, sha256).
+    resumo = hashlib.sha256()
+    tamanho = 0
+    with open(caminho_destino, "wb") as destino:
+        while True:
+            bloco = await arquivo.read(TAMANHO_BLOCO_UPLOAD)
+            if not bloco: break
+            resumo.update(bloco)
+            destino.write(bloco)
+            tamanho += len(bloco)
+    return tamanho, resumo.hexdigest()
+
+def sha256_arquivo(caminho):
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as origem:
+        for bloco in iter(lambda: origem.read(TAMANHO_BLOCO_UPLOAD), b""):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+def converter_tempo(serie):
+    # Formato explícito primeiro (rápido); só o que não casar cai na inferência com dayfirst=True.
+    tempos = pd.to_datetime(serie, format=FORMATO_DATA_TELEMETRIA, errors='coerce')
+    falhas = tempos.isna() & serie.notna()
+    if falhas.any():
+        tempos[falhas] = pd.to_datetime(serie[falhas], dayfirst=True, errors='coerce')
+    return tempos
+
+def _preparar_bloco(bloco):
+    for col in bloco.columns:
+        if col != COLUNA_TEMPO:
+            bloco[col] = pd.to_numeric(bloco[col], errors='coerce').astype('float32')
+    if COLUNA_TEMPO in bloco.columns:
+        bloco[COLUNA_TEMPO] = converter_tempo(bloco[COLUNA_TEMPO])
+        bloco = bloco.dropna(subset=[COLUNA_TEMPO]).set_index(COLUNA_TEMPO)
+    return bloco
+
+def ler_blocos_telemetria(origem, linhas_por_bloco=None):
+    # Gera blocos já reduzidos: só as colunas do MAPEAMENTO_COLUNAS, medidas em float32 e Time como índice.
+    leitor = pd.read_csv(origem, delimiter=';', usecols=lambda col: col in MAPEAMENTO_COLUNAS.values(),
+                         dtype={COLUNA_TEMPO: str}, chunksize=linhas_por_bloco or LINHAS_POR_BLOCO)
+    with leitor:
+        for bloco in leitor:
+            yield _preparar_bloco(bloco)
+
+def ler_telemetria(origem, limite_memoria_mb=None):
+    limite_bytes = (limite_memoria_mb or LIMITE_MEMORIA_INGESTAO_MB) * 1024 * 1024
+    blocos, memoria = [], 0
+    for bloco in ler_blocos_telemetria(origem):
+        memoria += bloco.memory_usage(index=True).sum()
+        if memoria > limite_bytes:
+            raise LimiteMemoriaExcedido(f"O arquivo de telemetria excede o limite de {limite_bytes / (1024*1024):.0f} MB em memória. "
+                                        "Divida o arquivo por período ou aumente LIMITE_MEMORIA_INGESTAO_MB.")
+        blocos.append(bloco)
+    if not blocos: return pd.DataFrame(columns=COLUNAS_NUMERICAS, dtype='float32')
+    df = pd.concat(blocos) if len(blocos) > 1 else blocos[0]
+    if isinstance(df.index, pd.DatetimeIndex) and not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    return df
@@ -0,0 +1,113 @@
+# Arquivo: backend/ingestao_continua.py (Recepção contínua de amostras enviadas pelos ESP32)
+# As amostras chegam em lotes pequenos por id_esp32, ficam num buffer em memória por motor e são
+# gravadas em blocos grandes no armazenamento por motor (telemetria_motores). O buffer tem tamanho
+# máximo: quando enche, a API recusa novos lotes (429) até a gravação liberar espaço.
+
+import io
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+import telemetria_motores
+from ingestao import COLUNA_TEMPO, COLUNAS_NUMERICAS, converter_tempo, ler_telemetria
+
+logger = logging.getLogger(__name__)
+
+# --- Configuração ---
+TELEMETRIA_BUFFER_MAX = int(os.getenv("TELEMETRIA_BUFFER_MAX", 2_000_000))  # amostras em memória, somando todos os motores
+TELEMETRIA_AMOSTRAS_POR_GRAVACAO = int(os.getenv("TELEMETRIA_AMOSTRAS_POR_GRAVACAO", 50_000))
+TELEMETRIA_INTERVALO_GRAVACAO = float(os.getenv("TELEMETRIA_INTERVALO_GRAVACAO", 300))  # segundos
+TELEMETRIA_RETRY_AFTER = int(os.getenv("TELEMETRIA_RETRY_AFTER", 10))
+
+class BufferCheio(Exception):
+    pass
+
+def amostras_de_json(amostras):
+    # Lista de dicts {"Time": "dd/mm/aaaa HH:MM:SS" ou epoch em segundos, "AVRMS": ..., ...} -> DataFrame
+    # no mesmo formato da leitura do CSV (float32, Time como índice).
+    df = pd.DataFrame.from_records(amostras)
+    if COLUNA_TEMPO not in df.columns: raise ValueError(f"As amostras precisam do campo '{COLUNA_TEMPO}'.")
+    df = df[[col for col in df.columns if col == COLUNA_TEMPO or col in COLUNAS_NUMERICAS]]
+    for col in df.columns:
+        if col != COLUNA_TEMPO:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    tempos = df[COLUNA_TEMPO]
+    if pd.api.types.is_numeric_dtype(tempos):
+        df[COLUNA_TEMPO] = pd.to_datetime(tempos, unit='s', errors='coerce')
+    else:
+        df[COLUNA_TEMPO] = converter_tempo(tempos.astype(str))
+    return df.dropna(subset=[COLUNA_TEMPO]).set_index(COLUNA_TEMPO)
+
+def amostras_de_csv(conteudo):
+    # Corpo no formato do CSV do ESP32 (separador ';', com cabeçalho).
+    return ler_telemetria(io.BytesIO(conteudo))
+
+class BufferTelemetria:
+    def __init__(self, maximo=TELEMETRIA_BUFFER_MAX, amostras_por_gravacao=TELEMETRIA_AMOSTRAS_POR_GRAVACAO,
+                 intervalo_gravacao=TELEMETRIA_INTERVALO_GRAVACAO):
+        self.maximo, self.amostras_por_gravacao, self.intervalo_gravacao = maximo, amostras_por_gravacao, intervalo_gravacao
+        self._lock = threading.Lock()
+        self._blocos = {}        # id_motor -> [DataFrame, ...]
+        self._contagem = {}      # id_motor -> amostras no buffer
+        self._primeira = {}      # id_motor -> momento (monotônico) da amostra mais antiga ainda não gravada
+        self._ocupacao = 0       # amostras em memória, incluindo as que estão sendo gravadas
+
+    @property
+    def ocupacao(self):
+        return self._ocupacao
+
+    def adicionar(self, id_motor, df):
+        with self._lock:
+            if self._ocupacao + len(df) > self.maximo:
+                raise BufferCheio(f"Buffer de telemetria cheio ({self._ocupacao} amostras).")
+            self._blocos.setdefault(id_motor, []).append(df)
+            self._contagem[id_motor] = self._contagem.get(id_motor, 0) + len(df)
+            self._primeira.setdefault(id_motor, time.monotonic())
+            self._ocupacao += len(df)
+
+    def retirar(self, forcar=False, id_motor=None):
+        # Tira do buffer os motores prontos para gravar (volume ou idade), ou todos com forcar=True.
+        # As amostras continuam contando na ocupação até liberar() ser chamado após a gravação.
+        agora = time.monotonic()
+        prontos = {}
+        with self._lock:
+            for motor in list(self._blocos):
+                if id_motor is not None and motor != id_motor: continue
+                if forcar or self._contagem[motor] >= self.amostras_por_gravacao or agora - self._primeira[motor] >= self.intervalo_gravacao:
+                    blocos = self._blocos.pop(motor)
+                    del self._contagem[motor], self._primeira[motor]
+                    prontos[motor] = pd.concat(blocos) if len(blocos) > 1 else blocos[0]
+        return prontos
+
+    def devolver(self, id_motor, df):
+        # Gravação falhou: as amostras voltam para o buffer (já contam na ocupação).
+        with self._lock:
+            self._blocos.setdefault(id_motor, []).insert(0, df)
+            self._contagem[id_motor] = self._contagem.get(id_motor, 0) + len(df)
+            self._primeira.setdefault(id_motor, time.monotonic())
+
+    def liberar(self, quantidade):
+        with self._lock:
+            self._ocupacao -= quantidade
+
+_gravacao_lock = threading.Lock()  # uma gravação por vez: compactação e escrita do mesmo mês não se cruzam
+
+def gravar_prontos(buffer, forcar=False, id_motor=None):
+    # Roda fora do loop de eventos (thread): grava cada motor pronto num único bloco ordenado.
+    with _gravacao_lock:
+        return _gravar(buffer, forcar, id_motor)
+
+def _gravar(buffer, forcar, id_motor):
+    gravadas = 0
+    for motor, df in buffer.retirar(forcar, id_motor).items():
+        try:
+            telemetria_motores.gravar(motor, df.sort_index())
+            buffer.liberar(len(df))
+            gravadas += len(df)
+        except Exception as e:
+            logger.warning("Falha ao gravar telemetria do motor %s, amostras mantidas no buffer: %s", motor, e)
+            buffer.devolver(motor, df)
+    return gravadas
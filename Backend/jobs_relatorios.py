@@ -0,0 +1,126 @@
+# Arquivo: backend/jobs_relatorios.py (Jobs assíncronos de geração de relatório)
+
+import functools
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+
+import fila_relatorios
+import metricas
+from armazenamento import conectar_sqlite
+
+logger = logging.getLogger(__name__)
+
+JOBS_DATABASE = os.getenv("JOBS_DATABASE", "jobs.db")
+
+# Estados expostos ao frontend: queued -> running -> done | failed. 'despachado_por' guarda o PID do
+# processo da API que entregou o job ao pool; se esse processo morrer, o job volta para a fila.
+_local = threading.local()
+
+def _conexao():
+    conexao = getattr(_local, 'conexao', None)
+    if conexao is None:
+        conexao = _local.conexao = conectar_sqlite(JOBS_DATABASE)
+        conexao.row_factory = lambda cursor, linha: {col[0]: linha[i] for i, col in enumerate(cursor.description)}
+        conexao.execute("""CREATE TABLE IF NOT EXISTS jobs (
+            id_job TEXT PRIMARY KEY, status TEXT NOT NULL, id_motor TEXT, caminho_csv TEXT,
+            dados_motor TEXT, checkboxes TEXT, despachado_por INTEGER, nome_arquivo TEXT, erro TEXT,
+            etapas TEXT, criado_em TEXT, iniciado_em TEXT, concluido_em TEXT)""")
+        conexao.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, criado_em)")
+    return conexao
+
+def _agora():
+    return datetime.now().isoformat(timespec='seconds')
+
+def _atualizar(id_job, **campos):
+    atribuicoes = ", ".join(f"{campo} = ?" for campo in campos)
+    _conexao().execute(f"UPDATE jobs SET {atribuicoes} WHERE id_job = ?", list(campos.values()) + [id_job])
+
+def criar_job(id_motor, caminho_csv, dados_motor, checkboxes):
+    id_job = uuid.uuid4().hex
+    _conexao().execute(
+        "INSERT INTO jobs (id_job, status, id_motor, caminho_csv, dados_motor, checkboxes, criado_em) VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+        (id_job, id_motor, caminho_csv, json.dumps(dados_motor, default=lambda _: None), json.dumps(checkboxes), _agora()))
+    return id_job
+
+def obter_job(id_job):
+    job = _conexao().execute("SELECT * FROM jobs WHERE id_job = ?", (id_job,)).fetchone()
+    if job is None: return None
+    return {
+        'id_job': job['id_job'], 'status': job['status'], 'id_motor': job['id_motor'],
+        'criado_em': job['criado_em'], 'iniciado_em': job['iniciado_em'], 'concluido_em': job['concluido_em'],
+        'etapas': json.loads(job['etapas']) if job['etapas'] else {},
+        'nome_arquivo': job['nome_arquivo'], 'erro': job['erro'],
+        'url_relatorio': f"/api/relatorios-salvos/{job['nome_arquivo']}" if job['status'] == 'done' else None,
+    }
+
+# --- Execução (roda dentro de um processo do pool) ---
+def executar_job(id_job):
+    job = _conexao().execute("SELECT * FROM jobs WHERE id_job = ?", (id_job,)).fetchone()
+    _atualizar(id_job, status='running', iniciado_em=_agora())
+    import pdf_generator  # só no worker do pool (já carregado pelo inicializador)
+    try:
+        resultado = pdf_generator.gerar_relatorio_de_arquivo(job['caminho_csv'], json.loads(job['dados_motor']), json.loads(job['checkboxes']))
+        _atualizar(id_job, status='done', nome_arquivo=os.path.basename(resultado['caminho_pdf']),
+                   etapas=json.dumps(resultado['tempos']), concluido_em=_agora())
+        return resultado
+    except Exception as e:
+        logger.exception("Job de relatório %s falhou", id_job)
+        _atualizar(id_job, status='failed', erro=str(e), concluido_em=_agora())
+        return None
+    finally:
+        if job['caminho_csv'] and os.path.exists(job['caminho_csv']):
+            os.remove(job['caminho_csv'])
+
+# --- Despacho (roda no processo da API) ---
+def despachar():
+    # Entrega ao pool os jobs 'queued' ainda sem dono, na ordem de criação, até a fila encher.
+    con = _conexao()
+    pendentes = con.execute("SELECT id_job FROM jobs WHERE status = 'queued' AND despachado_por IS NULL ORDER BY criado_em").fetchall()
+    for job in pendentes:
+        reivindicado = con.execute("UPDATE jobs SET despachado_por = ? WHERE id_job = ? AND despachado_por IS NULL",
+                                   (os.getpid(), job['id_job'])).rowcount
+        if not reivindicado: continue
+        try:
+            fila_relatorios.submeter(executar_job, job['id_job']).add_done_callback(functools.partial(_concluido, job['id_job']))
+        except fila_relatorios.FilaCheiaError:
+            _atualizar(job['id_job'], despachado_por=None)
+            break
+
+def _concluido(id_job, futuro):
+    # Se o worker morreu (BrokenProcessPool) ou o futuro foi cancelado, executar_job não chegou a marcar o
+    # job nem a apagar o CSV: o job falha aqui, sem nova tentativa (o mesmo arquivo tende a derrubar o worker de novo).
+    erro = "Relatório cancelado." if futuro.cancelled() else futuro.exception()
+    resultado = None if erro else futuro.result()
+    if resultado: metricas.registrar_relatorio(resultado, 'job')
+    else: metricas.registrar_falha('job')
+    if not erro: return
+    job = _conexao().execute("SELECT status, caminho_csv FROM jobs WHERE id_job = ?", (id_job,)).fetchone()
+    if job is None or job['status'] in ('done', 'failed'): return
+    logger.error("Job de relatório %s interrompido: %s", id_job, erro)
+    _atualizar(id_job, status='failed', erro=f"Processamento interrompido: {erro}", concluido_em=_agora())
+    if job['caminho_csv'] and os.path.exists(job['caminho_csv']):
+        os.remove(job['caminho_csv'])
+
+def _processo_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def recuperar_jobs_interrompidos():
+    # Na inicialização: jobs de um processo da API que morreu voltam para a fila se o CSV ainda existe.
+    con = _conexao()
+    orfaos = con.execute("SELECT id_job, caminho_csv, despachado_por FROM jobs WHERE status IN ('queued', 'running') AND despachado_por IS NOT NULL").fetchall()
+    for job in orfaos:
+        if job['despachado_por'] == os.getpid() or _processo_vivo(job['despachado_por']): continue
+        if job['caminho_csv'] and os.path.exists(job['caminho_csv']):
+            _atualizar(job['id_job'], status='queued', despachado_por=None, iniciado_em=None)
+        else:
+            _atualizar(job['id_job'], status='failed', erro="Job interrompido e arquivo de dados não está mais disponível.", concluido_em=_agora())
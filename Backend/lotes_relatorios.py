@@ -0,0 +1,123 @@
+# Arquivo: backend/lotes_relatorios.py (Geração de relatórios em lote para um cliente ou a frota)
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import zipfile
+from concurrent.futures import as_completed
+from datetime import datetime
+
+import fila_relatorios
+import ingestao
+import metricas
+
+logger = logging.getLogger(__name__)
+
+EXTENSOES_TELEMETRIA = ('.csv',)
+
+def _nome_seguro(nome):
+    # Só o nome do arquivo, sem diretórios (evita zip slip e caminhos vindos do navegador).
+    return os.path.basename(nome.replace("\\", "/"))
+
+async def salvar_arquivos_do_lote(arquivos, pasta):
+    # Grava os uploads na pasta do lote; zips são abertos e cada CSV de dentro vira um arquivo do lote.
+    # Retorna [(nome_original, caminho_local)].
+    os.makedirs(pasta, exist_ok=True)
+    salvos = []
+    for arquivo in arquivos:
+        nome = _nome_seguro(arquivo.filename or "")
+        caminho = os.path.join(pasta, f"{uuid.uuid4().hex}_{nome}")
+        await ingestao.salvar_upload(arquivo, caminho)
+        if not zipfile.is_zipfile(caminho):
+            salvos.append((nome, caminho))
+            continue
+        with zipfile.ZipFile(caminho) as pacote:
+            for info in pacote.infolist():
+                nome_interno = _nome_seguro(info.filename)
+                if info.is_dir() or not nome_interno.lower().endswith(EXTENSOES_TELEMETRIA): continue
+                destino = os.path.join(pasta, f"{uuid.uuid4().hex}_{nome_interno}")
+                with pacote.open(info) as origem, open(destino, "wb") as saida:
+                    while True:
+                        bloco = origem.read(ingestao.TAMANHO_BLOCO_UPLOAD)
+                        if not bloco: break
+                        saida.write(bloco)
+                salvos.append((nome_interno, destino))
+        os.remove(caminho)
+    return salvos
+
+def identificar_motor(nome_arquivo, registro):
+    # O nome do arquivo (sem extensão) deve ser o id_motor ou o id_esp32 do registro; também aceita
+    # um sufixo depois de '_' ou '-', como em 'a1b2c3d4_maio.csv' ou 'ESP32-01_2025-05.csv'.
+    base = os.path.splitext(nome_arquivo)[0].strip()
+    candidatos = [base] + [base.split(sep, 1)[0] for sep in ('_', '-') if sep in base]
+    for candidato in candidatos:
+        motor = registro.motor(candidato) or registro.motor_por_esp32(candidato)
+        if motor is not None: return motor
+    return None
+
+def gerar_lote(arquivos, registro, checkboxes, id_cliente=None, max_simultaneos=None):
+    # Roda numa thread (fora do loop): distribui os arquivos pelo pool de relatórios e devolve o manifesto.
+    # max_simultaneos limita quantos itens do lote ocupam o pool ao mesmo tempo, deixando as vagas da
+    # fila livres para os relatórios avulsos. Dois arquivos que gerariam o mesmo PDF (mesmo motor e mês de
+    # referência) não se sobrescrevem: o segundo falha (pdf_generator.reservar_nome).
+    vagas_lote = threading.BoundedSemaphore(max_simultaneos or fila_relatorios.RELATORIO_WORKERS)
+    pasta_reservas = tempfile.mkdtemp(prefix="lote_nomes_")
+    try:
+        return _gerar_lote(arquivos, registro, checkboxes, id_cliente, vagas_lote, pasta_reservas)
+    finally:
+        shutil.rmtree(pasta_reservas, ignore_errors=True)
+
+def _gerar_lote(arquivos, registro, checkboxes, id_cliente, vagas_lote, pasta_reservas):
+    itens, futuros = [], {}
+    for nome_arquivo, caminho in arquivos:
+        motor = identificar_motor(nome_arquivo, registro)
+        item = {'arquivo': nome_arquivo, 'id_motor': motor and motor['id_motor'], 'status': 'failed', 'erro': None, 'nome_pdf': None}
+        itens.append(item)
+        if motor is None:
+            item['erro'] = "Arquivo não corresponde a nenhum id_motor ou id_esp32 cadastrado."
+            continue
+        if id_cliente is not None and str(motor.get('id_cliente')) != str(id_cliente):
+            item['erro'] = f"Motor {motor['id_motor']} não pertence ao cliente {id_cliente}."
+            continue
+        vagas_lote.acquire()
+        try:
+            futuro = fila_relatorios.submeter("pdf_generator.gerar_relatorio_de_arquivo", caminho, motor, checkboxes, None, False, pasta_reservas, bloquear=True)
+        except Exception as e:
+            vagas_lote.release()
+            item['erro'] = str(e)
+            continue
+        futuro.add_done_callback(lambda _: vagas_lote.release())
+        futuros[futuro] = item
+    for futuro in as_completed(futuros):
+        item = futuros[futuro]
+        try:
+            resultado = futuro.result()
+            item.update(status='done', nome_pdf=os.path.basename(resultado['caminho_pdf']), caminho_pdf=resultado['caminho_pdf'], etapas=resultado['tempos'])
+            metricas.registrar_relatorio(resultado, 'lote')
+        except Exception as e:
+            logger.exception("Falha no relatório do arquivo %s do lote", item['arquivo'])
+            metricas.registrar_falha('lote')
+            item['erro'] = str(e)
+    return itens
+
+def empacotar_lote(itens, caminho_zip):
+    # Zip com os PDFs gerados e um manifest.json com o resultado de cada arquivo enviado.
+    manifesto = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'total': len(itens),
+        'sucesso': sum(item['status'] == 'done' for item in itens),
+        'falhas': sum(item['status'] != 'done' for item in itens),
+        'itens': [{chave: valor for chave, valor in item.items() if chave != 'caminho_pdf'} for item in itens],
+    }
+    with zipfile.ZipFile(caminho_zip, "w", compression=zipfile.ZIP_DEFLATED) as pacote:
+        incluidos = set()
+        for item in itens:
+            if item['status'] == 'done' and item['nome_pdf'] not in incluidos and os.path.exists(item['caminho_pdf']):
+                pacote.write(item['caminho_pdf'], arcname=item['nome_pdf'])
+                incluidos.add(item['nome_pdf'])
+        pacote.writestr("manifest.json", json.dumps(manifesto, ensure_ascii=False, indent=2))
+    return manifesto
@@ -1,35 +1,47 @@
-from fastapi import FastAPI, HTTPException, Response, File, UploadFile, Form
+from fastapi import FastAPI, HTTPException, Request, Response, File, UploadFile, Form, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pathlib import Path
+from urllib.parse import quote
 from pydantic import BaseModel
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from dotenv import load_dotenv
-import pandas as pd
 import uuid
+from datetime import datetime
 from typing import Optional, List
-import shutil
 import os
+from registro_motores import RegistroMotores, linhas
+from armazenamento import criar_armazenamento
+import fila_relatorios
+import jobs_relatorios
+import ingestao
+import lotes_relatorios
+import catalogo_relatorios
+import telemetria_motores
+import comparativos
+import ingestao_continua
+import fila_emails
+import metricas
+import serializacao
+import asyncio
+import hashlib
+import json
+import shutil
+import logging
+import time
+from starlette.routing import Match
 
 # Configurações de ambiente
 load_dotenv()
+metricas.configurar_logs()
+logger = logging.getLogger(__name__)
 UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "uploads")
 REPORTS_FOLDER = os.getenv("REPORTS_FOLDER", "reports_generated")
 CSV_DATABASE = os.getenv("CSV_DATABASE", "clientes_motores.csv")
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "csv")  # 'csv' ou 'sqlite'
+SQLITE_DATABASE = os.getenv("SQLITE_DATABASE", "motores.db")
 
-# --- Configuração do Servidor de E-mail ---
-conf = ConnectionConfig(
-    
-    MAIL_USERNAME=os.getenv("MAIL_USERNAME", "default@email.com"),
-    MAIL_PASSWORD=os.getenv("MAIL_PASSWORD", "senha_padrao"),
-    MAIL_FROM=os.getenv("MAIL_FROM", "no-reply@default.com"),
-    MAIL_SERVER=os.getenv("MAIL_SERVER", "smtp.default.com"),
-    MAIL_PORT=int(os.getenv("MAIL_PORT", 587)),
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True
-)
+# --- Servidor de e-mail: MAIL_USERNAME, MAIL_PASSWORD, MAIL_FROM, MAIL_SERVER e MAIL_PORT (lidos em fila_emails) ---
 
 
 # --- Mapa de Tipos e Modelo de Dados ---
@@ -57,6 +69,9 @@ class Motor(BaseModel):
     id_esp32: Optional[str] = None
     observacoes: Optional[str] = None
 
+# --- Armazenamento e registro de motores (carregado uma vez e mantido em memória) ---
+registro = RegistroMotores(criar_armazenamento(STORAGE_BACKEND, CSV_DATABASE, SQLITE_DATABASE, DTYPE_MAP))
+
 # --- Inicialização do FastAPI e CORS ---
 app = FastAPI()
 
@@ -72,41 +87,178 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"]
+    expose_headers=["Content-Disposition", "ETag", "X-Total-Count", "X-Relatorios-Sucesso", "X-Relatorios-Falhas"]
 )
 
+def _rota(request):
+    # Modelo da rota (/api/motores/{id_motor}) e não o caminho, para não criar uma série por motor.
+    rota = request.scope.get('route')
+    if rota is None:
+        rota = next((r for r in request.app.router.routes if r.matches(request.scope)[0] == Match.FULL), None)
+    return getattr(rota, 'path', 'nao_mapeada')
+
+@app.middleware("http")
+async def medir_requisicoes(request: Request, call_next):
+    # Latência e status por rota (GET /metrics) e, se PERFIL_AMOSTRAGEM > 0, perfil das requisições lentas.
+    inicio, status = time.perf_counter(), 500
+    with metricas.perfilar(f"{request.method}_{request.url.path}"):
+        try:
+            resposta = await call_next(request)
+            status = resposta.status_code
+        finally:
+            metricas.registrar_requisicao(request.method, _rota(request), status, time.perf_counter() - inicio)
+    return resposta
+
+JOBS_INTERVALO_DESPACHO = float(os.getenv("JOBS_INTERVALO_DESPACHO", 2))
+
+async def despachar_jobs_periodicamente():
+    while True:
+        try:
+            await asyncio.to_thread(jobs_relatorios.despachar)
+        except Exception:
+            logger.exception("Falha ao despachar jobs de relatório")
+        await asyncio.sleep(JOBS_INTERVALO_DESPACHO)
+
+buffer_telemetria = ingestao_continua.BufferTelemetria()
+
+async def gravar_telemetria_periodicamente():
+    while True:
+        await asyncio.sleep(min(5, ingestao_continua.TELEMETRIA_INTERVALO_GRAVACAO))
+        try:
+            await asyncio.to_thread(ingestao_continua.gravar_prontos, buffer_telemetria)
+        except Exception:
+            logger.exception("Falha ao gravar a telemetria do buffer")
+
+async def aquecer_pool_de_relatorios():
+    # A API responde enquanto os workers sobem e importam pdf_generator (matplotlib, fpdf) em segundo plano.
+    try:
+        await asyncio.to_thread(fila_relatorios.aquecer)
+    except Exception:
+        logger.exception("Falha ao aquecer o pool de relatórios")
+
+async def aquecer_comparativos():
+    try:
+        await asyncio.to_thread(lambda: comparativos.aquecer(registro.registros()))
+    except FileNotFoundError:
+        pass
+    except Exception:
+        logger.exception("Falha ao carregar o cache dos comparativos")
+
+async def reconstruir_catalogo():
+    # Depois de uma atualização o catálogo começa vazio: os PDFs que já estavam na pasta são catalogados uma vez.
+    try:
+        if not os.path.isdir(REPORTS_FOLDER) or not await asyncio.to_thread(catalogo_relatorios.vazio): return
+        total, sem_motor = await asyncio.to_thread(lambda: catalogo_relatorios.reconstruir(REPORTS_FOLDER, registro.registros()))
+        if total: logger.info("Catálogo reconstruído: %d relatórios (%d sem motor no registro)", total, len(sem_motor))
+    except Exception:
+        logger.exception("Falha ao reconstruir o catálogo de relatórios")
+
+@app.on_event("startup")
+async def iniciar_despacho_de_jobs():
+    jobs_relatorios.recuperar_jobs_interrompidos()
+    app.state.despacho_jobs = asyncio.create_task(despachar_jobs_periodicamente())
+    if telemetria_motores.disponivel():
+        app.state.gravacao_telemetria = asyncio.create_task(gravar_telemetria_periodicamente())
+    app.state.envio_emails = asyncio.create_task(fila_emails.enviar_periodicamente())
+    if fila_relatorios.RELATORIO_AQUECER:
+        app.state.aquecimento = asyncio.create_task(aquecer_pool_de_relatorios())
+    if telemetria_motores.disponivel() and comparativos.COMPARATIVOS_AQUECER:
+        app.state.aquecimento_comparativos = asyncio.create_task(aquecer_comparativos())
+    app.state.reconstrucao_catalogo = asyncio.create_task(reconstruir_catalogo())
+
+@app.on_event("shutdown")
+def encerrar_processos():
+    if getattr(app.state, 'despacho_jobs', None): app.state.despacho_jobs.cancel()
+    if getattr(app.state, 'gravacao_telemetria', None): app.state.gravacao_telemetria.cancel()
+    if getattr(app.state, 'envio_emails', None): app.state.envio_emails.cancel()
+    if getattr(app.state, 'aquecimento', None): app.state.aquecimento.cancel()
+    if getattr(app.state, 'aquecimento_comparativos', None): app.state.aquecimento_comparativos.cancel()
+    if getattr(app.state, 'reconstrucao_catalogo', None): app.state.reconstrucao_catalogo.cancel()
+    if telemetria_motores.disponivel(): ingestao_continua.gravar_prontos(buffer_telemetria, forcar=True)
+    fila_relatorios.encerrar()
+
 # --- Endpoints da API ---
+@app.get("/metrics")
+def get_metricas():
+    return Response(content=metricas.exportar(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/")
 def ler_raiz():
     return {"mensagem": "Servidor do sistema de relatórios está online!"}
 
-@app.get("/api/clientes")
-def get_clientes():
+def _etag(conjunto, versao, campos, pagina, por_pagina, formato):
+    # A versão do registro (contador do SQLite ou mtime/tamanho do CSV) identifica o conteúdo da listagem;
+    # campos, página e formato identificam a representação, então cada combinação tem sua própria tag.
+    versao = "-".join(map(str, versao)) if isinstance(versao, tuple) else str(versao)
+    representacao = json.dumps([",".join(campos) if campos else None, pagina if por_pagina else 1, por_pagina, formato])
+    return f'"{conjunto}-{versao}-{hashlib.sha256(representacao.encode()).hexdigest()[:16]}"'
+
+def _listagem(request, conjunto, campos, pagina, por_pagina, formato):
+    # Listagem com projeção (campos=a,b), paginação (total em X-Total-Count), NDJSON em streaming
+    # (formato=ndjson ou Accept: application/x-ndjson) e ETag: se If-None-Match bate com a versão e a representação pedida, 304.
     try:
-        df = pd.read_csv(CSV_DATABASE, dtype=DTYPE_MAP)
-        df_clientes = df[['id_cliente', 'nome_cliente']].dropna().drop_duplicates(subset=['id_cliente'])
-        return df_clientes.to_dict('records')
+        versao, colunas = registro.tabela(conjunto)
     except FileNotFoundError:
-        return []
+        versao, colunas = None, {}
+    selecionados = None
+    if campos:
+        selecionados = list(dict.fromkeys(campo.strip() for campo in campos.split(",") if campo.strip()))
+        desconhecidos = [campo for campo in selecionados if colunas and campo not in colunas]
+        if not selecionados or desconhecidos:
+            raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(desconhecidos) or campos}. Disponíveis: {', '.join(colunas)}")
+    if formato is None: formato = "ndjson" if "application/x-ndjson" in request.headers.get("accept", "") else "json"
+    if formato not in ("json", "ndjson"): raise HTTPException(status_code=400, detail="formato deve ser 'json' ou 'ndjson'.")
+    total = len(next(iter(colunas.values()), []))
+    cabecalhos = {"X-Total-Count": str(total), "Cache-Control": "no-cache", "Vary": "Accept"}
+    if versao is not None:
+        cabecalhos["ETag"] = _etag(conjunto, versao, selecionados, pagina, por_pagina, formato)
+        if_none_match = request.headers.get("if-none-match", "")
+        if if_none_match.strip() == "*" or cabecalhos["ETag"] in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=cabecalhos)
+    if not colunas:
+        selecionadas = iter(())
+    else:
+        inicio = (pagina - 1) * por_pagina if por_pagina else 0
+        selecionadas = linhas(colunas, selecionados, inicio, por_pagina)
+    if formato == "ndjson":
+        return StreamingResponse(serializacao.ndjson(selecionadas), media_type="application/x-ndjson", headers=cabecalhos)
+    return Response(content=serializacao.codificar(list(selecionadas)), media_type="application/json", headers=cabecalhos)
+
+@app.get("/api/clientes")
+def get_clientes(
+    request: Request,
+    campos: Optional[str] = None,
+    pagina: int = Query(1, ge=1),
+    por_pagina: Optional[int] = Query(None, ge=1, le=10000),
+    formato: Optional[str] = None
+):
+    try:
+        return _listagem(request, 'clientes', campos, pagina, por_pagina, formato)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/registros")
-def get_todos_os_registros():
+def get_todos_os_registros(
+    request: Request,
+    campos: Optional[str] = None,
+    pagina: int = Query(1, ge=1),
+    por_pagina: Optional[int] = Query(None, ge=1, le=10000),
+    formato: Optional[str] = None
+):
+    # Sem parâmetros devolve todos os motores com todos os campos, como antes.
     try:
-        df = pd.read_csv(CSV_DATABASE, dtype=DTYPE_MAP)
-        return df.fillna("").to_dict('records')
-    except FileNotFoundError:
-        return []
+        return _listagem(request, 'registros', campos, pagina, por_pagina, formato)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/clientes/{id_cliente}/motores")
 def get_motores_por_cliente(id_cliente: int):
     try:
-        df = pd.read_csv(CSV_DATABASE, dtype=DTYPE_MAP)
-        df_motores = df[df['id_cliente'] == id_cliente][['id_motor', 'descricao_motor']]
-        return df_motores.to_dict('records')
+        return [{'id_motor': m['id_motor'], 'descricao_motor': m['descricao_motor']} for m in registro.motores_do_cliente(id_cliente)]
     except FileNotFoundError:
         return []
     except Exception as e:
@@ -117,13 +269,7 @@ def adicionar_motor(motor: Motor):
     try:
         novo_motor_dict = motor.dict()
         novo_motor_dict['id_motor'] = str(uuid.uuid4())[:8]
-        try:
-            df = pd.read_csv(CSV_DATABASE, dtype=DTYPE_MAP)
-        except FileNotFoundError:
-            df = pd.DataFrame(columns=list(DTYPE_MAP.keys()) + ['id_motor'])
-        novo_df = pd.DataFrame([novo_motor_dict])
-        df_atualizado = pd.concat([df, novo_df], ignore_index=True)
-        df_atualizado.to_csv(CSV_DATABASE, index=False)
+        registro.inserir(novo_motor_dict)
         return {"mensagem": "Registro adicionado com sucesso!", "dados": novo_motor_dict}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ocorreu um erro: {str(e)}")
@@ -131,17 +277,8 @@ def adicionar_motor(motor: Motor):
 @app.put("/api/motores/{id_motor}")
 def atualizar_motor(id_motor: str, motor_atualizado: Motor):
     try:
-        df = pd.read_csv(CSV_DATABASE, dtype=DTYPE_MAP)
-        df['id_motor'] = df['id_motor'].astype(str)
-        if id_motor not in df['id_motor'].values:
+        if not registro.atualizar(id_motor, motor_atualizado.dict()):
             raise HTTPException(status_code=404, detail="Motor não encontrado")
-        indice = df.index[df['id_motor'] == id_motor].tolist()[0]
-        for chave, valor in motor_atualizado.dict().items():
-            if (valor is None or valor == '') and pd.api.types.is_numeric_dtype(df[chave]):
-                df.loc[indice, chave] = pd.NA
-            else:
-                df.loc[indice, chave] = valor
-        df.to_csv(CSV_DATABASE, index=False)
         return {"mensagem": "Registro atualizado com sucesso!", "dados": motor_atualizado.dict()}
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Arquivo não encontrado")
@@ -151,11 +288,8 @@ def atualizar_motor(id_motor: str, motor_atualizado: Motor):
 @app.delete("/api/motores/{id_motor}")
 def remover_motor(id_motor: str):
     try:
-        df = pd.read_csv(CSV_DATABASE, dtype=DTYPE_MAP)
-        if id_motor not in df['id_motor'].values:
+        if not registro.remover(id_motor):
             raise HTTPException(status_code=404, detail="Motor não encontrado")
-        df_atualizado = df[df['id_motor'] != id_motor]
-        df_atualizado.to_csv(CSV_DATABASE, index=False)
         return Response(status_code=204)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Arquivo não encontrado")
@@ -163,25 +297,31 @@ def remover_motor(id_motor: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/relatorios-salvos")
-def get_relatorios_salvos():
-    relatorios = []
-    if not os.path.exists(REPORTS_FOLDER):
-        return []
-    for nome_arquivo in os.listdir(REPORTS_FOLDER):
-        if nome_arquivo.endswith(".pdf"):
-            try:
-                partes = nome_arquivo.replace("Relatorio_", "").replace(".pdf", "").split('_')
-                info = {
-                    "nome_arquivo": nome_arquivo,
-                    "cliente": partes[0].replace("_", " "),
-                    "motor": partes[1].replace("_", " "),
-                    "data": f"{partes[2]} de {partes[3]}",
-                    "tamanho_mb": f"{os.path.getsize(os.path.join(REPORTS_FOLDER, nome_arquivo)) / (1024*1024):.2f} MB"
-                }
-                relatorios.append(info)
-            except Exception:
-                relatorios.append({"nome_arquivo": nome_arquivo, "cliente": "Desconhecido"})
-    return sorted(relatorios, key=lambda x: x.get('data', ''), reverse=True)
+def get_relatorios_salvos(
+    response: Response,
+    id_cliente: Optional[int] = None,
+    id_motor: Optional[str] = None,
+    ano: Optional[int] = None,
+    mes: Optional[int] = None,
+    veredito: Optional[str] = None,
+    busca: Optional[str] = None,
+    pagina: int = Query(1, ge=1),
+    por_pagina: Optional[int] = Query(None, ge=1, le=1000)
+):
+    # Lê o catálogo (catalogo_relatorios) em vez de varrer a pasta. Sem 'por_pagina' devolve todos;
+    # o total filtrado vai no cabeçalho X-Total-Count.
+    deslocamento = (pagina - 1) * por_pagina if por_pagina else 0
+    total, linhas = catalogo_relatorios.listar(id_cliente, id_motor, ano, mes, veredito, busca, por_pagina, deslocamento)
+    response.headers["X-Total-Count"] = str(total)
+    return [{
+        "nome_arquivo": linha['nome_arquivo'],
+        "cliente": linha['nome_cliente'] or "Desconhecido",
+        "motor": linha['descricao_motor'] or "Desconhecido",
+        "data": linha['mes_referencia'] or "",
+        "tamanho_mb": f"{linha['tamanho_bytes'] / (1024*1024):.2f} MB",
+        "id_cliente": linha['id_cliente'], "id_motor": linha['id_motor'],
+        "criado_em": linha['criado_em'], "veredito": linha['veredito'],
+    } for linha in linhas]
 
 @app.get("/api/relatorios-salvos/{nome_arquivo}")
 def get_relatorio_especifico(nome_arquivo: str):
@@ -197,69 +337,294 @@ def excluir_relatorio_especifico(nome_arquivo: str):
         raise HTTPException(status_code=404, detail="Acesso negado ou arquivo não encontrado.")
     try:
         os.remove(caminho)
+        catalogo_relatorios.remover(nome_arquivo)
         return Response(status_code=204)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Não foi possível excluir: {e}")
 
+def resposta_pdf(conteudo, nome_arquivo):
+    # Responde com o PDF que o worker já tem em memória (gravado em disco ao mesmo tempo), sem reler o arquivo.
+    # Content-Disposition no mesmo formato do FileResponse (filename* para nomes com acentos).
+    nome_codificado = quote(nome_arquivo)
+    disposicao = f'attachment; filename="{nome_arquivo}"' if nome_codificado == nome_arquivo else f"attachment; filename*=utf-8''{nome_codificado}"
+    return Response(content=conteudo, media_type='application/pdf', headers={"Content-Disposition": disposicao})
+
 @app.post("/api/relatorios")
 async def gerar_relatorio_endpoint(
     id_motor: str = Form(...),
     arquivo_csv: UploadFile = File(...),
     tem_vazao: bool = Form(False),
-    tem_nivel: bool = Form(False)
+    tem_nivel: bool = Form(False),
+    assincrono: bool = Form(False)
 ):
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
     caminho_temp = os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4()}_{arquivo_csv.filename}")
+    arquivo_em_uso_por_job = False
     try:
-        with open(caminho_temp, "wb") as buffer:
-            shutil.copyfileobj(arquivo_csv.file, buffer)
-        df_brutos = pd.read_csv(caminho_temp, delimiter=';')
-        df_registros = pd.read_csv(CSV_DATABASE, dtype=DTYPE_MAP)
-        df_registros['id_motor'] = df_registros['id_motor'].astype(str)
-        dados_motor = df_registros[df_registros['id_motor'] == id_motor].to_dict('records')
-        if not dados_motor:
+        dados_motor = registro.motor(id_motor)
+        if dados_motor is None:
             raise HTTPException(status_code=404, detail=f"Motor ID {id_motor} não encontrado.")
+        tempos_api = {}
+        with metricas.cronometro(tempos_api, 'upload'):
+            _, sha256_csv = await ingestao.salvar_upload(arquivo_csv, caminho_temp)
         checkboxes = {'tem_vazao': tem_vazao, 'tem_nivel': tem_nivel}
-        caminho_pdf = pdf_generator.gerar_relatorio_final(df_brutos, dados_motor[0], checkboxes)
-        if os.path.exists(caminho_pdf):
-            return FileResponse(
-                path=caminho_pdf,
-                media_type='application/pdf',
-                filename=os.path.basename(caminho_pdf))
-        else:
+        if assincrono:
+            # Modo job: responde na hora e o frontend acompanha por GET /api/relatorios/jobs/{id_job}.
+            id_job = jobs_relatorios.criar_job(id_motor, caminho_temp, dados_motor, checkboxes)
+            arquivo_em_uso_por_job = True
+            await asyncio.to_thread(jobs_relatorios.despachar)
+            return JSONResponse(status_code=202, content={"id_job": id_job, "status": "queued", "url_status": f"/api/relatorios/jobs/{id_job}"})
+        inicio_fila = time.perf_counter()
+        resultado = await fila_relatorios.executar("pdf_generator.gerar_relatorio_de_arquivo", caminho_temp, dados_motor, checkboxes, sha256_csv, True)
+        tempos_api['espera_fila'] = round(max(0.0, time.perf_counter() - inicio_fila - sum(resultado['tempos'].values())), 4)
+        metricas.registrar_relatorio(resultado, 'upload', tempos_api)
+        if not resultado.get('pdf'):
             raise HTTPException(status_code=500, detail="O PDF não foi gerado.")
+        return resposta_pdf(resultado['pdf'], os.path.basename(resultado['caminho_pdf']))
+    except fila_relatorios.FilaCheiaError:
+        raise HTTPException(status_code=503, detail="Servidor ocupado gerando outros relatórios. Tente novamente em instantes.",
+                            headers={"Retry-After": str(fila_relatorios.RELATORIO_RETRY_AFTER)})
+    except ingestao.LimiteMemoriaExcedido as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Falha ao gerar relatório do motor %s", id_motor)
+        metricas.registrar_falha('upload')
         raise HTTPException(status_code=500, detail=f"Falha crítica: {str(e)}")
     finally:
-        if os.path.exists(caminho_temp):
+        if not arquivo_em_uso_por_job and os.path.exists(caminho_temp):
             os.remove(caminho_temp)
 
+@app.post("/api/telemetria", status_code=202)
+async def receber_telemetria(request: Request, id_esp32: Optional[str] = None):
+    # Lotes enviados pelos ESP32: JSON {"id_esp32": ..., "amostras": [{"Time": ..., "AVRMS": ...}, ...]} (ou uma
+    # lista desses objetos, para gateways), ou o CSV do ESP32 com ?id_esp32=... As amostras ficam no buffer
+    # e são gravadas em blocos; com o buffer cheio a resposta é 429 com Retry-After.
+    if not telemetria_motores.disponivel():
+        raise HTTPException(status_code=503, detail="Armazenamento de telemetria desativado (pyarrow não instalado).")
+    corpo = await request.body()
+    try:
+        if "csv" in request.headers.get("content-type", ""):
+            if not id_esp32: raise HTTPException(status_code=400, detail="Informe ?id_esp32= para envio em CSV.")
+            lotes = [(id_esp32, await asyncio.to_thread(ingestao_continua.amostras_de_csv, corpo))]
+        else:
+            dados = json.loads(corpo)
+            dados = dados if isinstance(dados, list) else [dados]
+            lotes = [(lote['id_esp32'], await asyncio.to_thread(ingestao_continua.amostras_de_json, lote['amostras'])) for lote in dados]
+    except HTTPException:
+        raise
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Lote de telemetria inválido: {e}")
+    aceitas, desconhecidos = {}, []
+    for esp32, df in lotes:
+        motor = registro.motor_por_esp32(esp32)
+        if motor is None:
+            desconhecidos.append(esp32)
+            continue
+        try:
+            buffer_telemetria.adicionar(motor['id_motor'], df)
+        except ingestao_continua.BufferCheio as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(ingestao_continua.TELEMETRIA_RETRY_AFTER)})
+        aceitas[esp32] = len(df)
+    if desconhecidos and not aceitas:
+        raise HTTPException(status_code=404, detail=f"ESP32 não cadastrado: {', '.join(desconhecidos)}")
+    return {"aceitas": aceitas, "desconhecidos": desconhecidos, "ocupacao_buffer": buffer_telemetria.ocupacao}
+
+@app.get("/api/motores/{id_motor}/telemetria")
+def get_telemetria_do_motor(id_motor: str):
+    if registro.motor(id_motor) is None:
+        raise HTTPException(status_code=404, detail=f"Motor ID {id_motor} não encontrado.")
+    return {"id_motor": id_motor, "armazenamento_ativo": telemetria_motores.disponivel(), "meses": telemetria_motores.meses(id_motor)}
+
+@app.post("/api/motores/{id_motor}/relatorio")
+async def gerar_relatorio_da_telemetria_armazenada(
+    id_motor: str,
+    inicio: Optional[str] = Form(None),
+    fim: Optional[str] = Form(None),
+    tem_vazao: bool = Form(False),
+    tem_nivel: bool = Form(False),
+    comparativo: bool = Form(False)
+):
+    # Gera o relatório com a telemetria já guardada do motor (de envios anteriores), sem novo upload.
+    dados_motor = registro.motor(id_motor)
+    if dados_motor is None:
+        raise HTTPException(status_code=404, detail=f"Motor ID {id_motor} não encontrado.")
+    if not telemetria_motores.disponivel():
+        raise HTTPException(status_code=501, detail="Armazenamento de telemetria desativado (pyarrow não instalado).")
+    try:
+        await asyncio.to_thread(ingestao_continua.gravar_prontos, buffer_telemetria, True, id_motor)  # inclui o que ainda está no buffer
+        checkboxes = {'tem_vazao': tem_vazao, 'tem_nivel': tem_nivel}
+        secao_comparativo = None
+        if comparativo:  # calculado aqui, onde ficam o cadastro e o cache dos comparativos
+            secao_comparativo = await asyncio.to_thread(comparativos.secao_relatorio, dados_motor,
+                                                        registro.motores_do_cliente(dados_motor['id_cliente']), inicio, fim)
+        inicio_fila = time.perf_counter()
+        resultado = await fila_relatorios.executar("pdf_generator.gerar_relatorio_de_telemetria", id_motor, dados_motor, checkboxes, inicio, fim, True, secao_comparativo)
+        metricas.registrar_relatorio(resultado, 'telemetria', {'espera_fila': round(max(0.0, time.perf_counter() - inicio_fila - sum(resultado['tempos'].values())), 4)})
+        return resposta_pdf(resultado['pdf'], os.path.basename(resultado['caminho_pdf']))
+    except fila_relatorios.FilaCheiaError:
+        raise HTTPException(status_code=503, detail="Servidor ocupado gerando outros relatórios. Tente novamente em instantes.",
+                            headers={"Retry-After": str(fila_relatorios.RELATORIO_RETRY_AFTER)})
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.exception("Falha ao gerar relatório da telemetria do motor %s", id_motor)
+        metricas.registrar_falha('telemetria')
+        raise HTTPException(status_code=500, detail=f"Falha crítica: {str(e)}")
+
+# --- Comparativos entre meses e entre motores (agregados diários da telemetria armazenada) ---
+def _motores_para_comparar(id_cliente, ids_motores):
+    # Motores pedidos (id_motor repetido), os do cliente ou, sem filtro, a frota inteira.
+    if not telemetria_motores.disponivel():
+        raise HTTPException(status_code=501, detail="Armazenamento de telemetria desativado (pyarrow não instalado).")
+    if ids_motores:
+        motores = [registro.motor(id_motor) for id_motor in ids_motores]
+        desconhecidos = [id_motor for id_motor, motor in zip(ids_motores, motores) if motor is None]
+        if desconhecidos: raise HTTPException(status_code=404, detail=f"Motores não encontrados: {', '.join(desconhecidos)}")
+        if id_cliente is not None: motores = [motor for motor in motores if motor['id_cliente'] == id_cliente]
+        return motores
+    if id_cliente is not None:
+        motores = registro.motores_do_cliente(id_cliente)
+        if not motores: raise HTTPException(status_code=404, detail=f"Nenhum motor cadastrado para o cliente {id_cliente}.")
+        return motores
+    return registro.registros()
+
+def _resposta_comparativo(motores, tabela, limite=None, **extras):
+    com_dados = set(tabela['id_motor'])
+    corpo = {**extras, 'motores': len(motores), 'sem_dados': [str(m['id_motor']) for m in motores if str(m['id_motor']) not in com_dados],
+             'linhas': comparativos.registros(tabela.head(limite) if limite else tabela)}
+    return Response(content=serializacao.codificar(corpo), media_type="application/json")
+
+@app.get("/api/comparativos/tendencias")
+def get_tendencias(
+    id_cliente: Optional[int] = None,
+    id_motor: Optional[List[str]] = Query(None),
+    inicio: Optional[str] = None,
+    fim: Optional[str] = None
+):
+    # Corrente média, carregamento, fator de potência, desequilíbrio, horas desligado e violações de tensão
+    # (PRODIST) de cada motor, mês a mês.
+    motores = _motores_para_comparar(id_cliente, id_motor)
+    try:
+        return _resposta_comparativo(motores, comparativos.tendencias(motores, inicio, fim))
+    except comparativos.ParametroInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Falha ao calcular as tendências")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/comparativos/ranking")
+def get_ranking(
+    criterio: str = "violacoes_prodist",
+    id_cliente: Optional[int] = None,
+    id_motor: Optional[List[str]] = Query(None),
+    inicio: Optional[str] = None,
+    fim: Optional[str] = None,
+    limite: Optional[int] = Query(None, ge=1)
+):
+    # Motores do pior para o melhor no critério (violacoes_prodist, tensao_critica, desequilibrio,
+    # carregamento, desligado, falta_fase ou sem_energia), no período inteiro.
+    motores = _motores_para_comparar(id_cliente, id_motor)
+    try:
+        return _resposta_comparativo(motores, comparativos.ranking(motores, criterio, inicio, fim), limite, criterio=criterio)
+    except comparativos.ParametroInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Falha ao calcular o ranking")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/relatorios/jobs/{id_job}")
+def get_job_relatorio(id_job: str):
+    job = jobs_relatorios.obter_job(id_job)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    return job
+
+@app.post("/api/relatorios/lote")
+async def gerar_relatorios_em_lote(
+    arquivos: List[UploadFile] = File(...),
+    id_cliente: Optional[int] = Form(None),
+    tem_vazao: bool = Form(False),
+    tem_nivel: bool = Form(False)
+):
+    # Recebe vários CSVs (ou zips de CSVs) nomeados pelo id_motor ou id_esp32 e devolve um zip com os
+    # PDFs e o manifest.json com o resultado de cada arquivo.
+    pasta_lote = os.path.join(UPLOAD_FOLDER, f"lote_{uuid.uuid4().hex}")
+    try:
+        salvos = await lotes_relatorios.salvar_arquivos_do_lote(arquivos, pasta_lote)
+        if not salvos:
+            raise HTTPException(status_code=400, detail="Nenhum arquivo CSV encontrado no envio.")
+        checkboxes = {'tem_vazao': tem_vazao, 'tem_nivel': tem_nivel}
+        itens = await asyncio.to_thread(lotes_relatorios.gerar_lote, salvos, registro, checkboxes, id_cliente)
+        caminho_zip = os.path.join(pasta_lote, "relatorios.zip")
+        manifesto = lotes_relatorios.empacotar_lote(itens, caminho_zip)
+        return FileResponse(path=caminho_zip, media_type='application/zip',
+                            filename=f"Relatorios_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                            headers={"X-Relatorios-Sucesso": str(manifesto['sucesso']), "X-Relatorios-Falhas": str(manifesto['falhas'])},
+                            background=BackgroundTask(shutil.rmtree, pasta_lote, ignore_errors=True))
+    except HTTPException:
+        shutil.rmtree(pasta_lote, ignore_errors=True)
+        raise
+    except Exception as e:
+        shutil.rmtree(pasta_lote, ignore_errors=True)
+        logger.exception("Falha no lote de relatórios")
+        raise HTTPException(status_code=500, detail=f"Falha no lote: {str(e)}")
+
+def _destinatario_do_relatorio(nome_arquivo):
+    # (nome_cliente, email) do responsável pelo motor do relatório, pelo catálogo; relatórios fora do
+    # catálogo caem no nome do cliente extraído do nome do arquivo.
+    entrada = catalogo_relatorios.obter(nome_arquivo)
+    motor_do_relatorio = registro.motor(entrada['id_motor']) if entrada and entrada['id_motor'] else None
+    if motor_do_relatorio:
+        nome_cliente, dados_cliente = motor_do_relatorio['nome_cliente'], [motor_do_relatorio]
+    else:
+        nome_cliente = nome_arquivo.replace("Relatorio_", "").split('_')[0].replace("_", " ")
+        dados_cliente = registro.por_nome_cliente(nome_cliente)
+    email = dados_cliente[0].get('email_responsavel') if dados_cliente else None
+    return nome_cliente, email or None
+
 @app.post("/api/relatorios-salvos/{nome_arquivo}/enviar-email")
-async def enviar_relatorio_por_email(nome_arquivo: str):
-    pasta_relatorios = Path(REPORTS_FOLDER)
-    caminho_arquivo = pasta_relatorios / nome_arquivo
-    if not caminho_arquivo.is_file():
+def enviar_relatorio_por_email(nome_arquivo: str):
+    # Só enfileira: o envio acontece em segundo plano (fila_emails), agrupado por destinatário.
+    caminho_arquivo = Path(REPORTS_FOLDER) / nome_arquivo
+    if not caminho_arquivo.is_file() or not caminho_arquivo.resolve().parent.samefile(Path(REPORTS_FOLDER).resolve()):
         raise HTTPException(status_code=404, detail="Arquivo de relatório não encontrado.")
     try:
-        nome_cliente = nome_arquivo.replace("Relatorio_", "").split('_')[0].replace("_", " ")
-        df = pd.read_csv(CSV_DATABASE, dtype=DTYPE_MAP)
-        dados_cliente = df[df['nome_cliente'] == nome_cliente].to_dict('records')
-        if not dados_cliente or not dados_cliente[0].get('email_responsavel'):
+        nome_cliente, email_destinatario = _destinatario_do_relatorio(nome_arquivo)
+        if not email_destinatario:
             raise HTTPException(status_code=404, detail=f"E-mail de contato não encontrado para o cliente {nome_cliente}.")
-        email_destinatario = dados_cliente[0]['email_responsavel']
-        message = MessageSchema(
-            subject=f"Relatório Técnico: {nome_cliente}",
-            recipients=[email_destinatario],
-            body="Olá,\n\nSegue em anexo o relatório técnico de acompanhamento mensal solicitado.\n\nAtenciosamente,\nSistema de Relatórios.",
-            attachments=[str(caminho_arquivo)],
-            subtype="plain"
-        )
-        fm = FastMail(conf)
-        await fm.send_message(message)
-        return {"message": f"Relatório enviado com sucesso para {email_destinatario}"}
+        id_email = fila_emails.enfileirar(email_destinatario, str(caminho_arquivo), f"Relatório Técnico: {nome_cliente}")
+        return JSONResponse(status_code=202, content={"message": f"Relatório na fila de envio para {email_destinatario}", "id_email": id_email})
+    except HTTPException:
+        raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Falha ao enfileirar o e-mail do relatório %s", nome_arquivo)
         raise HTTPException(status_code=500, detail=f"Falha ao enviar e-mail: {str(e)}")
+
+@app.post("/api/relatorios-salvos/enviar-mes")
+def enviar_relatorios_do_mes(ano: int = Form(...), mes: int = Form(..., ge=1, le=12), id_cliente: Optional[int] = Form(None)):
+    # Enfileira todos os relatórios catalogados do mês de referência (opcionalmente de um cliente).
+    _, relatorios = catalogo_relatorios.listar(id_cliente=id_cliente, ano=ano, mes=mes)
+    enfileirados, sem_email = [], []
+    for relatorio in relatorios:
+        caminho_arquivo = Path(REPORTS_FOLDER) / relatorio['nome_arquivo']
+        nome_cliente, email_destinatario = _destinatario_do_relatorio(relatorio['nome_arquivo'])
+        if not email_destinatario or not caminho_arquivo.is_file():
+            sem_email.append(relatorio['nome_arquivo'])
+            continue
+        fila_emails.enfileirar(email_destinatario, str(caminho_arquivo), f"Relatório Técnico: {nome_cliente}")
+        enfileirados.append(relatorio['nome_arquivo'])
+    return JSONResponse(status_code=202, content={"message": f"{len(enfileirados)} relatório(s) na fila de envio.",
+                                                  "enfileirados": enfileirados, "ignorados": sem_email})
+
+@app.get("/api/emails")
+def get_situacao_emails():
+    return fila_emails.resumo()
+
+@app.get("/api/emails/{id_email}")
+def get_email(id_email: str):
+    email = fila_emails.obter(id_email)
+    if email is None:
+        raise HTTPException(status_code=404, detail="E-mail não encontrado.")
+    return email
@@ -0,0 +1,198 @@
+# Arquivo: backend/metricas.py (Métricas no formato do Prometheus e perfil de execuções lentas)
+# Contadores e histogramas em memória, exportados em texto em GET /metrics. Os relatórios rodam nos
+# processos do fila_relatorios, então as etapas medidas lá (resultado['tempos']) são registradas aqui,
+# no processo da API, quando o resultado volta. Cada processo da API tem as suas métricas.
+
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# --- Configuração do perfil ---
+PERFIL_AMOSTRAGEM = float(os.getenv("PERFIL_AMOSTRAGEM", 0))  # fração das execuções perfiladas (0 = desligado)
+PERFIL_LIMIAR = float(os.getenv("PERFIL_LIMIAR", 2.0))  # segundos; perfis de execuções mais rápidas são descartados
+PERFIL_INTERVALO = float(os.getenv("PERFIL_INTERVALO", 0.005))  # segundos entre amostras de pilha
+PERFIL_DIR = os.getenv("PERFIL_DIR", "perfis")
+
+BALDES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BALDES_BYTES = tuple(2 ** n * 1024 for n in range(6, 15))  # 64 KB a 16 MB
+_REGISTRO = []
+
+def configurar_logs():
+    # Mesmo formato no processo da API e nos workers de relatório.
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s")
+
+@contextmanager
+def cronometro(tempos, etapa):
+    # Acumula em tempos[etapa] a duração (s) do bloco; usado no acompanhamento dos jobs e nas métricas.
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tempos[etapa] = round(tempos.get(etapa, 0.0) + time.perf_counter() - inicio, 4)
+
+def _rotulos(nomes, valores):
+    if not nomes: return ""
+    escapados = (str(valores[nome]).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for nome in nomes)
+    return "{" + ",".join(f'{nome}="{valor}"' for nome, valor in zip(nomes, escapados)) + "}"
+
+class Contador:
+    tipo = "counter"
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, tuple(rotulos)
+        self._lock = threading.Lock()
+        self._valores = {}
+        _REGISTRO.append(self)
+
+    def incrementar(self, valor=1, **rotulos):
+        chave = tuple(str(rotulos.get(nome, "")) for nome in self.rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def _linhas(self):
+        with self._lock:
+            valores = dict(self._valores)
+        for chave, valor in sorted(valores.items()):
+            yield f"{self.nome}{_rotulos(self.rotulos, dict(zip(self.rotulos, chave)))} {valor}"
+
+class Histograma:
+    tipo = "histogram"
+
+    def __init__(self, nome, ajuda, rotulos=(), baldes=BALDES_SEGUNDOS):
+        self.nome, self.ajuda, self.rotulos, self.baldes = nome, ajuda, tuple(rotulos), tuple(baldes)
+        self._lock = threading.Lock()
+        self._series = {}  # chave dos rótulos -> [contagem por balde..., soma, total]
+        _REGISTRO.append(self)
+
+    def observar(self, valor, **rotulos):
+        chave = tuple(str(rotulos.get(nome, "")) for nome in self.rotulos)
+        with self._lock:
+            serie = self._series.setdefault(chave, [0] * len(self.baldes) + [0.0, 0])
+            for i, limite in enumerate(self.baldes):
+                if valor <= limite: serie[i] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def _linhas(self):
+        with self._lock:
+            series = {chave: list(serie) for chave, serie in self._series.items()}
+        for chave, serie in sorted(series.items()):
+            rotulos = dict(zip(self.rotulos, chave))
+            for limite, contagem in zip(self.baldes, serie):
+                yield f"{self.nome}_bucket{_rotulos(self.rotulos + ('le',), {**rotulos, 'le': f'{limite:g}'})} {contagem}"
+            yield f"{self.nome}_bucket{_rotulos(self.rotulos + ('le',), {**rotulos, 'le': '+Inf'})} {serie[-1]}"
+            yield f"{self.nome}_sum{_rotulos(self.rotulos, rotulos)} {serie[-2]:.6g}"
+            yield f"{self.nome}_count{_rotulos(self.rotulos, rotulos)} {serie[-1]}"
+
+def exportar():
+    # Texto no formato de exposição do Prometheus (text/plain; version=0.0.4).
+    linhas = []
+    for metrica in _REGISTRO:
+        linhas += [f"# HELP {metrica.nome} {metrica.ajuda}", f"# TYPE {metrica.nome} {metrica.tipo}"]
+        linhas += list(metrica._linhas())
+    return "\n".join(linhas) + "\n"
+
+# --- Métricas da API ---
+REQUISICOES = Contador("http_requisicoes_total", "Requisições atendidas por rota e status.", ("metodo", "rota", "status"))
+LATENCIA = Histograma("http_requisicao_segundos", "Latência das requisições por rota.", ("metodo", "rota"))
+RELATORIOS = Contador("relatorios_total", "Relatórios gerados por origem e uso do cache.", ("origem", "cache"))
+FALHAS_RELATORIO = Contador("relatorios_falhas_total", "Relatórios que falharam por origem.", ("origem",))
+ETAPAS_RELATORIO = Histograma("relatorio_etapa_segundos", "Duração de cada etapa da geração de relatórios.", ("etapa",))
+LINHAS = Contador("relatorio_linhas_processadas_total", "Linhas de telemetria lidas para gerar relatórios.")
+GRAFICOS = Contador("relatorio_graficos_total", "Gráficos desenhados nos relatórios.")
+TAMANHO_PDF = Histograma("relatorio_pdf_bytes", "Tamanho dos PDFs gerados.", baldes=BALDES_BYTES)
+
+def registrar_relatorio(resultado, origem, tempos_api=None):
+    # Registra um relatório concluído (dict de pdf_generator.gerar_relatorio_de_*) e escreve uma linha de
+    # log com as etapas. tempos_api são as etapas medidas no processo da API (upload, espera na fila).
+    tempos = {**(tempos_api or {}), **resultado.get('tempos', {})}
+    RELATORIOS.incrementar(origem=origem, cache=str(bool(resultado.get('cache'))).lower())
+    for etapa, segundos in tempos.items():
+        ETAPAS_RELATORIO.observar(segundos, etapa=etapa)
+    LINHAS.incrementar(resultado.get('linhas', 0))
+    GRAFICOS.incrementar(resultado.get('graficos', 0))
+    if resultado.get('tamanho_pdf'): TAMANHO_PDF.observar(resultado['tamanho_pdf'])
+    logger.info("relatorio %s", json.dumps({'origem': origem, 'arquivo': os.path.basename(resultado.get('caminho_pdf', '')),
+                                            'cache': bool(resultado.get('cache')), 'linhas': resultado.get('linhas', 0),
+                                            'graficos': resultado.get('graficos', 0), 'tamanho_pdf': resultado.get('tamanho_pdf'),
+                                            'etapas': tempos}, ensure_ascii=False))
+
+def registrar_falha(origem):
+    FALHAS_RELATORIO.incrementar(origem=origem)
+
+def registrar_requisicao(metodo, rota, status, segundos):
+    REQUISICOES.incrementar(metodo=metodo, rota=rota, status=status)
+    LATENCIA.observar(segundos, metodo=metodo, rota=rota)
+
+# --- Perfil de execuções lentas ---
+# Uma fração (PERFIL_AMOSTRAGEM) das execuções é perfilada e o perfil só é gravado em PERFIL_DIR se a
+# execução passar de PERFIL_LIMIAR segundos. No processo da API, com várias threads e o loop de eventos,
+# uma thread amostra as pilhas de todas as threads e grava no formato "collapsed" (speedscope,
+# flamegraph.pl). Nos workers de relatório, que têm uma thread só, usa-se o cProfile (.prof, para pstats
+# ou snakeviz), sem criar a thread que desligaria o pool de gráficos.
+_perfil_lock = threading.Lock()  # um perfil por vez em cada processo
+
+class AmostradorPilhas(threading.Thread):
+    def __init__(self, intervalo=PERFIL_INTERVALO):
+        super().__init__(daemon=True, name="amostrador-pilhas")
+        self.intervalo, self.pilhas, self._parar = intervalo, Counter(), threading.Event()
+
+    def run(self):
+        proprio = threading.get_ident()
+        while not self._parar.wait(self.intervalo):
+            for id_thread, quadro in sys._current_frames().items():
+                if id_thread == proprio: continue
+                funcoes = []
+                while quadro is not None:
+                    funcoes.append(f"{os.path.basename(quadro.f_code.co_filename)}:{quadro.f_code.co_name}")
+                    quadro = quadro.f_back
+                self.pilhas[";".join(reversed(funcoes))] += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+def _arquivo_perfil(nome, duracao, extensao):
+    os.makedirs(PERFIL_DIR, exist_ok=True)
+    nome_seguro = re.sub(r"[^\w.-]+", "_", nome).strip("_")[:80]
+    return os.path.join(PERFIL_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{nome_seguro}_{duracao:.1f}s.{extensao}")
+
+@contextmanager
+def perfilar(nome, amostragem=True):
+    if PERFIL_AMOSTRAGEM <= 0 or random.random() >= PERFIL_AMOSTRAGEM or not _perfil_lock.acquire(blocking=False):
+        yield
+        return
+    inicio = time.perf_counter()
+    perfil = AmostradorPilhas() if amostragem else cProfile.Profile()
+    if amostragem: perfil.start()
+    else: perfil.enable()
+    try:
+        yield
+    finally:
+        if amostragem: perfil.parar()
+        else: perfil.disable()
+        _perfil_lock.release()
+        duracao = time.perf_counter() - inicio
+        if duracao >= PERFIL_LIMIAR:
+            try:
+                if amostragem:
+                    caminho = _arquivo_perfil(nome, duracao, "txt")
+                    with open(caminho, "w", encoding="utf-8") as f:
+                        f.writelines(f"{pilha} {contagem}\n" for pilha, contagem in perfil.pilhas.most_common())
+                else:
+                    caminho = _arquivo_perfil(nome, duracao, "prof")
+                    perfil.dump_stats(caminho)
+                logger.info("perfil de %s (%.2f s) gravado em %s", nome, duracao, caminho)
+            except OSError as e:
+                logger.warning("perfil de %s não foi gravado: %s", nome, e)
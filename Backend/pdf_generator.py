@@ -1,13 +1,24 @@
 # Arquivo: backend/pdf_generator.py (VERSÃO COMPLETA E FINAL)
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from fpdf import FPDF
 from datetime import datetime
 from pandas.tseries.offsets import DateOffset # Usando a biblioteca padrão do pandas
-import io, os, sys, matplotlib.dates as mdates
+import io, logging, os, sys, time, uuid
+from functools import lru_cache
+from PIL import Image
 from analises import analisar_dados_prodist, MAPEAMENTO_COLUNAS
+from ingestao import ler_blocos_telemetria, ler_telemetria, sha256_arquivo
+from graficos import acumular_series, preparar_grafico, desenhar_graficos, criar_grafico_em_memoria
+import cache_relatorios
+import catalogo_relatorios
+from catalogo_relatorios import nome_arquivo_relatorio
+import telemetria_motores
+import agregados
+import metricas
+from metricas import cronometro
+
+logger = logging.getLogger(__name__)
 
 def resource_path(relative_path):
     try:
@@ -16,6 +27,29 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+# --- Recursos fixos do modelo ---
+# Carregados uma vez por processo: os logos são reduzidos à resolução em que aparecem na capa (o
+# Logo.png original tem 2425 px para 25 mm) e achatados sobre o fundo branco da página, sem canal alfa.
+LOGOS_DPI = int(os.getenv("LOGOS_DPI", 300))
+
+@lru_cache(maxsize=None)
+def logo(nome_arquivo, altura_mm):
+    caminho = resource_path(nome_arquivo)
+    if not os.path.exists(caminho): return None
+    with Image.open(caminho) as original:
+        imagem = original.convert('RGBA')
+    altura_px = max(1, round(altura_mm / 25.4 * LOGOS_DPI))
+    if imagem.height > altura_px:
+        imagem = imagem.resize((max(1, round(imagem.width * altura_px / imagem.height)), altura_px), Image.LANCZOS)
+    fundo = Image.new('RGB', imagem.size, 'white')
+    fundo.paste(imagem, mask=imagem.getchannel('A'))
+    return fundo
+
+TEXTO_INTRODUCAO = ("O presente relatório tem como objetivo apresentar uma análise técnica das principais grandezas elétricas envolvidas no funcionamento do sistema de automação de bombeamento. As informações aqui disponibilizadas foram coletadas por meio de sensores instalados no sistema, com registros realizados em intervalos regulares.\n\nO foco principal deste relatório é fornecer um diagnóstico objetivo sobre o comportamento do sistema, com ênfase na identificação de falhas operacionais, paradas inesperadas e variações anormais de desempenho, contribuindo para o aumento da confiabilidade do sistema.")
+TEXTO_AGRADECIMENTO = ("A JW Automação agradece a confiança em nossos serviços e no sistema Levantec. "
+                       "Estamos comprometidos com a eficiência e produtividade da sua operação.\n\n"
+                       "Para mais informações ou suporte técnico, não hesite em nos contatar.")
+
 class PDF(FPDF):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -41,133 +75,297 @@ def add_label_val(pdf, label, val):
     pdf.write(8, str(val))
     pdf.ln(8)
 
-def criar_grafico_em_memoria(data, y_cols_keys, title, ylabel, tensao_nominal=None):
-    sns.set_theme(style="darkgrid")
-    fig, ax = plt.subplots(figsize=(8.2, 4.5))
-    if isinstance(y_cols_keys, str): y_cols_keys = [y_cols_keys]
-    y_cols_reais = [MAPEAMENTO_COLUNAS.get(key) for key in y_cols_keys if MAPEAMENTO_COLUNAS.get(key) in data.columns]
-    if not y_cols_reais or data[y_cols_reais].empty:
-        plt.close(fig); return None
-    data_to_plot = data.dropna(subset=y_cols_reais)
-    if data_to_plot.empty:
-        plt.close(fig); return None
-    if len(data_to_plot) > 5000: data_to_plot = data_to_plot.resample('1H').mean().dropna()
-    for col_real in y_cols_reais:
-        sns.lineplot(data=data_to_plot, x=data_to_plot.index, y=col_real, label=col_real, ax=ax)
-    ax.set_title(title, fontsize=14); ax.set_ylabel(ylabel); ax.set_xlabel("")
-    ax.legend(loc='upper left')
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m'))
-    if tensao_nominal: ax.axhline(y=tensao_nominal, color='lime', linestyle='--', linewidth=1.2, label=f'Tensão Ideal ({tensao_nominal:.0f}V)')
-    ax.legend(loc='upper left')
-    plt.tight_layout()
-    buf = io.BytesIO(); fig.savefig(buf, format='png', dpi=150); plt.close(fig); buf.seek(0)
-    return buf
-
-def gerar_relatorio_final(df_dados_brutos, dados_motor, checkboxes={}):
-    try:
-        corrente_nominal = float(dados_motor.get('corrente_nominal', 0))
-        tensao_nominal = float(dados_motor.get('tensao_nominal_v', 380.0))
-        
+def renderizar_graficos(df_dados_brutos, checkboxes, tensao_nominal):
+    specs = {
+        'tensao': preparar_grafico(df_dados_brutos, ['tensao_a', 'tensao_b', 'tensao_c'], "Tensões RMS por Fase", "Tensão (V)", tensao_nominal=tensao_nominal),
+        'corrente': preparar_grafico(df_dados_brutos, ['corrente_a', 'corrente_b', 'corrente_c'], "Correntes RMS por Fase", "Corrente (A)"),
+        'fp': preparar_grafico(df_dados_brutos, ['fp_a', 'fp_b', 'fp_c'], "Fator de Potência por Fase", "FP"),
+    }
+    if checkboxes.get('tem_vazao'): specs['velocidade'] = preparar_grafico(df_dados_brutos, 'velocidade', 'Velocidade do Fluido', 'm/s')
+    if checkboxes.get('tem_nivel'): specs['nivel'] = preparar_grafico(df_dados_brutos, 'nivel', 'Nível do Reservatório', 'Nível (%)')
+    return desenhar_graficos(specs)
+
+def _nominais(dados_motor):
+    return float(dados_motor.get('corrente_nominal', 0)), float(dados_motor.get('tensao_nominal_v', 380.0))
+
+def _mes_referencia(data_final):
+    if data_final is None: return f"Dados de {datetime.now().strftime('%B de %Y')}"
+    data_referencia = data_final - DateOffset(months=1)
+    meses_pt = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+    return f"{meses_pt[data_referencia.month - 1]} de {data_referencia.year}"
+
+def analisar_telemetria(df_dados_brutos, dados_motor, checkboxes={}, tempos=None, comentarios=None):
+    # Parte do relatório que depende só da telemetria e das grandezas nominais (e por isso vai para o
+    # cache_relatorios): comentários das análises, mês de referência e os PNGs dos gráficos.
+    # 'comentarios' já calculados (ex.: pelos agregados diários) dispensam a etapa de análise.
+    tempos = {} if tempos is None else tempos
+    corrente_nominal, tensao_nominal = _nominais(dados_motor)
+
+    with cronometro(tempos, 'leitura'):
         coluna_tempo = MAPEAMENTO_COLUNAS.get('timestamp')
         if coluna_tempo in df_dados_brutos.columns:
             df_dados_brutos[coluna_tempo] = pd.to_datetime(df_dados_brutos[coluna_tempo], dayfirst=True, errors='coerce')
             df_dados_brutos.dropna(subset=[coluna_tempo], inplace=True)
             df_dados_brutos = df_dados_brutos.set_index(coluna_tempo).sort_index()
-        
-        comentarios = analisar_dados_prodist(df_dados_brutos, corrente_nominal, tensao_nominal)
-
-        if isinstance(df_dados_brutos.index, pd.DatetimeIndex) and not df_dados_brutos.empty:
-            data_final_real = df_dados_brutos.index.max()
-            data_referencia = data_final_real - DateOffset(months=1)
-            meses_pt = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
-            mes_referencia = f"{meses_pt[data_referencia.month - 1]} de {data_referencia.year}"
-        else:
-            mes_referencia = f"Dados de {datetime.now().strftime('%B de %Y')}"
-        
-        nome_cliente_safe = dados_motor.get('nome_cliente', 'Cliente').replace(' ', '_')
-        descricao_motor_safe = dados_motor.get('descricao_motor', 'Motor').replace('/', '-').replace(' ', '_')
-        mes_ref_safe = mes_referencia.replace(' de ', '_')
-        nome_arquivo = f"Relatorio_{nome_cliente_safe}_{descricao_motor_safe}_{mes_ref_safe}.pdf"
-        caminho_saida_pdf = os.path.join("reports_generated", nome_arquivo)
-        os.makedirs("reports_generated", exist_ok=True)
-
-        pdf = PDF(orientation='P', unit='mm', format='A4')
-        
-        # CAPA
-        pdf.add_page(); pdf.draw_header_footer = False
-        logo_jw_path = resource_path('Logo2.png'); logo_levantec_path = resource_path('Logo.png')
-        if os.path.exists(logo_levantec_path): pdf.image(logo_levantec_path, x=155, y=20, h=25)
-        if os.path.exists(logo_jw_path): pdf.image(logo_jw_path, x=145, y=50, h=12)
-        pdf.set_xy(20, 25); pdf.set_font('Arial', 'B', 14); pdf.cell(100, 10, 'JW Automação', 0, 1, 'L')
-        pdf.set_font('Arial', '', 12); pdf.set_x(20); pdf.cell(100, 10, 'Sistema Levantec', 0, 1, 'L')
-        pdf.set_y(100); pdf.set_x(20); pdf.set_font('Arial', 'B', 36); pdf.cell(0, 15, 'Relatório Técnico', 0, 1, 'L')
-        pdf.set_font('Arial', 'B', 30); pdf.set_x(20); pdf.cell(0, 15, 'Mensal', 0, 1, 'L')
-        pdf.set_font('Arial', '', 12); pdf.set_x(20); pdf.cell(0, 10, f'Mês de referência: {mes_referencia}', 0, 1, 'L')
-        pdf.set_y(220); pdf.set_x(20)
-        add_label_val(pdf, 'Cliente:', dados_motor.get('nome_cliente', 'Não informado'))
-        pdf.set_x(20); add_label_val(pdf, 'Instalação:', dados_motor.get('local_instalacao', 'Não informado'))
-        pdf.set_x(20); add_label_val(pdf, 'Equipamento:', dados_motor.get('descricao_motor', 'Não informado'))
-        pdf.set_y(244); pdf.set_font('Arial', '', 11); pdf.cell(0, 8, 'Alegrete - RS', 0, 1, 'R')
-        pdf.set_y(252); pdf.cell(0, 8, f"Gerado em: {datetime.now().strftime('%d/%m/%Y')}", 0, 1, 'R')
-
-        # SEÇÕES DO RELATÓRIO
-        secao_num = 0
-        def nova_secao(titulo):
-            nonlocal secao_num
-            secao_num += 1
-            pdf.add_page(); pdf.set_font('Arial', 'B', 16); pdf.cell(0, 10, f"{secao_num}. {titulo}", 0, 1, 'L'); pdf.ln(5)
-
-        nova_secao("Introdução")
-        texto_intro = ("O presente relatório tem como objetivo apresentar uma análise técnica das principais grandezas elétricas envolvidas no funcionamento do sistema de automação de bombeamento. As informações aqui disponibilizadas foram coletadas por meio de sensores instalados no sistema, com registros realizados em intervalos regulares.\n\nO foco principal deste relatório é fornecer um diagnóstico objetivo sobre o comportamento do sistema, com ênfase na identificação de falhas operacionais, paradas inesperadas e variações anormais de desempenho, contribuindo para o aumento da confiabilidade do sistema.")
-        pdf.set_font('Arial', '', 12); pdf.multi_cell(0, 7, texto_intro, align='J')
-
-        nova_secao("Análise das Tensões (PRODIST)")
-        grafico = criar_grafico_em_memoria(df_dados_brutos, ['tensao_a', 'tensao_b', 'tensao_c'], "Tensões RMS por Fase", "Tensão (V)", tensao_nominal=tensao_nominal)
-        if grafico: pdf.image(grafico, w=190); pdf.ln(5)
-        pdf.set_font('Arial', '', 12); pdf.multi_cell(0, 7, comentarios.get('tensao', ''), align='J')
-
-        nova_secao("Análise das Correntes")
-        grafico = criar_grafico_em_memoria(df_dados_brutos, ['corrente_a', 'corrente_b', 'corrente_c'], "Correntes RMS por Fase", "Corrente (A)")
-        if grafico: pdf.image(grafico, w=190); pdf.ln(5)
-        pdf.set_font('Arial', '', 12); pdf.multi_cell(0, 7, comentarios.get('corrente', ''), align='J')
-
-        nova_secao("Análise do Fator de Potência")
-        grafico = criar_grafico_em_memoria(df_dados_brutos, ['fp_a', 'fp_b', 'fp_c'], "Fator de Potência por Fase", "FP")
-        if grafico: pdf.image(grafico, w=190); pdf.ln(3)
-        pdf.set_font('Arial', '', 12); pdf.multi_cell(0, 7, comentarios.get('fp', ''), align='J')
-        
-        if checkboxes.get('tem_vazao') or checkboxes.get('tem_nivel'):
-            nova_secao("Análise de Acessórios")
-            if checkboxes.get('tem_vazao'):
-                pdf.set_font('Arial', '', 12); pdf.multi_cell(0, 7, comentarios.get('acessorios', ''), align='J'); pdf.ln(3)
-                grafico = criar_grafico_em_memoria(df_dados_brutos, 'velocidade', 'Velocidade do Fluido', 'm/s')
-                if grafico: pdf.image(grafico, w=190); pdf.ln(3)
-            if checkboxes.get('tem_nivel'):
-                grafico = criar_grafico_em_memoria(df_dados_brutos, 'nivel', 'Nível do Reservatório', 'Nível (%)')
-                if grafico:
-                    if checkboxes.get('tem_vazao') and pdf.get_y() > 150: pdf.add_page()
-                    pdf.image(grafico, w=190); pdf.ln(3)
-
-        nova_secao("Dados de Operação")
-        pdf.set_font('Arial', '', 12); pdf.multi_cell(0, 7, comentarios.get('dados_operacao', ''), align='J')
-        
-        nova_secao("Conclusões Finais")
-        pdf.set_font('Arial', 'B', 12); pdf.multi_cell(0, 7, comentarios.get('conclusao_final', ''), align='J')
-
-        # Página de Agradecimento
-        pdf.add_page(); pdf.draw_header_footer = False 
-        pdf.set_y(120); pdf.set_font('Arial', 'B', 16); pdf.multi_cell(w=0, h=10, text='Agradecimento', align='C'); pdf.ln(10)
-        texto_agradecimento = ("A JW Automação agradece a confiança em nossos serviços e no sistema Levantec. "
-                               "Estamos comprometidos com a eficiência e produtividade da sua operação.\n\n"
-                               "Para mais informações ou suporte técnico, não hesite em nos contatar.")
-        pdf.set_font('Arial', '', 12); pdf.multi_cell(w=0, h=8, text=texto_agradecimento, align='C'); pdf.ln(5)
-        pdf.set_font('Arial', 'I', 10); pdf.multi_cell(w=0, h=7, text="Contato: (55) 99710-4386 | gestao@jwautomacao.com.br", align='C')
-        
-        pdf.output(caminho_saida_pdf)
-        return caminho_saida_pdf
-        
+
+    if comentarios is None:
+        with cronometro(tempos, 'analise'):
+            comentarios = analisar_dados_prodist(df_dados_brutos, corrente_nominal, tensao_nominal)
+
+    with cronometro(tempos, 'graficos'):
+        graficos = renderizar_graficos(df_dados_brutos, checkboxes, tensao_nominal)
+
+    tem_datas = isinstance(df_dados_brutos.index, pd.DatetimeIndex) and not df_dados_brutos.empty
+    return {'comentarios': comentarios, 'mes_referencia': _mes_referencia(df_dados_brutos.index.max() if tem_datas else None),
+            'graficos': {nome: grafico.getvalue() if grafico else None for nome, grafico in graficos.items()}}
+
+def ler_em_blocos(caminho_csv, dados_motor, tempos, analisar=True, id_motor_guardar=None):
+    # Uma passada pelo CSV, um bloco de LINHAS_POR_BLOCO linhas por vez: cada bloco vira um parcial
+    # (agregados.calcular_parcial) combinado aos anteriores, entra já reduzido nas séries dos gráficos e, com
+    # id_motor_guardar, é gravado na telemetria do motor. Nenhum momento tem o arquivo inteiro em memória.
+    # Os parciais só combinam em ordem de tempo: 'ordenado' fica False se o arquivo vier fora de ordem.
+    corrente_nominal, tensao_nominal = _nominais(dados_motor)
+    resumo = {'parcial': None, 'series': {}, 'data_final': None, 'linhas': 0, 'ordenado': True, 'guardado': True}
+    blocos = ler_blocos_telemetria(caminho_csv)
+    while True:
+        with cronometro(tempos, 'leitura'):
+            bloco = next(blocos, None)
+        if bloco is None: break
+        resumo['linhas'] += len(bloco)
+        if id_motor_guardar: resumo['guardado'] &= guardar_telemetria(id_motor_guardar, bloco, tempos)
+        if not analisar or bloco.empty: continue
+        if not isinstance(bloco.index, pd.DatetimeIndex) or not bloco.index.is_monotonic_increasing or \
+                (resumo['data_final'] is not None and bloco.index[0] < resumo['data_final']):
+            resumo['ordenado'] = False
+        if not resumo['ordenado']: continue
+        with cronometro(tempos, 'analise'):
+            resumo['parcial'] = agregados.combinar(resumo['parcial'], agregados.calcular_parcial(bloco, corrente_nominal, tensao_nominal))
+        with cronometro(tempos, 'graficos'):
+            acumular_series(resumo['series'], bloco)
+        resumo['data_final'] = bloco.index[-1]
+    return resumo
+
+def analisar_blocos(resumo, dados_motor, checkboxes={}, tempos=None):
+    # Mesmo resultado de analisar_telemetria, a partir do que ler_em_blocos acumulou.
+    tempos = {} if tempos is None else tempos
+    corrente_nominal, tensao_nominal = _nominais(dados_motor)
+    with cronometro(tempos, 'analise'):
+        comentarios = agregados.analisar_parciais([resumo['parcial']], corrente_nominal, tensao_nominal)
+    with cronometro(tempos, 'graficos'):
+        graficos = renderizar_graficos(resumo['series'], checkboxes, tensao_nominal)
+    return {'comentarios': comentarios, 'mes_referencia': _mes_referencia(resumo['data_final']),
+            'graficos': {nome: grafico.getvalue() if grafico else None for nome, grafico in graficos.items()}}
+
+def gerar_relatorio_final(df_dados_brutos, dados_motor, checkboxes={}, tempos=None):
+    tempos = {} if tempos is None else tempos
+    try:
+        return montar_pdf(analisar_telemetria(df_dados_brutos, dados_motor, checkboxes, tempos), dados_motor, checkboxes, tempos)
     except Exception as e:
-        print(f"ERRO CRÍTICO AO GERAR PDF: {e}")
-        import traceback
-        traceback.print_exc()
-        raise e
\ No newline at end of file
+        logger.exception("ERRO CRÍTICO AO GERAR PDF: %s", e)
+        raise e
+
+def _numero(valor, formato="{:.1f}"):
+    return "-" if valor is None else formato.format(valor)
+
+def secao_comparativo(pdf, comparativo, dados_motor):
+    # Tendência mensal do motor e ranking dos motores do cliente por horas com tensão fora da faixa adequada.
+    pdf.set_font('Arial', '', 12)
+    pdf.multi_cell(0, 7, "Evolução mensal do equipamento (corrente média em operação e carregamento, fator de potência médio, horas desligado e horas com tensão fora da faixa adequada do PRODIST):", align='J'); pdf.ln(3)
+    pdf.set_font('Arial', '', 10)
+    with pdf.table(col_widths=(22, 30, 30, 22, 30, 36), text_align='CENTER') as tabela:
+        tabela.row(["Mês", "Corrente média (A)", "Carregamento (%)", "FP médio", "Horas desligado", "Horas fora do PRODIST"])
+        for linha in comparativo['tendencia']:
+            tabela.row([linha['mes'], _numero(linha['corrente_media']), _numero(linha['carregamento_pct']), _numero(linha['fp_medio'], "{:.2f}"),
+                        str(linha['horas_desligado']), str(linha['horas_violacao_prodist'])])
+    pdf.ln(5)
+    ranking = comparativo['ranking']
+    if len(ranking) > 1:
+        pdf.set_font('Arial', '', 12)
+        posicao = f"{comparativo['posicao']}º de {len(ranking)}" if comparativo.get('posicao') else "sem dados no período"
+        pdf.multi_cell(0, 7, f"Entre os motores do cliente, ordenados do maior para o menor número de horas com tensão fora da faixa adequada, este equipamento (*) ficou em {posicao}:", align='J'); pdf.ln(3)
+        pdf.set_font('Arial', '', 10)
+        with pdf.table(col_widths=(16, 58, 36, 36, 44), text_align='CENTER') as tabela:
+            tabela.row(["Posição", "Motor", "Horas fora do PRODIST", "Horas críticas", "Desequilíbrio máx. (%)"])
+            for linha in ranking:
+                marcador = " *" if str(linha['id_motor']) == str(dados_motor.get('id_motor')) else ""
+                tabela.row([str(linha['posicao']), f"{linha['descricao_motor'] or linha['id_motor']}{marcador}", str(linha['horas_violacao_prodist']),
+                            str(linha['horas_tensao_critica']), _numero(linha['desequilibrio_max_pct'])])
+
+class RelatorioDuplicado(ValueError):
+    pass
+
+def reservar_nome(pasta_reservas, nome_pdf):
+    # Num lote, dois arquivos do mesmo motor e mês de referência gerariam o mesmo PDF e o segundo apagaria o
+    # primeiro. Cada nome é reservado (criação exclusiva de um marcador, atômica entre os processos do pool)
+    # antes de o PDF ser gravado; quem chega depois falha.
+    try:
+        os.close(os.open(os.path.join(pasta_reservas, nome_pdf), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        raise RelatorioDuplicado(f"Outro arquivo deste lote, do mesmo motor e mês de referência, já gerou o relatório {nome_pdf}.")
+
+def montar_pdf(resultado, dados_motor, checkboxes={}, tempos=None):
+    return montar_pdf_em_memoria(resultado, dados_motor, checkboxes, tempos)[0]
+
+def montar_pdf_em_memoria(resultado, dados_motor, checkboxes={}, tempos=None, pasta_reservas=None):
+    # Monta o PDF a partir do resultado de analisar_telemetria (calculado agora ou vindo do cache), grava
+    # em reports_generated e retorna (caminho, bytes), para a API responder sem reler o arquivo.
+    # pasta_reservas (lotes): o nome do PDF é reservado antes, ver reservar_nome.
+    tempos = {} if tempos is None else tempos
+    inicio_pdf = time.perf_counter()
+    comentarios, mes_referencia = resultado['comentarios'], resultado['mes_referencia']
+    graficos = {nome: io.BytesIO(png) if png else None for nome, png in resultado['graficos'].items()}
+    caminho_saida_pdf = os.path.join("reports_generated", nome_arquivo_relatorio(dados_motor, mes_referencia))
+    if pasta_reservas: reservar_nome(pasta_reservas, os.path.basename(caminho_saida_pdf))
+    os.makedirs("reports_generated", exist_ok=True)
+
+    pdf = PDF(orientation='P', unit='mm', format='A4')
+    
+    # CAPA
+    pdf.add_page(); pdf.draw_header_footer = False
+    logo_levantec, logo_jw = logo('Logo.png', 25), logo('Logo2.png', 12)
+    if logo_levantec: pdf.image(logo_levantec, x=155, y=20, h=25)
+    if logo_jw: pdf.image(logo_jw, x=145, y=50, h=12)
+    pdf.set_xy(20, 25); pdf.set_font('Arial', 'B', 14); pdf.cell(100, 10, 'JW Automação', 0, 1, 'L')
+    pdf.set_font('Arial', '', 12); pdf.set_x(20); pdf.cell(100, 10, 'Sistema Levantec', 0, 1, 'L')
+    pdf.set_y(100); pdf.set_x(20); pdf.set_font('Arial', 'B', 36); pdf.cell(0, 15, 'Relatório Técnico', 0, 1, 'L')
+    pdf.set_font('Arial', 'B', 30); pdf.set_x(20); pdf.cell(0, 15, 'Mensal', 0, 1, 'L')
+    pdf.set_font('Arial', '', 12); pdf.set_x(20); pdf.cell(0, 10, f'Mês de referência: {mes_referencia}', 0, 1, 'L')
+    pdf.set_y(220); pdf.set_x(20)
+    add_label_val(pdf, 'Cliente:', dados_motor.get('nome_cliente', 'Não informado'))
+    pdf.set_x(20); add_label_val(pdf, 'Instalação:', dados_motor.get('local_instalacao', 'Não informado'))
+    pdf.set_x(20); add_label_val(pdf, 'Equipamento:', dados_motor.get('descricao_motor', 'Não informado'))
+    pdf.set_y(244); pdf.set_font('Arial', '', 11); pdf.cell(0, 8, 'Alegrete - RS', 0, 1, 'R')
+    pdf.set_y(252); pdf.cell(0, 8, f"Gerado em: {datetime.now().strftime('%d/%m/%Y')}", 0, 1, 'R')
+
+    # SEÇÕES DO RELATÓRIO
+    secao_num = 0
+    def nova_secao(titulo):
+        nonlocal secao_num
+        secao_num += 1
+        pdf.add_page(); pdf.set_font('Arial', 'B', 16); pdf.cell(0, 10, f"{secao_num}. {titulo}", 0, 1, 'L'); pdf.ln(5)
+
+    nova_secao("Introdução")
+    pdf.set_font('Arial', '', 12); pdf.multi_cell(0, 7, TEXTO_INTRODUCAO, align='J')
+
+    nova_secao("Análise das Tensões (PRODIST)")
+    grafico = graficos['tensao']
+    if grafico: pdf.image(grafico, w=190); pdf.ln(5)
+    pdf.set_font('Arial', '', 12); pdf.multi_cell(0, 7, comentarios.get('tensao', ''), align='J')
+
+    nova_secao("Análise das Correntes")
+    grafico = graficos['corrente']
+    if grafico: pdf.image(grafico, w=190); pdf.ln(5)
+    pdf.set_font('Arial', '', 12); pdf.multi_cell(0, 7, comentarios.get('corrente', ''), align='J')
+
+    nova_secao("Análise do Fator de Potência")
+    grafico = graficos['fp']
+    if grafico: pdf.image(grafico, w=190); pdf.ln(3)
+    pdf.set_font('Arial', '', 12); pdf.multi_cell(0, 7, comentarios.get('fp', ''), align='J')
+    
+    if checkboxes.get('tem_vazao') or checkboxes.get('tem_nivel'):
+        nova_secao("Análise de Acessórios")
+        if checkboxes.get('tem_vazao'):
+            pdf.set_font('Arial', '', 12); pdf.multi_cell(0, 7, comentarios.get('acessorios', ''), align='J'); pdf.ln(3)
+            grafico = graficos['velocidade']
+            if grafico: pdf.image(grafico, w=190); pdf.ln(3)
+        if checkboxes.get('tem_nivel'):
+            grafico = graficos['nivel']
+            if grafico:
+                if checkboxes.get('tem_vazao') and pdf.get_y() > 150: pdf.add_page()
+                pdf.image(grafico, w=190); pdf.ln(3)
+
+    nova_secao("Dados de Operação")
+    pdf.set_font('Arial', '', 12); pdf.multi_cell(0, 7, comentarios.get('dados_operacao', ''), align='J')
+    
+    if resultado.get('comparativo'):
+        nova_secao("Comparativo")
+        secao_comparativo(pdf, resultado['comparativo'], dados_motor)
+
+    nova_secao("Conclusões Finais")
+    pdf.set_font('Arial', 'B', 12); pdf.multi_cell(0, 7, comentarios.get('conclusao_final', ''), align='J')
+
+    # Página de Agradecimento
+    pdf.add_page(); pdf.draw_header_footer = False 
+    pdf.set_y(120); pdf.set_font('Arial', 'B', 16); pdf.multi_cell(w=0, h=10, text='Agradecimento', align='C'); pdf.ln(10)
+    pdf.set_font('Arial', '', 12); pdf.multi_cell(w=0, h=8, text=TEXTO_AGRADECIMENTO, align='C'); pdf.ln(5)
+    pdf.set_font('Arial', 'I', 10); pdf.multi_cell(w=0, h=7, text="Contato: (55) 99710-4386 | gestao@jwautomacao.com.br", align='C')
+    
+    tempos['pdf'] = round(time.perf_counter() - inicio_pdf, 4)
+    with cronometro(tempos, 'pdf_saida'):  # pdf.output (compressão das páginas e imagens) e gravação
+        conteudo = bytes(pdf.output())
+        temporario = f"{caminho_saida_pdf}.{uuid.uuid4().hex}.tmp"  # quem baixa o relatório nunca vê um PDF pela metade
+        with open(temporario, 'wb') as saida:
+            saida.write(conteudo)
+        os.replace(temporario, caminho_saida_pdf)
+        catalogo_relatorios.registrar(caminho_saida_pdf, dados_motor, mes_referencia, catalogo_relatorios.veredito(comentarios))
+    return caminho_saida_pdf, conteudo
+
+def gerar_relatorio_de_arquivo(caminho_csv, dados_motor, checkboxes={}, sha256_csv=None, incluir_pdf=False, pasta_reservas=None):
+    # Ponto de entrada usado pelos processos do fila_relatorios: lê o CSV do ESP32 e gera o PDF.
+    # Retorna o caminho do PDF, o tempo (s) de cada etapa (leitura, analise, graficos, pdf e pdf_saida), se
+    # análises e gráficos vieram do cache (o mesmo CSV com as mesmas grandezas nominais e acessórios) e os
+    # volumes usados nas métricas. Com incluir_pdf=True devolve também os bytes do PDF em 'pdf'.
+    # pasta_reservas é usada pelos lotes (reservar_nome).
+    tempos, linhas = {}, 0
+    with metricas.perfilar(f"relatorio_{dados_motor.get('id_motor')}", amostragem=False):
+        sha256_csv = sha256_csv or sha256_arquivo(caminho_csv)
+        chave = cache_relatorios.gerar_chave(sha256_csv, dados_motor, checkboxes)
+        resultado = cache_relatorios.obter(chave)
+        em_cache = resultado is not None
+        id_motor = dados_motor.get('id_motor')
+        # O cache não depende do motor: o mesmo CSV enviado para outro motor ainda precisa ser guardado nele.
+        guardar = bool(id_motor) and telemetria_motores.disponivel() and not telemetria_motores.arquivo_gravado(id_motor, sha256_csv)
+        if not em_cache or guardar:
+            resumo = ler_em_blocos(caminho_csv, dados_motor, tempos, analisar=not em_cache, id_motor_guardar=id_motor if guardar else None)
+            linhas = resumo['linhas']
+            if guardar and resumo['guardado']: telemetria_motores.marcar_arquivo(id_motor, sha256_csv)
+        if not em_cache:
+            if resumo['ordenado'] and resumo['parcial'] is not None:
+                resultado = analisar_blocos(resumo, dados_motor, checkboxes, tempos)
+            else:
+                # Arquivo fora de ordem (ou sem datas): a análise precisa das linhas ordenadas, então o arquivo
+                # é relido inteiro, até LIMITE_MEMORIA_INGESTAO_MB (acima disso, LimiteMemoriaExcedido -> 413).
+                with cronometro(tempos, 'leitura'):
+                    df_brutos = ler_telemetria(caminho_csv)
+                resultado = analisar_telemetria(df_brutos, dados_motor, checkboxes, tempos)
+            cache_relatorios.guardar(chave, resultado['comentarios'], resultado['mes_referencia'], resultado['graficos'])
+        caminho_pdf, conteudo = montar_pdf_em_memoria(resultado, dados_motor, checkboxes, tempos, pasta_reservas)
+    return _resumo(caminho_pdf, conteudo, tempos, em_cache, linhas, resultado, incluir_pdf)
+
+def _resumo(caminho_pdf, conteudo, tempos, em_cache, linhas, resultado, incluir_pdf):
+    resumo = {'caminho_pdf': caminho_pdf, 'tempos': tempos, 'cache': em_cache, 'linhas': linhas,
+              'graficos': 0 if em_cache else sum(1 for png in resultado['graficos'].values() if png), 'tamanho_pdf': len(conteudo)}
+    if incluir_pdf: resumo['pdf'] = conteudo
+    return resumo
+
+def guardar_telemetria(id_motor, df_brutos, tempos, sha256_csv=None):
+    # Guarda a telemetria lida no armazenamento por motor (Parquet) para relatórios futuros sem reenvio.
+    # Retorna False se a gravação falhou.
+    if not id_motor or not telemetria_motores.disponivel(): return False
+    try:
+        with cronometro(tempos, 'armazenamento'):
+            telemetria_motores.gravar(id_motor, df_brutos, sha256_csv)
+        return True
+    except Exception as e:
+        logger.warning("Telemetria do motor %s não foi armazenada: %s", id_motor, e)
+        return False
+
+def gerar_relatorio_de_telemetria(id_motor, dados_motor, checkboxes={}, inicio=None, fim=None, incluir_pdf=False, comparativo=None):
+    # Relatório a partir da telemetria já armazenada do motor (sem upload), no período [inicio, fim].
+    # 'comparativo' (comparativos.secao_relatorio) acrescenta a seção de comparação com os outros motores.
+    tempos = {}
+    with metricas.perfilar(f"relatorio_{id_motor}", amostragem=False):
+        with cronometro(tempos, 'leitura'):
+            df_brutos = telemetria_motores.ler(id_motor, inicio, fim)
+        if df_brutos.empty:
+            raise ValueError(f"Não há telemetria armazenada para o motor {id_motor} no período informado.")
+        # Análise pelos agregados diários: só os dias de meses que receberam dados novos são recalculados.
+        corrente_nominal = float(dados_motor.get('corrente_nominal', 0))
+        tensao_nominal = float(dados_motor.get('tensao_nominal_v', 380.0))
+        with cronometro(tempos, 'analise'):
+            parciais = [parcial for _, parcial in telemetria_motores.parciais_diarios(id_motor, corrente_nominal, tensao_nominal, inicio, fim)]
+            comentarios = agregados.analisar_parciais(parciais, corrente_nominal, tensao_nominal)
+        resultado = analisar_telemetria(df_brutos, dados_motor, checkboxes, tempos, comentarios)
+        if comparativo: resultado['comparativo'] = comparativo
+        caminho_pdf, conteudo = montar_pdf_em_memoria(resultado, dados_motor, checkboxes, tempos)
+    return _resumo(caminho_pdf, conteudo, tempos, False, len(df_brutos), resultado, incluir_pdf)
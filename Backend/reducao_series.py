@@ -0,0 +1,55 @@
+# Arquivo: backend/reducao_series.py (Redução de pontos das séries dos gráficos)
+# Cada método recebe x (datetime64 ou numérico) e y, já sem NaN e em ordem, e devolve os índices dos
+# pontos a desenhar. O número de pontos alvo vem da largura do gráfico em pixels, então o custo do
+# desenho não cresce com o tamanho da telemetria.
+
+import numpy as np
+
+def _baldes(n, n_baldes):
+    # Divide [0, n) em n_baldes faixas contíguas; devolve o tamanho de cada faixa (igual) e o total com preenchimento.
+    tamanho = -(-n // n_baldes)
+    return tamanho, tamanho * n_baldes
+
+def envelope_min_max(x, y, n_pontos):
+    # Mantém, em cada faixa, o menor e o maior valor: quedas de tensão e picos de corrente continuam visíveis.
+    n = len(y)
+    n_baldes = max(1, n_pontos // 2)
+    if n <= n_pontos or n_baldes >= n: return np.arange(n)
+    tamanho, total = _baldes(n, n_baldes)
+    blocos = np.pad(y, (0, total - n), mode='edge').reshape(-1, tamanho)
+    base = np.arange(blocos.shape[0]) * tamanho
+    indices = np.concatenate([base + blocos.argmin(axis=1), base + blocos.argmax(axis=1), [0, n - 1]])
+    return np.unique(np.minimum(indices, n - 1))
+
+def lttb(x, y, n_pontos):
+    # Largest-Triangle-Three-Buckets: em cada faixa escolhe o ponto que forma o maior triângulo com o ponto
+    # escolhido na faixa anterior e a média da faixa seguinte. Preserva a forma da curva com poucos pontos.
+    n = len(y)
+    if n <= n_pontos or n_pontos < 3: return np.arange(n)
+    xs = x.astype('datetime64[ns]').astype(np.int64).astype(np.float64) if np.issubdtype(x.dtype, np.datetime64) else x.astype(np.float64)
+    xs = xs - xs[0]
+    ys = y.astype(np.float64)
+    limites = np.linspace(1, n - 1, n_pontos - 1).astype(np.int64)
+    indices = np.empty(n_pontos, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for i in range(n_pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        prox_inicio, prox_fim = limites[i + 1], (limites[i + 2] if i + 2 < len(limites) else n)
+        media_x, media_y = xs[prox_inicio:prox_fim].mean(), ys[prox_inicio:prox_fim].mean()
+        ax, ay = xs[anterior], ys[anterior]
+        areas = np.abs((ax - media_x) * (ys[inicio:fim] - ay) - (ax - xs[inicio:fim]) * (media_y - ay))
+        anterior = inicio + int(areas.argmax())
+        indices[i + 1] = anterior
+    return indices
+
+def sem_reducao(x, y, n_pontos):
+    return np.arange(len(y))
+
+METODOS_REDUCAO = {'envelope': envelope_min_max, 'lttb': lttb, 'nenhum': sem_reducao}
+
+def reduzir_serie(x, y, n_pontos, metodo='envelope'):
+    # Devolve (x, y) reduzidos pelo método escolhido; métodos novos entram em METODOS_REDUCAO.
+    if metodo not in METODOS_REDUCAO: raise ValueError(f"Método de redução desconhecido: {metodo}")
+    indices = METODOS_REDUCAO[metodo](x, y, n_pontos)
+    return x[indices], y[indices]
@@ -0,0 +1,106 @@
+# Arquivo: backend/registro_motores.py (Registro de motores em memória)
+
+import threading
+
+def linhas(colunas, campos=None, inicio=0, limite=None):
+    # Registros (dicts) da fatia [inicio, inicio + limite) de uma tabela em colunas, só com os campos pedidos.
+    campos = list(colunas) if campos is None else campos
+    fim = None if limite is None else inicio + limite
+    return (dict(zip(campos, valores)) for valores in zip(*(colunas[campo][inicio:fim] for campo in campos)))
+
+class RegistroMotores:
+    # Mantém a tabela de motores carregada uma única vez por processo. A cada acesso compara a
+    # versão do armazenamento (mtime do CSV ou contador do SQLite) e só recarrega quando ela mudou;
+    # as consultas usam índices em dict.
+    CAMPOS_INDEXADOS = ('id_motor', 'id_cliente', 'nome_cliente', 'id_esp32')
+
+    def __init__(self, armazenamento):
+        self.armazenamento = armazenamento
+        self._lock = threading.RLock()
+        # (assinatura, df, registros, indices, tabelas), trocado de uma vez a cada recarga: quem lê pega
+        # uma cópia da tupla e nunca vê o df de uma versão com os índices de outra.
+        self._estado = (None, None, [], {campo: {} for campo in self.CAMPOS_INDEXADOS}, {})
+
+    @property
+    def versao(self):
+        return self._sincronizar()[0]
+
+    def _sincronizar(self):
+        # Devolve o estado atual, recarregando antes se a versão do armazenamento mudou.
+        try:
+            assinatura = self.armazenamento.versao()
+        except FileNotFoundError:
+            with self._lock:
+                self._estado = self._carregar(None, None)
+            raise
+        estado = self._estado
+        if assinatura == estado[0]: return estado
+        with self._lock:
+            if assinatura != self._estado[0]:
+                self._estado = self._carregar(self.armazenamento.carregar(), assinatura)
+            return self._estado
+
+    def _carregar(self, df, assinatura):
+        if df is None:
+            return (assinatura, None, [], {campo: {} for campo in self.CAMPOS_INDEXADOS}, {})
+        if 'id_motor' in df.columns: df['id_motor'] = df['id_motor'].astype(str)
+        registros = df.to_dict('records')
+        indices = {}
+        for campo in self.CAMPOS_INDEXADOS:
+            if campo not in df.columns or df.empty:
+                indices[campo] = {}
+                continue
+            grupos = df.groupby(campo, sort=False).indices
+            indices[campo] = {self._chave(valor): posicoes.tolist() for valor, posicoes in grupos.items()}
+        return (assinatura, df, registros, indices, {})
+
+    @staticmethod
+    def _chave(valor):
+        return valor.item() if hasattr(valor, 'item') else valor
+
+    def _buscar(self, campo, valor):
+        _, _, registros, indices, _ = self._sincronizar()
+        return [dict(registros[i]) for i in indices[campo].get(valor, [])]
+
+    # --- Consultas ---
+    def tabela(self, conjunto='registros'):
+        # (versão, {coluna: valores}) de 'registros' ou 'clientes' no formato das respostas (vazios como "").
+        # Montada uma vez por versão; páginas e projeções saem das listas sem criar um dict por motor, e
+        # a versão vem junto com os dados para o ETag das listagens.
+        assinatura, df, _, _, tabelas = self._sincronizar()
+        with self._lock:
+            if conjunto not in tabelas:
+                if conjunto == 'registros': df = df.fillna("")
+                else: df = df[['id_cliente', 'nome_cliente']].dropna().drop_duplicates(subset=['id_cliente'])
+                tabelas[conjunto] = {col: df[col].tolist() for col in df.columns}
+            return assinatura, tabelas[conjunto]
+
+    def registros(self):
+        return list(linhas(self.tabela('registros')[1]))
+
+    def clientes(self):
+        return list(linhas(self.tabela('clientes')[1]))
+
+    def motor(self, id_motor):
+        encontrados = self._buscar('id_motor', str(id_motor))
+        return encontrados[0] if encontrados else None
+
+    def motor_por_esp32(self, id_esp32):
+        encontrados = self._buscar('id_esp32', str(id_esp32))
+        return encontrados[0] if encontrados else None
+
+    def motores_do_cliente(self, id_cliente):
+        return self._buscar('id_cliente', id_cliente)
+
+    def por_nome_cliente(self, nome_cliente):
+        return self._buscar('nome_cliente', nome_cliente)
+
+    # --- Escrita (delegada ao armazenamento; a próxima consulta enxerga a nova versão) ---
+    def inserir(self, dados):
+        return self.armazenamento.inserir(dados)
+
+    def atualizar(self, id_motor, dados):
+        return self.armazenamento.atualizar(id_motor, dados)
+
+    def remover(self, id_motor):
+        return self.armazenamento.remover(id_motor)
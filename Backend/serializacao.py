@@ -0,0 +1,41 @@
+# Arquivo: backend/serializacao.py (Codificação JSON das listagens da API)
+# Usa o orjson quando instalado (poetry install -E rapido) e o json da biblioteca padrão caso contrário.
+# As listagens já chegam com tipos do Python, então a resposta é codificada direto, sem passar pelo
+# jsonable_encoder do FastAPI.
+
+import json
+import math
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele a codificação usa o json
+    orjson = None
+
+NDJSON_LINHAS_POR_BLOCO = 1000
+
+def _padrao(valor):
+    # Tipos do numpy/pandas que sobram nas tabelas (np.int64, np.float32, Timestamp).
+    if hasattr(valor, 'item'): return _finitos(valor.item())
+    if hasattr(valor, 'isoformat'): return valor.isoformat()
+    raise TypeError(f"Tipo não serializável em JSON: {type(valor).__name__}")
+
+def _finitos(obj):
+    # NaN e infinito viram None, como no orjson: o json da biblioteca padrão emitiria NaN, que não é JSON válido.
+    if isinstance(obj, float): return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict): return {chave: _finitos(valor) for chave, valor in obj.items()}
+    if isinstance(obj, (list, tuple)): return [_finitos(valor) for valor in obj]
+    return obj
+
+def codificar(obj):
+    if orjson is not None: return orjson.dumps(obj, default=_padrao)
+    return json.dumps(_finitos(obj), default=_padrao, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+def ndjson(linhas, linhas_por_bloco=NDJSON_LINHAS_POR_BLOCO):
+    # Um objeto JSON por linha, entregue em blocos: a memória fica limitada a um bloco por vez.
+    bloco = []
+    for linha in linhas:
+        bloco.append(codificar(linha))
+        if len(bloco) >= linhas_por_bloco:
+            yield b"\n".join(bloco) + b"\n"
+            bloco = []
+    if bloco: yield b"\n".join(bloco) + b"\n"
@@ -0,0 +1,179 @@
+# Arquivo: backend/telemetria_motores.py (Telemetria já lida, guardada por motor em Parquet)
+# Layout: TELEMETRIA_DIR/<id_motor>/<AAAA-MM>/parte-<hash>.parquet. Cada envio vira uma parte por mês,
+# com as colunas em float32 e Time como índice; o nome da parte é o hash do conteúdo, então reenviar o
+# mesmo CSV não duplica nada. Na leitura as partes do período são unidas e amostras repetidas descartadas.
+# TELEMETRIA_DIR/<id_motor>/.arquivos/<sha256> marca os CSVs já gravados para o motor (as partes podem ter
+# sido compactadas, então o nome delas não serve para isso).
+
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import uuid
+
+import pandas as pd
+
+# pyarrow é opcional: sem ele a telemetria não é guardada. Só é importado no primeiro uso (_parquet).
+PYARROW_INSTALADO = importlib.util.find_spec("pyarrow") is not None
+
+import agregados
+from ingestao import COLUNA_TEMPO
+
+TELEMETRIA_DIR = os.getenv("TELEMETRIA_DIR", "telemetria")
+TELEMETRIA_MAX_PARTES = int(os.getenv("TELEMETRIA_MAX_PARTES", 24))  # acima disso as partes do mês são compactadas
+
+class TelemetriaIndisponivel(Exception):
+    pass
+
+def disponivel():
+    return PYARROW_INSTALADO
+
+def _parquet():
+    import pyarrow.parquet as pq
+    return pq
+
+def _pasta_motor(id_motor):
+    # id_motor vira nome de pasta: só caracteres seguros.
+    if not re.fullmatch(r"[\w.-]+", str(id_motor)) or str(id_motor) in (".", ".."):
+        raise ValueError(f"id_motor inválido para armazenamento de telemetria: {id_motor!r}")
+    return os.path.join(TELEMETRIA_DIR, str(id_motor))
+
+def _hash_conteudo(df):
+    resumo = hashlib.sha256(",".join(df.columns).encode())
+    resumo.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return resumo.hexdigest()[:24]
+
+def arquivo_gravado(id_motor, sha256_arquivo):
+    return os.path.exists(os.path.join(_pasta_motor(id_motor), ".arquivos", sha256_arquivo))
+
+def marcar_arquivo(id_motor, sha256_arquivo):
+    pasta = os.path.join(_pasta_motor(id_motor), ".arquivos")
+    os.makedirs(pasta, exist_ok=True)
+    open(os.path.join(pasta, sha256_arquivo), "w").close()
+
+def gravar(id_motor, df, sha256_arquivo=None):
+    # Acrescenta a telemetria do motor, uma parte por mês. Retorna os meses ('AAAA-MM') gravados. Com
+    # sha256_arquivo (o CSV de origem), marca o arquivo como gravado para este motor (arquivo_gravado).
+    if not PYARROW_INSTALADO or df.empty or not isinstance(df.index, pd.DatetimeIndex): return []
+    pasta_motor = _pasta_motor(id_motor)
+    df = df[df.index.notna()]
+    meses = []
+    for periodo, parte in df.groupby(df.index.to_period('M'), sort=True):
+        mes = str(periodo)
+        pasta_mes = os.path.join(pasta_motor, mes)
+        os.makedirs(pasta_mes, exist_ok=True)
+        destino = os.path.join(pasta_mes, f"parte-{_hash_conteudo(parte)}.parquet")
+        if not os.path.exists(destino):
+            temporario = os.path.join(pasta_mes, f".tmp_{uuid.uuid4().hex}")
+            parte.rename_axis(COLUNA_TEMPO).to_parquet(temporario, engine="pyarrow", compression="zstd")
+            os.replace(temporario, destino)
+        meses.append(mes)
+        if len(_partes(pasta_mes)) > TELEMETRIA_MAX_PARTES: compactar(id_motor, mes)
+    if sha256_arquivo: marcar_arquivo(id_motor, sha256_arquivo)
+    return meses
+
+def _partes(pasta_mes):
+    return [os.path.join(pasta_mes, nome) for nome in os.listdir(pasta_mes) if nome.endswith(".parquet")]
+
+def compactar(id_motor, mes):
+    # Une as partes do mês numa só (envios frequentes, como os da ingestão contínua, geram muitas partes).
+    # A parte nova é gravada antes de as antigas serem removidas; a leitura repete o mês se uma sumir.
+    pasta_mes = os.path.join(_pasta_motor(id_motor), mes)
+    antigas = _partes(pasta_mes)
+    periodo = pd.Period(mes, 'M')
+    df = ler(id_motor, periodo.start_time, periodo.end_time)
+    destino = os.path.join(pasta_mes, f"parte-{_hash_conteudo(df)}.parquet")
+    if destino not in antigas:
+        temporario = os.path.join(pasta_mes, f".tmp_{uuid.uuid4().hex}")
+        df.rename_axis(COLUNA_TEMPO).to_parquet(temporario, engine="pyarrow", compression="zstd")
+        os.replace(temporario, destino)
+    for caminho in antigas:
+        if caminho != destino: os.remove(caminho)
+
+def meses(id_motor):
+    # Um id_motor que não serve como nome de pasta nunca teve telemetria gravada.
+    try:
+        pasta_motor = _pasta_motor(id_motor)
+    except ValueError:
+        return []
+    if not os.path.isdir(pasta_motor): return []
+    return sorted(nome for nome in os.listdir(pasta_motor) if re.fullmatch(r"\d{4}-\d{2}", nome))
+
+def _ler_mes(pasta_mes, colunas, tentativas=3):
+    # Da parte mais antiga para a mais nova: numa amostra repetida vale o envio mais recente.
+    for tentativa in range(tentativas):
+        try:
+            pq, tabelas = _parquet(), []
+            for caminho in sorted(_partes(pasta_mes), key=os.path.getmtime):
+                disponiveis = pq.read_schema(caminho).names
+                selecao = None if colunas is None else [c for c in colunas if c in disponiveis] + [COLUNA_TEMPO]
+                tabelas.append(pq.read_table(caminho, columns=selecao, memory_map=True).to_pandas())
+            return tabelas
+        except FileNotFoundError:  # parte removida por uma compactação durante a leitura
+            if tentativa == tentativas - 1: raise
+
+def ler(id_motor, inicio=None, fim=None, colunas=None):
+    # Telemetria do motor entre inicio e fim (datas inclusivas; None = sem limite), lendo só os meses
+    # e as colunas necessários, com memory-map dos arquivos.
+    if not PYARROW_INSTALADO: raise TelemetriaIndisponivel("pyarrow não está instalado; a telemetria por motor está desativada.")
+    inicio = pd.Timestamp(inicio) if inicio is not None else None
+    fim = pd.Timestamp(fim) if fim is not None else None
+    if fim is not None and fim == fim.normalize(): fim = fim + pd.Timedelta(days=1) - pd.Timedelta(1)
+    tabelas = []
+    pasta_motor = _pasta_motor(id_motor)
+    for mes in meses(id_motor):
+        periodo = pd.Period(mes, 'M')
+        if inicio is not None and periodo.end_time < inicio: continue
+        if fim is not None and periodo.start_time > fim: continue
+        tabelas += _ler_mes(os.path.join(pasta_motor, mes), colunas)
+    if not tabelas: return pd.DataFrame(index=pd.DatetimeIndex([], name=COLUNA_TEMPO), dtype='float32')
+    df = pd.concat(tabelas) if len(tabelas) > 1 else tabelas[0]
+    df = df.astype('float32')
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    if inicio is not None or fim is not None:
+        df = df.loc[inicio:fim]
+    return df
+
+# --- Agregados diários ---
+# Cada mês guarda em agregados.json os parciais de cada dia (agregados.calcular_parcial). A assinatura
+# (partes do mês + grandezas nominais) diz se ainda valem: um envio novo só invalida os meses que tocou.
+def _assinatura(pasta_mes, corrente_nominal, tensao_nominal):
+    partes = sorted(os.path.basename(caminho) for caminho in _partes(pasta_mes))
+    return {'versao': agregados.VERSAO_AGREGADOS, 'partes': partes,
+            'corrente_nominal': float(corrente_nominal), 'tensao_nominal': float(tensao_nominal)}
+
+def assinatura_do_mes(id_motor, mes, corrente_nominal, tensao_nominal):
+    # Muda sempre que os parciais do mês precisam ser recalculados (usada também no cache dos comparativos).
+    return _assinatura(os.path.join(_pasta_motor(id_motor), mes), corrente_nominal, tensao_nominal)
+
+def parciais_do_mes(id_motor, mes, corrente_nominal, tensao_nominal):
+    pasta_mes = os.path.join(_pasta_motor(id_motor), mes)
+    arquivo = os.path.join(pasta_mes, "agregados.json")
+    assinatura = _assinatura(pasta_mes, corrente_nominal, tensao_nominal)
+    try:
+        with open(arquivo, encoding="utf-8") as f:
+            salvo = json.load(f)
+        if salvo['assinatura'] == assinatura: return salvo['dias']
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+    periodo = pd.Period(mes, 'M')
+    dias = agregados.parciais_diarios(ler(id_motor, periodo.start_time, periodo.end_time), corrente_nominal, tensao_nominal)
+    temporario = os.path.join(pasta_mes, f".tmp_{uuid.uuid4().hex}")
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump({'assinatura': assinatura, 'dias': dias}, f)
+    os.replace(temporario, arquivo)
+    return dias
+
+def parciais_diarios(id_motor, corrente_nominal, tensao_nominal, inicio=None, fim=None):
+    # [(dia, parcial)] em ordem, dos dias entre inicio e fim (granularidade de dia).
+    if not PYARROW_INSTALADO: raise TelemetriaIndisponivel("pyarrow não está instalado; a telemetria por motor está desativada.")
+    inicio = pd.Timestamp(inicio).strftime('%Y-%m-%d') if inicio is not None else None
+    fim = pd.Timestamp(fim).strftime('%Y-%m-%d') if fim is not None else None
+    resultado = []
+    for mes in meses(id_motor):
+        if (inicio and mes < inicio[:7]) or (fim and mes > fim[:7]): continue
+        for dia, parcial in parciais_do_mes(id_motor, mes, corrente_nominal, tensao_nominal).items():
+            if (inicio and dia < inicio) or (fim and dia > fim): continue
+            resultado.append((dia, parcial))
+    return sorted(resultado, key=lambda item: item[0])
@@ -0,0 +1,71 @@
+# Arquivo: backend/telemetria_sintetica.py (Gerador de telemetria ESP32 para testes de desempenho)
+
+import numpy as np
+import pandas as pd
+from analises import MAPEAMENTO_COLUNAS
+
+TIPOS_EVENTOS = ('queda', 'sobrecarga', 'falta_fase')
+
+def _trechos(inicios, duracao, n_linhas):
+    # Cada evento dura 'duracao' linhas a partir do seu início (cortado no fim da série).
+    if duracao <= 1: return inicios
+    return np.unique(np.minimum(inicios[:, None] + np.arange(duracao), n_linhas - 1).ravel())
+
+def gerar_telemetria(n_linhas, tensao_nominal=380.0, corrente_nominal=15.5, intervalo='1min', inicio='2025-05-01', semente=42,
+                     eventos_por_mil=2.0, duracao_eventos=1, tipos_eventos=TIPOS_EVENTOS):
+    # DataFrame no mesmo formato do CSV já lido (índice Time, colunas do MAPEAMENTO_COLUNAS), com
+    # ciclos liga/desliga e eventos espalhados: quedas de tensão (fase A a 85%), sobrecorrentes (fase B
+    # a 5x a nominal) e faltas de fase (fase C). 'eventos_por_mil' eventos a cada 1000 linhas, cada um
+    # com 'duracao_eventos' linhas, divididos igualmente entre os 'tipos_eventos'.
+    rng = np.random.default_rng(semente)
+    indice = pd.date_range(inicio, periods=n_linhas, freq=intervalo, name=MAPEAMENTO_COLUNAS['timestamp'])
+    ligado = (np.sin(np.arange(n_linhas) / 180.0) + rng.normal(0, 0.3, n_linhas)) > -0.2
+    dados = {}
+    for fase in ('a', 'b', 'c'):
+        dados[MAPEAMENTO_COLUNAS[f'tensao_{fase}']] = tensao_nominal + rng.normal(0, tensao_nominal * 0.02, n_linhas)
+        dados[MAPEAMENTO_COLUNAS[f'corrente_{fase}']] = np.where(ligado, corrente_nominal * 0.8 + rng.normal(0, corrente_nominal * 0.05, n_linhas), 0.0)
+        dados[MAPEAMENTO_COLUNAS[f'fp_{fase}']] = np.where(ligado, np.clip(0.93 + rng.normal(0, 0.03, n_linhas), 0, 1), 0.0)
+    df = pd.DataFrame(dados, index=indice)
+    n_eventos = min(n_linhas, max(1, int(n_linhas * eventos_por_mil // 1000))) if tipos_eventos and eventos_por_mil > 0 else 0
+    eventos = rng.choice(n_linhas, size=n_eventos, replace=False)
+    por_tipo = dict(zip(tipos_eventos, np.array_split(eventos, len(tipos_eventos)))) if n_eventos else {}
+    if 'queda' in por_tipo:
+        df.iloc[_trechos(por_tipo['queda'], duracao_eventos, n_linhas), df.columns.get_loc(MAPEAMENTO_COLUNAS['tensao_a'])] *= 0.85
+    if 'sobrecarga' in por_tipo:
+        df.iloc[_trechos(por_tipo['sobrecarga'], duracao_eventos, n_linhas), df.columns.get_loc(MAPEAMENTO_COLUNAS['corrente_b'])] = corrente_nominal * 5
+    if 'falta_fase' in por_tipo:
+        faltas = _trechos(por_tipo['falta_fase'], duracao_eventos, n_linhas)
+        df.iloc[faltas, df.columns.get_loc(MAPEAMENTO_COLUNAS['tensao_c'])] = tensao_nominal * 0.3
+        df.iloc[faltas, df.columns.get_loc(MAPEAMENTO_COLUNAS['corrente_c'])] = 0.2
+    vazao = np.cumsum(np.where(ligado, rng.uniform(0.5, 1.5, n_linhas), 0.0))
+    df[MAPEAMENTO_COLUNAS['vazao']] = vazao
+    df[MAPEAMENTO_COLUNAS['total']] = vazao
+    df[MAPEAMENTO_COLUNAS['dia']] = vazao % 500
+    df[MAPEAMENTO_COLUNAS['mes']] = vazao % 15000
+    df[MAPEAMENTO_COLUNAS['nivel']] = np.clip(60 + np.cumsum(rng.normal(0, 0.5, n_linhas)), 0, 100)
+    df[MAPEAMENTO_COLUNAS['velocidade']] = np.where(ligado, rng.uniform(1.0, 2.5, n_linhas), 0.0)
+    return df
+
+def salvar_csv(df, caminho):
+    # Grava no formato do ESP32: separador ';' e Time como dd/mm/aaaa HH:MM:SS.
+    saida = df.reset_index()
+    coluna_tempo = MAPEAMENTO_COLUNAS['timestamp']
+    saida[coluna_tempo] = saida[coluna_tempo].dt.strftime('%d/%m/%Y %H:%M:%S')
+    saida.to_csv(caminho, sep=';', index=False)
+    return caminho
+
+def gerar_motores(n_motores, motores_por_cliente=5, semente=42):
+    # Cadastro sintético com as colunas do clientes_motores.csv, para medir o CRUD com N motores.
+    rng = np.random.default_rng(semente)
+    indices = np.arange(n_motores)
+    id_cliente = 1000 + indices // motores_por_cliente
+    corrente = rng.choice([15.5, 22.0, 30.0, 45.0, 80.0], n_motores)
+    return pd.DataFrame({
+        'id_cliente': id_cliente, 'nome_cliente': [f"Cliente {c}" for c in id_cliente],
+        'id_motor': [f"{i:08x}" for i in rng.choice(16 ** 8, n_motores, replace=False)],
+        'descricao_motor': [f"Bomba {i % motores_por_cliente + 1}" for i in indices], 'local_instalacao': "Casa de Bombas",
+        'corrente_nominal': corrente, 'potencia_cv': np.round(corrente * 0.6, 1), 'tipo_conexao': "Trifásico",
+        'tensao_nominal_v': 380.0, 'grupo_tarifario': "A4", 'telefone_contato': "55999990000",
+        'email_responsavel': [f"cliente{c}@exemplo.com" for c in id_cliente], 'data_da_instalacao': "2024-01-15",
+        'id_esp32': [f"esp{i:06d}" for i in indices], 'observacoes': "",
+    })
@@ -0,0 +1,147 @@
+# Arquivo: backend/tests/test_analises.py (Regressão das análises contra a implementação original)
+# Os textos de analises.py (núcleo vetorizado) e os indicadores de calcular_indicadores devem ser iguais
+# aos de analises_referencia.py, linha a linha, e os textos montados pelos agregados diários iguais aos da
+# análise direta. Arquivos gravados do ESP32 entram com ANALISES_CSV=arquivo1.csv:arquivo2.csv.
+# Uso: cd backend && python -m pytest
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import agregados
+import analises
+import analises_referencia
+from analises import MAPEAMENTO_COLUNAS
+from telemetria_sintetica import gerar_telemetria
+
+TENSOES = ['AVRMS', 'BVRMS', 'CVRMS']
+CORRENTES = ['AIRMS', 'BIRMS', 'CIRMS']
+FPS = ['AFP', 'BFP', 'CFP']
+
+def _com_lacunas(df, fracao=0.05, semente=7):
+    cols = TENSOES + CORRENTES + FPS
+    df[cols] = df[cols].mask(np.random.default_rng(semente).random(df[cols].shape) < fracao)
+    return df
+
+def _bordas():
+    # Lacunas (NaN), tensões exatamente nos limiares (80% e 50% da nominal, 30 V), falta de energia e fases zeradas.
+    df = _com_lacunas(gerar_telemetria(3000, semente=7))
+    df.iloc[::50, 0] = 380.0 * 0.80
+    df.iloc[::70, 3] = 380.0 * 0.50
+    df.iloc[::90, 6] = 30.0
+    df.iloc[::120, [0, 3, 6]] = 5.0
+    df.iloc[7::130, [0, 3, 6]] = 30.0
+    df.iloc[11::130, [0, 3]] = 5.0
+    df.iloc[11::130, 6] = 30.0
+    return df
+
+def _sem(colunas, semente):
+    return gerar_telemetria(1500, semente=semente).drop(columns=colunas)
+
+def _fase_vazia(colunas, semente):
+    df = gerar_telemetria(1500, semente=semente)
+    df[colunas] = np.nan
+    return df
+
+def _ler_csv_gravado(caminho):
+    # Mesmo caminho de leitura do relatório original: pandas com tipos inferidos e Time como índice.
+    df = pd.read_csv(caminho, delimiter=';')
+    coluna_tempo = MAPEAMENTO_COLUNAS['timestamp']
+    df[coluna_tempo] = pd.to_datetime(df[coluna_tempo], dayfirst=True, errors='coerce')
+    return df.dropna(subset=[coluna_tempo]).set_index(coluna_tempo).sort_index()
+
+CASOS = {
+    **{f"sintetico-{semente}": (lambda s=semente, t=tensao, c=c: gerar_telemetria(5000, tensao_nominal=t, corrente_nominal=c, semente=s), c, tensao)
+       for semente, tensao, c in [(1, 380.0, 15.5), (2, 220.0, 80.0), (3, 127.0, 5.0), (4, 380.0, 2.0)]},
+    "bordas": (_bordas, 15.5, 380.0),
+    "muitas-lacunas": (lambda: _com_lacunas(gerar_telemetria(2000, semente=9), fracao=0.6, semente=9), 15.5, 380.0),
+    "tensao-nominal-20v": (lambda: gerar_telemetria(2000, semente=8), 15.5, 20.0),
+    "corrente-nominal-zero": (lambda: gerar_telemetria(1500, semente=10), 0.0, 380.0),
+    "tensao-nominal-zero": (lambda: gerar_telemetria(1500, semente=11), 15.5, 0.0),
+    "nominais-zero": (lambda: gerar_telemetria(1500, semente=12), 0, 0),
+    "sem-fase-c-tensao": (lambda: _sem(['CVRMS'], 13), 15.5, 380.0),
+    "sem-fase-c-corrente": (lambda: _sem(['CIRMS'], 14), 15.5, 380.0),
+    "sem-fase-a-corrente": (lambda: _sem(['AIRMS'], 15), 15.5, 380.0),
+    "sem-fp": (lambda: _sem(FPS, 16), 15.5, 380.0),
+    "sem-fp-b-c": (lambda: _sem(['BFP', 'CFP'], 17), 15.5, 380.0),
+    "fase-b-toda-nan": (lambda: _fase_vazia(['BVRMS', 'BIRMS', 'BFP'], 18), 15.5, 380.0),
+    "correntes-todas-nan": (lambda: _fase_vazia(CORRENTES, 19), 15.5, 380.0),
+    "motor-parado": (lambda: gerar_telemetria(500, semente=20).assign(AIRMS=0.0, BIRMS=0.0, CIRMS=0.0), 15.5, 380.0),
+}
+CASOS.update({f"gravado-{os.path.basename(caminho)}": (lambda c=caminho: _ler_csv_gravado(c), 15.5, 380.0)
+              for caminho in filter(None, os.getenv("ANALISES_CSV", "").split(os.pathsep))})
+
+@pytest.fixture(params=list(CASOS), ids=list(CASOS))
+def caso(request):
+    gerar, corrente_nominal, tensao_nominal = CASOS[request.param]
+    return gerar(), corrente_nominal, tensao_nominal
+
+def _horas(texto):
+    return [int(h) for h in re.findall(r"(\d+) hora", texto)]
+
+def test_analisar_dados_prodist_igual_a_referencia(caso):
+    df, corrente_nominal, tensao_nominal = caso
+    novo = analises.analisar_dados_prodist(df.copy(), corrente_nominal, tensao_nominal)
+    original = analises_referencia.analisar_dados_prodist(df.copy(), corrente_nominal, tensao_nominal)
+    assert novo == original
+    assert _horas(novo.get('dados_operacao', '')) == _horas(original.get('dados_operacao', ''))
+
+@pytest.mark.parametrize("analise", ['analisar_operacao', 'analisar_corrente', 'analisar_fator_potencia', 'analisar_acessorios'])
+def test_analises_por_secao_iguais_a_referencia(caso, analise):
+    df, corrente_nominal, tensao_nominal = caso
+    argumentos = {'analisar_operacao': (tensao_nominal,), 'analisar_corrente': (corrente_nominal,)}.get(analise, ())
+    assert getattr(analises, analise)(df.copy(), *argumentos) == getattr(analises_referencia, analise)(df.copy(), *argumentos)
+
+def _iguais(valor, esperado):
+    return (pd.isna(valor) and pd.isna(esperado)) or valor == pytest.approx(float(esperado), rel=1e-9, abs=1e-9)
+
+def test_calcular_indicadores_igual_a_referencia(caso):
+    # Cada indicador recalculado com as expressões do pandas de analises_referencia.py.
+    df, corrente_nominal, tensao_nominal = caso
+    ind = analises.calcular_indicadores(df.copy(), corrente_nominal, tensao_nominal)
+    tensoes, correntes, fps = [c for c in TENSOES if c in df], [c for c in CORRENTES if c in df], [c for c in FPS if c in df]
+
+    if len(tensoes) == 3:
+        stats = df[tensoes].agg(['min', 'max', 'mean'])
+        assert _iguais(ind['tensao']['min'], stats.min().min())
+        assert _iguais(ind['tensao']['max'], stats.max().max())
+        assert _iguais(ind['tensao']['media'], stats.mean().mean())
+    else:
+        assert ind['tensao'] is None
+
+    if len(correntes) == 3 and analises._corrente_valida(corrente_nominal):
+        df_op = df[(df[correntes] > 1).any(axis=1)]
+        assert ind['corrente']['registros_operacao'] == len(df_op)
+        assert ind['corrente']['partidas'] == (df[correntes[0]].gt(1) & df[correntes[0]].shift(1).le(1)).sum()
+        if len(df_op):
+            assert _iguais(ind['corrente']['media_op'], df_op[correntes].mean().mean())
+            assert _iguais(ind['corrente']['max_op'], df_op[correntes].max().max())
+            fase_baixa, fase_normal = (df_op[correntes] < 1).sum(axis=1), (df_op[correntes] > corrente_nominal * 0.5).sum(axis=1)
+            assert ind['corrente']['horas_fase_aberta'] == ((fase_baixa >= 1) & (fase_normal == 2)).sum()
+    else:
+        assert ind['corrente'] is None
+
+    if fps and 'AIRMS' in df:
+        operacional = df[df['AIRMS'] > 1][fps]
+        assert ind['fp']['registros_operacao'] == len(operacional)
+        if len(operacional):
+            assert _iguais(ind['fp']['fp_medio'], operacional.mask(operacional < 0.6).mean().mean())
+    else:
+        assert ind['fp'] is None
+
+    operacao = ind['operacao']
+    assert operacao['horas_desligado'] == (int((df[fps].mean(axis=1) < 0.3).sum()) if fps else 0)
+    if len(tensoes) == 3:
+        assert operacao['horas_sem_energia'] == int((df[tensoes] < 30).all(axis=1).sum())
+        operando = df[(df[tensoes] >= 30).any(axis=1)][tensoes]
+        falta_fase = ((operando > tensao_nominal * 0.80).sum(axis=1) >= 2) & ((operando < tensao_nominal * 0.50).sum(axis=1) >= 1)
+        assert operacao['horas_falta_fase'] == int(falta_fase.sum())
+
+def test_agregados_iguais_a_analise_direta(caso):
+    df, corrente_nominal, tensao_nominal = caso
+    if len([c for c in TENSOES if c in df]) != 3: pytest.skip("agregados exigem as três tensões")
+    parciais = agregados.parciais_diarios(df, corrente_nominal, tensao_nominal).values()
+    assert agregados.analisar_parciais(parciais, corrente_nominal, tensao_nominal) == analises.analisar_dados_prodist(df.copy(), corrente_nominal, tensao_nominal)
@@ -0,0 +1,86 @@
+# Arquivo: backend/tests/test_armazenamento.py (Camada de armazenamento dos motores)
+# Os dois backends (CSV e SQLite importado do mesmo CSV) partem de uma cópia do CSV de exemplo e devem
+# terminar com os mesmos motores depois da mesma sequência de escritas.
+
+import os
+import shutil
+import stat
+
+import pandas as pd
+import pytest
+
+from armazenamento import ArmazenamentoCSV, ArmazenamentoSQLite, criar_armazenamento, importar_csv
+from main import DTYPE_MAP
+
+CSV_EXEMPLO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "clientes_motores.csv")
+
+NOVO = {'id_cliente': 7, 'nome_cliente': 'Sítio Novo', 'id_motor': 'novo0001', 'descricao_motor': 'Bomba/Poço 2',
+        'corrente_nominal': 22.0, 'potencia_cv': 15.0, 'tensao_nominal_v': 220.0, 'id_esp32': 'esp-7', 'observacoes': None}
+
+def _criar(backend, tmp_path):
+    caminho_csv = tmp_path / "clientes_motores.csv"
+    shutil.copy(CSV_EXEMPLO, caminho_csv)
+    return criar_armazenamento(backend, str(caminho_csv), str(tmp_path / "motores.db"), DTYPE_MAP)
+
+@pytest.fixture(params=["csv", "sqlite"])
+def armazenamento(request, tmp_path):
+    return _criar(request.param, tmp_path)
+
+def _escritas(armazenamento):
+    assert armazenamento.inserir(NOVO)
+    assert armazenamento.inserir({**NOVO, 'id_motor': 'novo0002', 'corrente_nominal': None, 'id_cliente': 101})
+    assert armazenamento.atualizar('a1b2c3d4', {**NOVO, 'id_motor': 'a1b2c3d4', 'descricao_motor': 'Bomba Poço 1 (troca)',
+                                                'corrente_nominal': '', 'potencia_cv': 12.5})
+    assert armazenamento.remover('f8c7ea8d')
+    assert not armazenamento.atualizar('inexistente', NOVO)
+    assert not armazenamento.remover('inexistente')
+
+def _registros(df):
+    df = df.astype(object)
+    return df.where(df.notna(), None).to_dict('records')
+
+def test_csv_e_sqlite_equivalentes(tmp_path):
+    (tmp_path / "csv").mkdir(); (tmp_path / "sqlite").mkdir()
+    csv, sqlite = _criar("csv", tmp_path / "csv"), _criar("sqlite", tmp_path / "sqlite")
+    assert isinstance(csv, ArmazenamentoCSV) and isinstance(sqlite, ArmazenamentoSQLite)
+    assert _registros(csv.carregar()) == _registros(sqlite.carregar())
+    _escritas(csv)
+    _escritas(sqlite)
+    esperado, obtido = csv.carregar(), sqlite.carregar()
+    assert list(esperado.columns) == list(obtido.columns) == list(DTYPE_MAP)
+    assert dict(esperado.dtypes) == dict(obtido.dtypes)
+    assert _registros(esperado) == _registros(obtido)
+    atualizado = next(r for r in _registros(obtido) if r['id_motor'] == 'a1b2c3d4')
+    assert atualizado['corrente_nominal'] is None and atualizado['potencia_cv'] == 12.5
+    assert [r['id_motor'] for r in _registros(obtido)] == ['a1b2c3d4', 'edff45ee', 'novo0001', 'novo0002']
+
+def test_importar_csv_substitui_o_conteudo(tmp_path):
+    caminho_db = str(tmp_path / "motores.db")
+    assert importar_csv(CSV_EXEMPLO, caminho_db, DTYPE_MAP) == len(pd.read_csv(CSV_EXEMPLO))
+    assert importar_csv(CSV_EXEMPLO, caminho_db, DTYPE_MAP) == len(pd.read_csv(CSV_EXEMPLO))
+    assert _registros(ArmazenamentoSQLite(caminho_db, DTYPE_MAP).carregar()) == _registros(ArmazenamentoCSV(CSV_EXEMPLO, DTYPE_MAP).carregar())
+
+def test_versao_muda_so_com_alteracao(armazenamento):
+    versao = armazenamento.versao()
+    assert not armazenamento.atualizar('inexistente', NOVO)
+    assert not armazenamento.remover('inexistente')
+    armazenamento.carregar()
+    assert armazenamento.versao() == versao
+    for escrita in (lambda: armazenamento.inserir(NOVO), lambda: armazenamento.atualizar('novo0001', {'observacoes': 'revisado'}),
+                    lambda: armazenamento.remover('novo0001')):
+        assert escrita()
+        assert armazenamento.versao() != versao
+        versao = armazenamento.versao()
+
+def test_reescrita_do_csv_mantem_as_permissoes(tmp_path):
+    armazenamento = _criar("csv", tmp_path)
+    os.chmod(armazenamento.caminho_csv, 0o640)
+    armazenamento.inserir(NOVO)
+    armazenamento.remover('novo0001')
+    assert stat.S_IMODE(os.stat(armazenamento.caminho_csv).st_mode) == 0o640
+    assert not [nome for nome in os.listdir(tmp_path) if nome.endswith(".tmp")]
+
+    novo = ArmazenamentoCSV(str(tmp_path / "novo.csv"), DTYPE_MAP)
+    novo.inserir(NOVO)
+    assert stat.S_IMODE(os.stat(novo.caminho_csv).st_mode) == 0o644
+    assert _registros(novo.carregar())[0]['id_motor'] == 'novo0001'
@@ -0,0 +1,101 @@
+# Arquivo: backend/tests/test_cache_relatorios.py (Cache em disco de análises e gráficos)
+# CACHE_DIR, a telemetria por motor e o catálogo ficam numa pasta temporária.
+
+import os
+import time
+
+import pytest
+
+import cache_relatorios
+import catalogo_relatorios
+import graficos
+import pdf_generator
+import telemetria_motores
+from ingestao import sha256_arquivo
+from telemetria_sintetica import gerar_telemetria, salvar_csv
+
+MOTOR = {'id_motor': 'a1b2c3d4', 'id_cliente': 1, 'nome_cliente': 'Fazenda Boa Vista', 'descricao_motor': 'Bomba 1',
+         'corrente_nominal': 15.5, 'tensao_nominal_v': 380.0}
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cache_relatorios, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(cache_relatorios, "CACHE_MAX_MB", 256)
+    return cache_relatorios
+
+def _entradas(cache):
+    return sorted(nome for nome in os.listdir(cache.CACHE_DIR) if not nome.startswith(".tmp_"))
+
+def test_chave_muda_so_com_o_que_muda_o_resultado(monkeypatch):
+    chave = cache_relatorios.gerar_chave("abc", MOTOR, {'tem_vazao': True, 'tem_nivel': False})
+    assert cache_relatorios.gerar_chave("abc", {**MOTOR, 'id_motor': 'f8c7ea8d', 'descricao_motor': 'Outra', 'nome_cliente': 'Outro'},
+                                        {'tem_nivel': 0, 'tem_vazao': 1}) == chave
+    for sha, motor, checkboxes in (("abd", MOTOR, {'tem_vazao': True, 'tem_nivel': False}),
+                                   ("abc", {**MOTOR, 'corrente_nominal': 16}, {'tem_vazao': True, 'tem_nivel': False}),
+                                   ("abc", {**MOTOR, 'tensao_nominal_v': 220.0}, {'tem_vazao': True, 'tem_nivel': False}),
+                                   ("abc", MOTOR, {'tem_vazao': True, 'tem_nivel': True})):
+        assert cache_relatorios.gerar_chave(sha, motor, checkboxes) != chave
+    monkeypatch.setattr(graficos, "GRAFICOS_DPI", graficos.GRAFICOS_DPI + 1)
+    assert cache_relatorios.gerar_chave("abc", MOTOR, {'tem_vazao': True, 'tem_nivel': False}) != chave
+
+def test_acerto_e_falha(cache):
+    chave = cache.gerar_chave("abc", MOTOR, {})
+    assert cache.obter(chave) is None
+    cache.guardar(chave, {'conclusao_final': 'CONFORME'}, "Maio de 2025", {'tensao': b"\x89PNG tensao", 'vazao': None})
+    assert cache.obter(chave) == {'comentarios': {'conclusao_final': 'CONFORME'}, 'mes_referencia': "Maio de 2025",
+                                  'graficos': {'tensao': b"\x89PNG tensao", 'vazao': None}}
+    assert cache.obter(cache.gerar_chave("abc", {**MOTOR, 'corrente_nominal': 20}, {})) is None
+
+    # Uma segunda gravação da mesma chave não substitui a primeira nem deixa temporárias.
+    cache.guardar(chave, {'conclusao_final': 'outra'}, "Junho de 2025", {})
+    assert cache.obter(chave)['mes_referencia'] == "Maio de 2025"
+    assert os.listdir(cache.CACHE_DIR) == [chave]
+
+def test_cache_desativado(cache, monkeypatch):
+    monkeypatch.setattr(cache_relatorios, "CACHE_MAX_MB", 0)
+    cache.guardar("chave", {}, "Maio de 2025", {})
+    assert cache.obter("chave") is None and not os.path.exists(cache.CACHE_DIR)
+
+def test_remove_as_menos_usadas(cache, monkeypatch):
+    monkeypatch.setattr(cache_relatorios, "CACHE_MAX_MB", 0.25)
+    imagem = os.urandom(100 * 1024)
+    agora = time.time()
+    for i, nome in enumerate("abc"):
+        cache.guardar(nome, {}, "Maio de 2025", {'tensao': imagem})
+        os.utime(os.path.join(cache.CACHE_DIR, nome), (agora - 300 + i * 100,) * 2)
+    assert _entradas(cache) == ['b', 'c']  # a terceira entrada passou do limite e saiu a mais antiga
+
+    os.utime(os.path.join(cache.CACHE_DIR, "b"), (agora - 300,) * 2)
+    os.utime(os.path.join(cache.CACHE_DIR, "c"), (agora - 200,) * 2)
+    assert cache.obter("b") is not None  # a leitura renova a entrada
+    cache.guardar("d", {}, "Maio de 2025", {'tensao': imagem})
+    assert _entradas(cache) == ['b', 'd']
+
+def test_temporarias_esquecidas_sao_removidas(cache):
+    os.makedirs(os.path.join(cache.CACHE_DIR, ".tmp_antiga"))
+    os.makedirs(os.path.join(cache.CACHE_DIR, ".tmp_em_uso"))
+    os.utime(os.path.join(cache.CACHE_DIR, ".tmp_antiga"), (time.time() - 7200,) * 2)
+    cache.guardar("a", {}, "Maio de 2025", {})
+    assert sorted(os.listdir(cache.CACHE_DIR)) == ['.tmp_em_uso', 'a']
+
+def test_acerto_de_outro_motor_guarda_a_telemetria(tmp_path, cache, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(telemetria_motores, "TELEMETRIA_DIR", str(tmp_path / "telemetria"))
+    monkeypatch.setattr(catalogo_relatorios, "CATALOGO_DATABASE", str(tmp_path / "relatorios.db"))
+    monkeypatch.setattr(catalogo_relatorios, "_local", catalogo_relatorios.threading.local())
+    monkeypatch.setattr(graficos, "GRAFICOS_WORKERS", 0)
+    caminho = str(tmp_path / "telemetria.csv")
+    salvar_csv(gerar_telemetria(500, intervalo='1h', inicio='2025-05-01', semente=1), caminho)
+    outro = {**MOTOR, 'id_motor': 'f8c7ea8d', 'descricao_motor': 'Bomba 2'}
+
+    primeiro = pdf_generator.gerar_relatorio_de_arquivo(caminho, MOTOR, {})
+    assert not primeiro['cache'] and primeiro['linhas'] == 500
+    segundo = pdf_generator.gerar_relatorio_de_arquivo(caminho, outro, {})
+    assert segundo['cache'] and segundo['linhas'] == 500  # o CSV é relido só para guardar a telemetria
+    assert telemetria_motores.meses('f8c7ea8d') == telemetria_motores.meses('a1b2c3d4') == ['2025-05']
+    assert telemetria_motores.arquivo_gravado('f8c7ea8d', sha256_arquivo(caminho))
+    assert len(telemetria_motores.ler('f8c7ea8d')) == 500
+    terceiro = pdf_generator.gerar_relatorio_de_arquivo(caminho, outro, {})
+    assert terceiro['cache'] and terceiro['linhas'] == 0
+    assert os.path.basename(segundo['caminho_pdf']) != os.path.basename(primeiro['caminho_pdf'])
@@ -0,0 +1,72 @@
+# Arquivo: backend/tests/test_catalogo.py (Catálogo dos relatórios gerados)
+# Reconstrói o catálogo a partir de uma pasta de PDFs com '_' no nome do cliente e na descrição do motor,
+# e confere a listagem com filtros e a reconstrução feita na inicialização da API.
+
+import asyncio
+
+import pytest
+
+import catalogo_relatorios
+from catalogo_relatorios import nome_arquivo_relatorio
+
+MOTORES = [
+    {'id_motor': 'a1b2c3d4', 'id_cliente': 1, 'nome_cliente': 'Agro_Sul Ltda', 'descricao_motor': 'Bomba 1'},
+    {'id_motor': 'f8c7ea8d', 'id_cliente': 1, 'nome_cliente': 'Agro_Sul Ltda', 'descricao_motor': 'Poço_2 Norte'},
+    {'id_motor': '0c9d8e7f', 'id_cliente': 2, 'nome_cliente': 'Fazenda Boa Vista', 'descricao_motor': 'Pivô/Central'},
+]
+
+@pytest.fixture
+def catalogo(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalogo_relatorios, "CATALOGO_DATABASE", str(tmp_path / "relatorios.db"))
+    monkeypatch.setattr(catalogo_relatorios, "_local", catalogo_relatorios.threading.local())
+    return catalogo_relatorios
+
+def _pdfs(pasta, arquivos):
+    pasta.mkdir(exist_ok=True)
+    for motor, mes_referencia in arquivos:
+        (pasta / nome_arquivo_relatorio(motor, mes_referencia)).write_bytes(b"%PDF-1.4\n")
+
+def test_reconstruir_com_sublinhado_no_nome(tmp_path, catalogo):
+    pasta = tmp_path / "reports_generated"
+    _pdfs(pasta, [(MOTORES[0], "Maio de 2025"), (MOTORES[0], "Junho de 2025"), (MOTORES[1], "Maio de 2025"),
+                  (MOTORES[2], "Abril de 2024"), ({'nome_cliente': 'Removido', 'descricao_motor': 'X'}, "Maio de 2025")])
+    (pasta / "anotacoes.txt").write_text("ignorado")
+    assert catalogo.vazio()
+
+    total, sem_motor = catalogo.reconstruir(str(pasta), MOTORES)
+    assert (total, sem_motor) == (5, ["Relatorio_Removido_X_Maio_2025.pdf"])
+    assert not catalogo.vazio()
+
+    linha = catalogo.obter(nome_arquivo_relatorio(MOTORES[1], "Maio de 2025"))
+    assert (linha['id_motor'], linha['id_cliente'], linha['ano'], linha['mes']) == ('f8c7ea8d', 1, 2025, 5)
+    assert catalogo.listar(id_motor='a1b2c3d4')[0] == 2
+    assert [l['mes'] for l in catalogo.listar(id_motor='a1b2c3d4')[1]] == [6, 5]
+    assert {l['id_motor'] for l in catalogo.listar(id_cliente=1, ano=2025, mes=5)[1]} == {'a1b2c3d4', 'f8c7ea8d'}
+    assert [l['id_motor'] for l in catalogo.listar(id_cliente=2)[1]] == ['0c9d8e7f']
+    assert catalogo.listar(busca='Poço_2')[0] == 1
+    total, pagina = catalogo.listar(limite=2, deslocamento=2)
+    assert total == 5 and len(pagina) == 2
+
+    # PDFs apagados saem do catálogo na próxima reconstrução.
+    (pasta / nome_arquivo_relatorio(MOTORES[2], "Abril de 2024")).unlink()
+    assert catalogo.reconstruir(str(pasta), MOTORES)[0] == 4
+    assert catalogo.listar(id_cliente=2)[0] == 0
+
+def test_inicializacao_cataloga_so_com_catalogo_vazio(tmp_path, catalogo, monkeypatch):
+    import main
+
+    class Registro:
+        def registros(self):
+            return MOTORES
+
+    pasta = tmp_path / "reports_generated"
+    _pdfs(pasta, [(MOTORES[0], "Maio de 2025"), (MOTORES[1], "Maio de 2025")])
+    monkeypatch.setattr(main, "REPORTS_FOLDER", str(pasta))
+    monkeypatch.setattr(main, "registro", Registro())
+    asyncio.run(main.reconstruir_catalogo())
+    assert catalogo.listar(id_cliente=1)[0] == 2
+
+    # Com o catálogo já preenchido, a inicialização não varre a pasta de novo.
+    _pdfs(pasta, [(MOTORES[2], "Maio de 2025")])
+    asyncio.run(main.reconstruir_catalogo())
+    assert catalogo.listar()[0] == 2
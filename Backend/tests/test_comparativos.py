@@ -0,0 +1,66 @@
+# Arquivo: backend/tests/test_comparativos.py (Comparativos entre meses e entre motores)
+# Telemetria guardada numa pasta temporária para parte da frota; motores sem telemetria (inclusive com
+# id_motor que não serve como nome de pasta) aparecem em 'sem_dados' e só data ou critério inválidos dão 400.
+
+import pytest
+from fastapi.testclient import TestClient
+
+pytest.importorskip("pyarrow")
+
+import comparativos
+import ingestao
+import main
+import telemetria_motores
+from telemetria_sintetica import gerar_telemetria, salvar_csv
+
+MOTORES = [
+    {'id_motor': 'a1b2c3d4', 'id_cliente': 1, 'nome_cliente': 'Fazenda Boa Vista', 'descricao_motor': 'Bomba 1',
+     'corrente_nominal': 15.5, 'tensao_nominal_v': 380.0},
+    {'id_motor': 'Bomba 3', 'id_cliente': 1, 'nome_cliente': 'Fazenda Boa Vista', 'descricao_motor': 'Bomba 3',
+     'corrente_nominal': 15.5, 'tensao_nominal_v': 380.0},
+    {'id_motor': 'f8c7ea8d', 'id_cliente': 2, 'nome_cliente': 'Sítio Alegre', 'descricao_motor': 'Poço',
+     'corrente_nominal': 80.0, 'tensao_nominal_v': 380.0},
+]
+
+class Registro:
+    def registros(self):
+        return [dict(m) for m in MOTORES]
+
+    def motor(self, id_motor):
+        return next((dict(m) for m in MOTORES if m['id_motor'] == id_motor), None)
+
+    def motores_do_cliente(self, id_cliente):
+        return [dict(m) for m in MOTORES if m['id_cliente'] == id_cliente]
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetria_motores, "TELEMETRIA_DIR", str(tmp_path / "telemetria"))
+    monkeypatch.setattr(main, "registro", Registro())
+    caminho = tmp_path / "a1b2c3d4.csv"
+    salvar_csv(gerar_telemetria(24 * 45, intervalo='1h', inicio='2025-04-20', semente=1), caminho)
+    telemetria_motores.gravar('a1b2c3d4', ingestao.ler_telemetria(str(caminho)))
+    return TestClient(main.app)
+
+def test_meses_de_id_invalido_vazio(cliente):
+    assert telemetria_motores.meses('Bomba 3') == []
+    assert telemetria_motores.meses('../fora') == []
+    assert telemetria_motores.meses('a1b2c3d4') == ['2025-04', '2025-05', '2025-06']
+
+def test_frota_com_id_invalido(cliente):
+    resposta = cliente.get("/api/comparativos/tendencias")
+    assert resposta.status_code == 200
+    corpo = resposta.json()
+    assert corpo['motores'] == 3 and sorted(corpo['sem_dados']) == ['Bomba 3', 'f8c7ea8d']
+    assert [(l['id_motor'], l['mes']) for l in corpo['linhas']] == [('a1b2c3d4', '2025-04'), ('a1b2c3d4', '2025-05'), ('a1b2c3d4', '2025-06')]
+
+    resposta = cliente.get("/api/comparativos/ranking", params={'id_cliente': 1, 'inicio': '2025-05-01', 'fim': '2025-05-31'})
+    assert resposta.status_code == 200
+    assert [l['id_motor'] for l in resposta.json()['linhas']] == ['a1b2c3d4']
+    assert resposta.json()['sem_dados'] == ['Bomba 3']
+
+def test_parametros_invalidos_dao_400(cliente):
+    assert cliente.get("/api/comparativos/tendencias", params={'inicio': '2025-13-45'}).status_code == 400
+    resposta = cliente.get("/api/comparativos/ranking", params={'criterio': 'inexistente'})
+    assert resposta.status_code == 400 and "Critério desconhecido" in resposta.json()['detail']
+    with pytest.raises(comparativos.ParametroInvalido):
+        comparativos.tendencias(MOTORES, fim='ontem')
@@ -0,0 +1,103 @@
+# Arquivo: backend/tests/test_emails.py (Fila de envio de relatórios por e-mail)
+# EMAIL_BACKEND=arquivo: cada mensagem vira um .eml numa pasta temporária, e a caixa de saída fica num
+# EMAILS_DATABASE temporário.
+
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from email import policy
+from email.parser import BytesParser
+
+import pytest
+
+import fila_emails
+
+@pytest.fixture
+def fila(tmp_path, monkeypatch):
+    monkeypatch.setattr(fila_emails, "EMAILS_DATABASE", str(tmp_path / "emails.db"))
+    monkeypatch.setattr(fila_emails, "EMAIL_PASTA_SAIDA", str(tmp_path / "saida"))
+    monkeypatch.setattr(fila_emails, "EMAIL_BACKEND", "arquivo")
+    monkeypatch.setattr(fila_emails, "EMAIL_MAX_ANEXOS", 10)
+    monkeypatch.setattr(fila_emails, "_local", fila_emails.threading.local())
+    return fila_emails
+
+def _relatorios(pasta, quantidade):
+    caminhos = []
+    for i in range(quantidade):
+        caminho = pasta / f"Relatorio_{i:03d}.pdf"
+        caminho.write_bytes(b"%PDF-1.4\n" + str(i).encode())
+        caminhos.append(str(caminho))
+    return caminhos
+
+def _mensagens(pasta):
+    if not os.path.isdir(pasta): return []
+    mensagens = []
+    for nome in sorted(os.listdir(pasta)):
+        with open(os.path.join(pasta, nome), 'rb') as arquivo:
+            mensagens.append(BytesParser(policy=policy.default).parse(arquivo))
+    return mensagens
+
+def _anexos(mensagem):
+    return [parte.get_filename() for parte in mensagem.iter_attachments()]
+
+def _rodada(banco, pasta_saida, barreira):
+    # Uma rodada de envio em outro processo (outro worker do uvicorn). A barreira faz as duas rodadas lerem
+    # os pendentes ao mesmo tempo, logo antes da reserva.
+    fila_emails.EMAILS_DATABASE, fila_emails.EMAIL_PASTA_SAIDA = banco, pasta_saida
+    recuperar = fila_emails._recuperar_reservas
+    def recuperar_e_esperar():
+        recuperar()
+        barreira.wait(timeout=60)
+    fila_emails._recuperar_reservas = recuperar_e_esperar
+    return asyncio.run(fila_emails.processar_pendentes(fila_emails.criar_envio('arquivo')))
+
+def test_rodadas_concorrentes_enviam_cada_linha_uma_vez(tmp_path, fila):
+    caminhos = _relatorios(tmp_path, 2000)
+    for i, caminho in enumerate(caminhos):
+        fila.enfileirar(f"cliente{i % 40}@exemplo.com", caminho, f"Relatório {i}")
+    contexto = multiprocessing.get_context("spawn")
+    with contexto.Manager() as gerenciador, ProcessPoolExecutor(2, mp_context=contexto) as executor:
+        barreira = gerenciador.Barrier(2)
+        rodadas = [executor.submit(_rodada, fila.EMAILS_DATABASE, fila.EMAIL_PASTA_SAIDA, barreira) for _ in range(2)]
+        enviados = [rodada.result() for rodada in rodadas]
+    assert sum(enviados) == 2000
+    anexos = [nome for mensagem in _mensagens(fila.EMAIL_PASTA_SAIDA) for nome in _anexos(mensagem)]
+    assert sorted(anexos) == sorted(os.path.basename(c) for c in caminhos)
+    assert fila.resumo() == {'sent': 2000}
+
+def test_reserva_de_processo_morto_volta_para_a_fila(tmp_path, fila):
+    processo = subprocess.Popen([sys.executable, "-c", "pass"])
+    processo.wait()
+    orfao, de_outro_worker = (fila.enfileirar("a@exemplo.com", caminho, "Relatório") for caminho in _relatorios(tmp_path, 2))
+    con = fila._conexao()
+    con.execute("UPDATE emails SET status = 'sending', dono = ?, reservado_em = '2025-01-01T00:00:00' WHERE id_email = ?", (processo.pid, orfao))
+    con.execute("UPDATE emails SET status = 'sending', dono = ?, reservado_em = '2025-01-01T00:00:00' WHERE id_email = ?", (os.getppid(), de_outro_worker))
+
+    assert asyncio.run(fila.processar_pendentes(fila.criar_envio())) == 1
+    assert fila.obter(orfao)['status'] == 'sent'
+    assert fila.obter(de_outro_worker)['status'] == 'sending'  # o dono ainda está vivo
+
+def test_relatorios_do_mesmo_destinatario_numa_mensagem(tmp_path, fila, monkeypatch):
+    monkeypatch.setattr(fila_emails, "EMAIL_MAX_ANEXOS", 3)
+    caminhos = _relatorios(tmp_path, 5)
+    for caminho in caminhos[:4]:
+        fila.enfileirar("cliente@exemplo.com", caminho, "Relatório")
+    assert fila.enfileirar("cliente@exemplo.com", caminhos[0], "Relatório") == fila.enfileirar("cliente@exemplo.com", caminhos[0], "Outro")
+    fila.enfileirar("outro@exemplo.com", caminhos[4], "Relatório Técnico - Bomba 5")
+
+    assert asyncio.run(fila.processar_pendentes(fila.criar_envio())) == 5
+    mensagens = {tuple(_anexos(m)): m for m in _mensagens(fila.EMAIL_PASTA_SAIDA)}
+    assert sorted(mensagens) == [("Relatorio_000.pdf", "Relatorio_001.pdf", "Relatorio_002.pdf"), ("Relatorio_003.pdf",), ("Relatorio_004.pdf",)]
+    assert mensagens[("Relatorio_000.pdf", "Relatorio_001.pdf", "Relatorio_002.pdf")]['Subject'] == "Relatórios Técnicos (3 relatórios)"
+    assert mensagens[("Relatorio_004.pdf",)]['To'] == "outro@exemplo.com"
+    assert mensagens[("Relatorio_004.pdf",)]['Subject'] == "Relatório Técnico - Bomba 5"
+
+def test_anexo_ausente_falha_sem_bloquear_os_outros(tmp_path, fila):
+    presente, ausente = _relatorios(tmp_path, 2)
+    os.remove(ausente)
+    ids = [fila.enfileirar("cliente@exemplo.com", caminho, "Relatório") for caminho in (presente, ausente)]
+    assert asyncio.run(fila.processar_pendentes(fila.criar_envio())) == 1
+    assert [fila.obter(i)['status'] for i in ids] == ['sent', 'failed']
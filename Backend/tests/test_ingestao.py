@@ -0,0 +1,64 @@
+# Arquivo: backend/tests/test_ingestao.py (Leitura em blocos dos CSVs enviados)
+# A análise incremental (um parcial por bloco, combinado em ordem) deve gerar os mesmos comentários que a
+# análise do arquivo inteiro, e o limite de memória só vale quando o arquivo precisa ser lido inteiro.
+
+import numpy as np
+import pytest
+
+import agregados
+import graficos
+import ingestao
+import pdf_generator
+from analises import analisar_dados_prodist
+from telemetria_sintetica import gerar_telemetria, salvar_csv
+
+DADOS_MOTOR = {'id_motor': 'teste', 'corrente_nominal': 15.5, 'tensao_nominal_v': 380.0}
+
+def _csv(tmp_path, df, nome="telemetria.csv"):
+    caminho = tmp_path / nome
+    salvar_csv(df, caminho)
+    return str(caminho)
+
+def _com_lacunas(df, semente=3):
+    cols = df.columns[:9]
+    df[cols] = df[cols].mask(np.random.default_rng(semente).random(df[cols].shape) < 0.1)
+    return df
+
+@pytest.mark.parametrize("linhas_por_bloco", [13, 250, 100_000])
+@pytest.mark.parametrize("gerar", [lambda: gerar_telemetria(3000, semente=1, eventos_por_mil=20),
+                                   lambda: _com_lacunas(gerar_telemetria(2000, semente=2, eventos_por_mil=20)),
+                                   lambda: gerar_telemetria(1500, semente=4).drop(columns=['CIRMS', 'BFP'])],
+                         ids=["eventos", "lacunas", "fases-ausentes"])
+def test_analise_em_blocos_igual_ao_arquivo_inteiro(tmp_path, monkeypatch, gerar, linhas_por_bloco):
+    monkeypatch.setattr(ingestao, "LINHAS_POR_BLOCO", linhas_por_bloco)
+    caminho = _csv(tmp_path, gerar())
+    resumo = pdf_generator.ler_em_blocos(caminho, DADOS_MOTOR, {})
+    df = ingestao.ler_telemetria(caminho)
+    assert resumo['ordenado'] and resumo['linhas'] == len(df)
+    assert resumo['data_final'] == df.index.max()
+    esperado = analisar_dados_prodist(df, 15.5, 380.0)
+    assert agregados.analisar_parciais([resumo['parcial']], 15.5, 380.0) == esperado
+
+def test_series_dos_graficos_limitadas(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestao, "LINHAS_POR_BLOCO", 500)
+    resumo = pdf_generator.ler_em_blocos(_csv(tmp_path, gerar_telemetria(20_000, semente=5)), DADOS_MOTOR, {})
+    n_pontos = graficos.pontos_alvo()
+    assert resumo['series'] and all(len(y) <= 4 * n_pontos for _, y in resumo['series'].values())
+    for x, y in resumo['series'].values():
+        assert (np.diff(x.astype('int64')) >= 0).all()
+
+def test_arquivo_fora_de_ordem_e_detectado(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestao, "LINHAS_POR_BLOCO", 100)
+    df = gerar_telemetria(1000, semente=6)
+    caminho = _csv(tmp_path, df.iloc[np.r_[500:1000, 0:500]])
+    assert not pdf_generator.ler_em_blocos(caminho, DADOS_MOTOR, {})['ordenado']
+
+def test_limite_de_memoria_so_para_leitura_inteira(tmp_path, monkeypatch):
+    # Em ordem, o arquivo é analisado bloco a bloco mesmo maior que o limite; fora de ordem precisa caber nele.
+    monkeypatch.setattr(ingestao, "LINHAS_POR_BLOCO", 1000)
+    monkeypatch.setattr(ingestao, "LIMITE_MEMORIA_INGESTAO_MB", 0.05)
+    df = gerar_telemetria(5000, semente=7)
+    resumo = pdf_generator.ler_em_blocos(_csv(tmp_path, df), DADOS_MOTOR, {})
+    assert resumo['ordenado'] and resumo['linhas'] == 5000
+    with pytest.raises(ingestao.LimiteMemoriaExcedido):
+        ingestao.ler_telemetria(_csv(tmp_path, df.iloc[::-1], "invertido.csv"))
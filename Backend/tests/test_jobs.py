@@ -0,0 +1,97 @@
+# Arquivo: backend/tests/test_jobs.py (Jobs assíncronos de geração de relatório)
+# JOBS_DATABASE, o diretório de trabalho, o cache e o catálogo ficam numa pasta temporária; os jobs são
+# despachados para um pool de processos próprio.
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import fila_relatorios
+import jobs_relatorios
+from telemetria_sintetica import gerar_telemetria, salvar_csv
+
+DADOS_MOTOR = {'id_motor': 'a1b2c3d4', 'id_cliente': 1, 'nome_cliente': 'Fazenda Boa Vista', 'descricao_motor': 'Bomba 1',
+               'corrente_nominal': 15.5, 'tensao_nominal_v': 380.0}
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for variavel, valor in (('JOBS_DATABASE', str(tmp_path / 'jobs.db')), ('CACHE_DIR', 'cache'), ('TELEMETRIA_DIR', 'telemetria'),
+                            ('CATALOGO_DATABASE', 'relatorios.db'), ('GRAFICOS_WORKERS', '0')):
+        monkeypatch.setenv(variavel, valor)
+    monkeypatch.setattr(jobs_relatorios, "JOBS_DATABASE", str(tmp_path / 'jobs.db'))
+    monkeypatch.setattr(jobs_relatorios, "_local", jobs_relatorios.threading.local())
+    return jobs_relatorios
+
+@pytest.fixture
+def pool(jobs, monkeypatch):
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        monkeypatch.setattr(fila_relatorios, "submeter", lambda funcao, *args, bloquear=False: executor.submit(funcao, *args))
+        yield executor
+
+def _upload(tmp_path, nome="upload.csv"):
+    caminho = tmp_path / nome
+    salvar_csv(gerar_telemetria(300, intervalo='1h', inicio='2025-05-01', semente=1), caminho)
+    return str(caminho)
+
+def _aguardar(id_job, prazo=120):
+    limite = time.monotonic() + prazo
+    while time.monotonic() < limite:
+        job = jobs_relatorios.obter_job(id_job)
+        if job['status'] in ('done', 'failed'): return job
+        time.sleep(0.1)
+    raise AssertionError(f"job {id_job} não terminou: {job}")
+
+def test_job_concluido(tmp_path, pool):
+    caminho_csv = _upload(tmp_path)
+    id_job = jobs_relatorios.criar_job('a1b2c3d4', caminho_csv, DADOS_MOTOR, {})
+    assert jobs_relatorios.obter_job(id_job)['status'] == 'queued'
+    jobs_relatorios.despachar()
+    job = _aguardar(id_job)
+    assert job['status'] == 'done' and job['erro'] is None
+    assert job['url_relatorio'] == f"/api/relatorios-salvos/{job['nome_arquivo']}"
+    assert (tmp_path / "reports_generated" / job['nome_arquivo']).exists()
+    assert job['etapas'] and not os.path.exists(caminho_csv)
+
+def test_job_com_arquivo_vazio_falha(tmp_path, pool):
+    caminho_csv = tmp_path / "vazio.csv"
+    caminho_csv.write_text("")
+    id_job = jobs_relatorios.criar_job('a1b2c3d4', str(caminho_csv), DADOS_MOTOR, {})
+    jobs_relatorios.despachar()
+    job = _aguardar(id_job)
+    assert job['status'] == 'failed' and job['erro'] and job['url_relatorio'] is None
+    assert not caminho_csv.exists()
+
+def test_worker_que_morre_falha_o_job(tmp_path, jobs, monkeypatch):
+    # O worker sai sem marcar o job: o callback do futuro (BrokenProcessPool) marca a falha e apaga o upload.
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        monkeypatch.setattr(fila_relatorios, "submeter", lambda funcao, *args, bloquear=False: executor.submit(os._exit, 1))
+        caminho_csv = _upload(tmp_path)
+        id_job = jobs_relatorios.criar_job('a1b2c3d4', caminho_csv, DADOS_MOTOR, {})
+        jobs_relatorios.despachar()
+        job = _aguardar(id_job)
+    assert job['status'] == 'failed' and job['erro'].startswith("Processamento interrompido")
+    assert not os.path.exists(caminho_csv)
+
+def test_jobs_de_processo_morto_voltam_para_a_fila(tmp_path, jobs):
+    processo = subprocess.Popen([sys.executable, "-c", "pass"])
+    processo.wait()
+    morto = processo.pid
+    com_arquivo = jobs.criar_job('a1b2c3d4', _upload(tmp_path), DADOS_MOTOR, {})
+    sem_arquivo = jobs.criar_job('a1b2c3d4', str(tmp_path / "apagado.csv"), DADOS_MOTOR, {})
+    deste_processo = jobs.criar_job('a1b2c3d4', _upload(tmp_path, "outro.csv"), DADOS_MOTOR, {})
+    jobs._atualizar(com_arquivo, status='running', despachado_por=morto, iniciado_em=jobs._agora())
+    jobs._atualizar(sem_arquivo, despachado_por=morto)
+    jobs._atualizar(deste_processo, status='running', despachado_por=os.getpid())
+
+    jobs.recuperar_jobs_interrompidos()
+    assert jobs.obter_job(com_arquivo)['status'] == 'queued'
+    linha = jobs._conexao().execute("SELECT despachado_por, iniciado_em FROM jobs WHERE id_job = ?", (com_arquivo,)).fetchone()
+    assert linha == {'despachado_por': None, 'iniciado_em': None}
+    assert jobs.obter_job(sem_arquivo)['status'] == 'failed'
+    assert jobs.obter_job(deste_processo)['status'] == 'running'
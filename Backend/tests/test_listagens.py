@@ -0,0 +1,88 @@
+# Arquivo: backend/tests/test_listagens.py (Listagens de motores e clientes)
+# GET /api/registros e /api/clientes sobre uma cópia do CSV de exemplo: ETag/304, Vary, projeção,
+# paginação, parâmetros inválidos e NDJSON, com e sem o orjson.
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import serializacao
+from armazenamento import criar_armazenamento
+from registro_motores import RegistroMotores
+
+def _json_estrito(texto):
+    def rejeitar(constante):
+        raise ValueError(f"{constante} não é JSON válido")
+    return json.loads(texto, parse_constant=rejeitar)
+
+def _vary(resposta):
+    return [valor.strip() for valor in resposta.headers.get("Vary", "").split(",")]
+
+@pytest.fixture(params=["orjson", "json"])
+def cliente(request, tmp_path, monkeypatch):
+    if request.param == "json": monkeypatch.setattr(serializacao, "orjson", None)
+    elif serializacao.orjson is None: pytest.skip("orjson não está instalado")
+    caminho_csv = tmp_path / "clientes_motores.csv"
+    shutil.copy(os.path.join(os.path.dirname(main.__file__), "clientes_motores.csv"), caminho_csv)
+    registro = RegistroMotores(criar_armazenamento("csv", str(caminho_csv), str(tmp_path / "motores.db"), main.DTYPE_MAP))
+    monkeypatch.setattr(main, "registro", registro)
+    return TestClient(main.app)
+
+def test_listagem_completa(cliente):
+    resposta = cliente.get("/api/registros")
+    assert resposta.status_code == 200 and resposta.headers["content-type"] == "application/json"
+    assert "Accept" in _vary(resposta) and resposta.headers["X-Total-Count"] == "3"
+    corpo = _json_estrito(resposta.text)
+    assert [m['id_motor'] for m in corpo][:2] == ['f8c7ea8d', 'a1b2c3d4']
+    assert set(corpo[0]) == set(main.DTYPE_MAP)
+
+def test_etag_e_304(cliente):
+    etag = cliente.get("/api/registros").headers["ETag"]
+    resposta = cliente.get("/api/registros", headers={"If-None-Match": etag})
+    assert resposta.status_code == 304 and resposta.content == b"" and resposta.headers["ETag"] == etag
+    assert "Accept" in _vary(resposta)
+    assert cliente.get("/api/registros", headers={"If-None-Match": f'"outra", W/{etag}'}).status_code == 304
+
+    # Cada representação (projeção, página, formato) tem sua própria tag.
+    for params in ({'campos': 'id_motor'}, {'por_pagina': 2}, {'formato': 'ndjson'}):
+        resposta = cliente.get("/api/registros", params=params, headers={"If-None-Match": etag})
+        assert resposta.status_code == 200 and resposta.headers["ETag"] != etag
+    assert cliente.get("/api/registros", headers={"If-None-Match": etag, "Accept": "application/x-ndjson"}).status_code == 200
+
+    # Uma alteração no registro muda a versão.
+    main.registro.inserir({'id_cliente': 7, 'nome_cliente': 'Sítio Novo', 'id_motor': 'novo0001', 'descricao_motor': 'Bomba'})
+    resposta = cliente.get("/api/registros", headers={"If-None-Match": etag})
+    assert resposta.status_code == 200 and resposta.headers["ETag"] != etag and resposta.headers["X-Total-Count"] == "4"
+
+def test_projecao_e_paginacao(cliente):
+    resposta = cliente.get("/api/registros", params={'campos': 'id_motor, nome_cliente,id_motor', 'pagina': 2, 'por_pagina': 2})
+    assert resposta.status_code == 200 and resposta.headers["X-Total-Count"] == "3"
+    corpo = _json_estrito(resposta.text)
+    assert len(corpo) == 1 and list(corpo[0]) == ['id_motor', 'nome_cliente']
+    clientes = _json_estrito(cliente.get("/api/clientes", params={'campos': 'nome_cliente'}).text)
+    assert {'nome_cliente': 'Ricardo'} in clientes and all(list(c) == ['nome_cliente'] for c in clientes)
+
+@pytest.mark.parametrize("params", [{'campos': 'id_motor,inexistente'}, {'campos': ' , '}, {'formato': 'xml'}])
+def test_parametros_invalidos(cliente, params):
+    resposta = cliente.get("/api/registros", params=params)
+    assert resposta.status_code == 400
+
+def test_ndjson(cliente):
+    json_completo = _json_estrito(cliente.get("/api/registros").text)
+    for resposta in (cliente.get("/api/registros", params={'formato': 'ndjson'}),
+                     cliente.get("/api/registros", headers={"Accept": "application/x-ndjson"})):
+        assert resposta.status_code == 200 and resposta.headers["content-type"] == "application/x-ndjson"
+        assert resposta.text.endswith("\n")
+        assert [_json_estrito(linha) for linha in resposta.text.splitlines()] == json_completo
+
+def test_valores_nao_finitos_viram_null(cliente):
+    corpo = {'a': float('nan'), 'b': [np.float32('inf'), 1.5, np.float64('nan')], 'c': (1, float('-inf')), 'd': np.int64(3)}
+    assert _json_estrito(serializacao.codificar(corpo)) == {'a': None, 'b': [None, 1.5, None], 'c': [1, None], 'd': 3}
+    blocos = list(serializacao.ndjson([{'x': float('nan')}, {'x': 2.0}, {'x': 3}], linhas_por_bloco=2))
+    assert len(blocos) == 2 and all(bloco.endswith(b"\n") for bloco in blocos)
+    assert [_json_estrito(linha) for linha in b"".join(blocos).decode().splitlines()] == [{'x': None}, {'x': 2.0}, {'x': 3}]
@@ -0,0 +1,64 @@
+# Arquivo: backend/tests/test_lotes.py (Relatórios em lote)
+# Roda os relatórios num pool de processos próprio, com o diretório de trabalho, o cache, a telemetria e o
+# catálogo numa pasta temporária.
+
+import json
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import fila_relatorios
+import lotes_relatorios
+from telemetria_sintetica import gerar_telemetria, salvar_csv
+
+MOTORES = {
+    'a1b2c3d4': {'id_motor': 'a1b2c3d4', 'id_cliente': 1, 'nome_cliente': 'Fazenda Boa Vista', 'descricao_motor': 'Bomba 1',
+                 'corrente_nominal': 15.5, 'tensao_nominal_v': 380.0},
+    'f8c7ea8d': {'id_motor': 'f8c7ea8d', 'id_cliente': 1, 'nome_cliente': 'Fazenda Boa Vista', 'descricao_motor': 'Bomba 2',
+                 'corrente_nominal': 80.0, 'tensao_nominal_v': 380.0},
+}
+
+class Registro:
+    def motor(self, id_motor):
+        return dict(MOTORES[id_motor]) if id_motor in MOTORES else None
+
+    def motor_por_esp32(self, id_esp32):
+        return None
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for variavel, valor in (('CACHE_DIR', 'cache'), ('TELEMETRIA_DIR', 'telemetria'), ('CATALOGO_DATABASE', 'relatorios.db'),
+                            ('GRAFICOS_WORKERS', '0')):
+        monkeypatch.setenv(variavel, valor)
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as executor:
+        monkeypatch.setattr(fila_relatorios, "submeter", lambda funcao, *args, bloquear=False: executor.submit(fila_relatorios._chamar, funcao, *args))
+        yield executor
+
+def _csv(pasta, nome, **kwargs):
+    caminho = pasta / nome
+    salvar_csv(gerar_telemetria(300, intervalo='1h', inicio='2025-05-01', **kwargs), caminho)
+    return nome, str(caminho)
+
+def test_mesmo_motor_e_mes_no_lote_nao_sobrescreve(tmp_path, pool):
+    arquivos = [_csv(tmp_path, 'a1b2c3d4_parte1.csv', semente=1), _csv(tmp_path, 'a1b2c3d4_parte2.csv', semente=2),
+                _csv(tmp_path, 'f8c7ea8d.csv', semente=3)]
+    itens = lotes_relatorios.gerar_lote(arquivos, Registro(), {})
+    do_motor = [item for item in itens if item['id_motor'] == 'a1b2c3d4']
+    assert sorted(item['status'] for item in do_motor) == ['done', 'failed']
+    falha = next(item for item in do_motor if item['status'] == 'failed')
+    assert "mesmo motor e mês de referência" in falha['erro']
+    assert next(item for item in itens if item['id_motor'] == 'f8c7ea8d')['status'] == 'done'
+
+    manifesto = lotes_relatorios.empacotar_lote(itens, str(tmp_path / "lote.zip"))
+    assert (manifesto['sucesso'], manifesto['falhas']) == (2, 1)
+    with zipfile.ZipFile(tmp_path / "lote.zip") as pacote:
+        pdfs = [nome for nome in pacote.namelist() if nome.endswith(".pdf")]
+        assert len(pdfs) == 2 and len(set(pdfs)) == 2
+        assert json.loads(pacote.read("manifest.json"))['falhas'] == 1
+
+def test_arquivo_sem_motor_falha(tmp_path, pool):
+    itens = lotes_relatorios.gerar_lote([_csv(tmp_path, 'desconhecido.csv', semente=4)], Registro(), {})
+    assert itens[0]['status'] == 'failed' and "id_motor" in itens[0]['erro']